@@ -0,0 +1,7 @@
+"""
+Аналитика по колоночному снимку истории выдачи
+"""
+from .snapshot import build_snapshot, compact_partition, read_watermark
+from .history import SerpHistory
+
+__all__ = ['build_snapshot', 'compact_partition', 'read_watermark', 'SerpHistory']
@@ -0,0 +1,137 @@
+"""
+Аналитика по снимку истории выдачи: динамика позиций, доля видимости, пересечение доменов
+"""
+import os
+from config import Config
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    from pyarrow import fs
+except ImportError:  # Аналитика по снимку необязательна: без pyarrow недоступна
+    pa = pc = ds = fs = None
+
+
+# Доля кликов по позиции выдачи (усредненная кривая CTR) для доли видимости
+CTR_BY_POSITION = {1: 0.28, 2: 0.15, 3: 0.11, 4: 0.08, 5: 0.07, 6: 0.05, 7: 0.04, 8: 0.03, 9: 0.03, 10: 0.02}
+
+
+class SerpHistory:
+    """История выдачи из колоночного снимка (analytics/snapshot.py).
+
+    Файлы открываются через memory mapping, читаются только нужные колонки,
+    а фильтры по дате и поисковой системе отсекают секции целиком, не
+    открывая их файлы. OLTP-база при анализе не используется.
+    """
+
+    def __init__(self, root=None):
+        if pa is None:
+            raise RuntimeError("Для аналитики по снимку нужен пакет pyarrow")
+        self.root = root or Config.SNAPSHOT_DIR
+        self._dataset = None
+
+    @property
+    def dataset(self):
+        """Набор файлов снимка с секциями date и engine"""
+        if self._dataset is None:
+            if not os.path.isdir(self.root):
+                raise FileNotFoundError(f"Снимок истории не найден: {self.root}")
+            self._dataset = ds.dataset(
+                self.root,
+                format='ipc',
+                filesystem=fs.LocalFileSystem(use_mmap=True),
+                partitioning=ds.partitioning(
+                    pa.schema([('date', pa.string()), ('engine', pa.string())]), flavor='hive'
+                ),
+                exclude_invalid_files=True,
+            )
+        return self._dataset
+
+    def refresh(self):
+        """Перечитать список файлов (после очередного запуска снимка)"""
+        self._dataset = None
+
+    def load(self, columns=None, date_from=None, date_to=None, engine=None, keyword=None, domains=None):
+        """Таблица Arrow с выбранными колонками; даты - строки или date, интервал [date_from, date_to)"""
+        conditions = []
+        if date_from is not None:
+            conditions.append(ds.field('date') >= str(date_from))
+        if date_to is not None:
+            conditions.append(ds.field('date') < str(date_to))
+        if engine is not None:
+            conditions.append(ds.field('engine') == engine)
+        if keyword is not None:
+            conditions.append(ds.field('keyword') == keyword)
+        if domains is not None:
+            conditions.append(ds.field('domain').isin(list(domains)))
+
+        condition = None
+        for item in conditions:
+            condition = item if condition is None else condition & item
+        return self.dataset.to_table(columns=columns, filter=condition)
+
+    def position_trend(self, domain, keyword=None, engine=None, date_from=None, date_to=None):
+        """Динамика позиций домена по дням: [{date, engine, avg_position, best_position, results}]"""
+        table = self.load(
+            ['date', 'engine', 'position'], date_from, date_to, engine, keyword, domains=[domain]
+        )
+        grouped = table.group_by(['date', 'engine']).aggregate([
+            ('position', 'mean'), ('position', 'min'), ('position', 'count')
+        ]).sort_by([('date', 'ascending'), ('engine', 'ascending')])
+        return [
+            {
+                'date': row['date'],
+                'engine': row['engine'],
+                'avg_position': round(row['position_mean'], 2),
+                'best_position': row['position_min'],
+                'results': row['position_count'],
+            }
+            for row in grouped.to_pylist()
+        ]
+
+    def share_of_voice(self, keyword=None, engine=None, date_from=None, date_to=None, limit=20):
+        """Доля видимости доменов по CTR позиций: [{domain, share, appearances, avg_position}]"""
+        table = self.load(['domain', 'position'], date_from, date_to, engine, keyword)
+        table = table.filter(pc.less_equal(table['position'], max(CTR_BY_POSITION)))
+        if not table.num_rows:
+            return []
+
+        weights = pa.array([CTR_BY_POSITION[position] for position in range(1, max(CTR_BY_POSITION) + 1)])
+        table = table.append_column('ctr', pc.take(weights, pc.subtract(table['position'], 1)))
+        grouped = table.group_by('domain').aggregate([
+            ('ctr', 'sum'), ('position', 'count'), ('position', 'mean')
+        ]).sort_by([('ctr_sum', 'descending')])
+        total = pc.sum(grouped['ctr_sum']).as_py()
+        return [
+            {
+                'domain': row['domain'],
+                'share': round(row['ctr_sum'] / total * 100, 2),
+                'appearances': row['position_count'],
+                'avg_position': round(row['position_mean'], 2),
+            }
+            for row in grouped.slice(0, limit).to_pylist()
+        ]
+
+    def domain_overlap(self, domains=None, engine=None, date_from=None, date_to=None, top=10):
+        """Пересечение доменов по запросам (коэффициент Жаккара): {домен: {домен: доля}}.
+
+        Без domains берутся top доменов с наибольшим числом запросов.
+        """
+        table = self.load(['domain', 'keyword'], date_from, date_to, engine, domains=domains)
+        pairs = table.group_by(['domain', 'keyword']).aggregate([])
+        keywords_by_domain = {}
+        for domain, keyword in zip(pairs['domain'].to_pylist(), pairs['keyword'].to_pylist()):
+            keywords_by_domain.setdefault(domain, set()).add(keyword)
+
+        if domains is None:
+            domains = sorted(keywords_by_domain, key=lambda name: -len(keywords_by_domain[name]))[:top]
+        overlap = {}
+        for domain in domains:
+            own = keywords_by_domain.get(domain, set())
+            overlap[domain] = {}
+            for other in domains:
+                theirs = keywords_by_domain.get(other, set())
+                union = own | theirs
+                overlap[domain][other] = round(len(own & theirs) / len(union), 4) if union else 0.0
+        return overlap
@@ -0,0 +1,214 @@
+"""
+Колоночный снимок истории выдачи: search_results + keywords в файлах Arrow по дате и поисковой системе
+"""
+import glob
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta
+from loguru import logger
+from config import Config
+from database.export import build_query
+from database.models import SearchResult
+
+try:
+    import pyarrow as pa
+except ImportError:  # Снимок необязателен: без pyarrow аналитика недоступна
+    pa = None
+
+
+# Колонки снимка (имена - из набора search_results выгрузки)
+SNAPSHOT_COLUMNS = ['id', 'keyword', 'region', 'search_engine', 'position', 'url', 'domain', 'title', 'created_at']
+WATERMARK_FILE = '_watermark.json'
+
+
+def snapshot_schema():
+    """Схема файлов снимка (без колонок секций date и engine)"""
+    return pa.schema([
+        ('id', pa.int64()),
+        ('keyword', pa.string()),
+        ('region', pa.string()),
+        ('search_engine', pa.string()),
+        ('position', pa.int32()),
+        ('url', pa.string()),
+        ('domain', pa.string()),
+        ('title', pa.string()),
+        ('created_at', pa.timestamp('us')),
+    ])
+
+
+def partition_dir(root, day, engine):
+    """Каталог секции в стиле Hive: date=YYYY-MM-DD/engine=<система>"""
+    return os.path.join(root, f"date={day}", f"engine={engine}")
+
+
+def read_watermark(root):
+    """Отметка снимка: номер последнего подтвержденного запуска и граница created_at выгруженных строк"""
+    path = os.path.join(root, WATERMARK_FILE)
+    if not os.path.exists(path):
+        return {'run': 0, 'exported_until': None}
+    with open(path, 'r', encoding='utf-8') as watermark_file:
+        watermark = json.load(watermark_file)
+    exported_until = watermark.get('exported_until')
+    return {
+        'run': watermark.get('run', 0),
+        'exported_until': datetime.fromisoformat(exported_until) if exported_until else None,
+    }
+
+
+def _write_watermark(root, run, exported_until):
+    """Атомарно сохранить отметку"""
+    fd, tmp_path = tempfile.mkstemp(dir=root, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as tmp_file:
+        json.dump({'run': run, 'exported_until': exported_until.isoformat()}, tmp_file)
+    os.replace(tmp_path, os.path.join(root, WATERMARK_FILE))
+
+
+def _part_runs(path):
+    """Диапазон запусков в имени файла part-<первый>-<последний>.arrow"""
+    _, first, last = os.path.basename(path)[:-len('.arrow')].split('-')
+    return int(first), int(last)
+
+
+def _part_files(directory):
+    return sorted(glob.glob(os.path.join(directory, 'part-*.arrow')))
+
+
+class _PartWriter:
+    """Файл одной секции за запуск: пишется во временный файл, имя - по диапазону запусков"""
+
+    def __init__(self, directory, schema):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        fd, self.tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        os.close(fd)
+        self._sink = pa.OSFile(self.tmp_path, 'wb')
+        # Без сжатия: файлы читаются через memory mapping без копирования
+        self._writer = pa.ipc.new_file(self._sink, schema)
+
+    def write(self, batch):
+        self._writer.write_batch(batch)
+
+    def close(self, first_run, last_run):
+        """Закрыть файл и дать ему постоянное имя"""
+        self._writer.close()
+        self._sink.close()
+        path = os.path.join(self.directory, f"part-{first_run:06d}-{last_run:06d}.arrow")
+        os.replace(self.tmp_path, path)
+        return path
+
+
+def compact_partition(directory):
+    """Слить файлы секции в один (строки по порядку id); возвращает путь итогового файла"""
+    parts = _part_files(directory)
+    if len(parts) < 2:
+        return parts[0] if parts else None
+    tables = [pa.ipc.open_file(pa.memory_map(path)).read_all() for path in parts]
+    table = pa.concat_tables(tables).sort_by('id')
+    runs = [_part_runs(path) for path in parts]
+    writer = _PartWriter(directory, table.schema)
+    for batch in table.to_batches(max_chunksize=Config.EXPORT_CHUNK_SIZE):
+        writer.write(batch)
+    path = writer.close(min(first for first, _ in runs), max(last for _, last in runs))
+    for part in parts:
+        if part != path:
+            os.remove(part)
+    return path
+
+
+def _clean_unfinished(root, confirmed_run):
+    """Удалить остатки прерванного запуска и слияния.
+
+    Временные файлы, части запусков после отметки (не подтвержденный запуск)
+    и части, целиком вошедшие в слитый файл той же секции.
+    """
+    for path in glob.glob(os.path.join(root, 'date=*', 'engine=*', '*.tmp')):
+        os.remove(path)
+    for directory in glob.glob(os.path.join(root, 'date=*', 'engine=*')):
+        parts = {path: _part_runs(path) for path in _part_files(directory)}
+        for path, (first, last) in parts.items():
+            merged = any(
+                other != path and other_first <= first and last <= other_last
+                for other, (other_first, other_last) in parts.items()
+            )
+            if first > confirmed_run or merged:
+                os.remove(path)
+
+
+def build_snapshot(engine, root=None, chunk_size=None, max_parts=None, commit_lag=None):
+    """Дописать в снимок результаты выдачи, появившиеся после прошлого запуска.
+
+    Граница - created_at, а не id: Google и Яндекс сохраняются параллельно,
+    и строка с меньшим id может быть подтверждена позже строки с большим.
+    Выгружаются строки из окна [прошлая граница, сейчас - commit_lag секунд):
+    за commit_lag все начатые в окне транзакции успевают завершиться.
+    Строки читаются потоково (по дате), раскладываются по секциям date=/engine=
+    и пишутся в файлы Arrow IPC без сжатия. Отметка (номер запуска и граница)
+    сохраняется после записи всех файлов, поэтому прерванный запуск безопасно
+    повторить. Секции, где накопилось больше max_parts файлов, сливаются в один.
+    Возвращает статистику: rows, partitions, compacted, run, exported_until.
+    """
+    if pa is None:
+        raise RuntimeError("Для снимка истории нужен пакет pyarrow")
+    root = root or Config.SNAPSHOT_DIR
+    chunk_size = chunk_size or Config.EXPORT_CHUNK_SIZE
+    max_parts = max_parts or Config.SNAPSHOT_MAX_PARTS
+    commit_lag = commit_lag if commit_lag is not None else Config.SNAPSHOT_COMMIT_LAG
+    os.makedirs(root, exist_ok=True)
+
+    watermark = read_watermark(root)
+    _clean_unfinished(root, watermark['run'])
+    run = watermark['run'] + 1
+    exported_from = watermark['exported_until']
+    exported_until = datetime.utcnow() - timedelta(seconds=commit_lag)
+    if exported_from is not None:
+        exported_until = max(exported_until, exported_from)
+
+    query, _ = build_query('search_results', SNAPSHOT_COLUMNS)
+    query = query.where(SearchResult.created_at < exported_until)
+    if exported_from is not None:
+        query = query.where(SearchResult.created_at >= exported_from)
+    query = query.order_by(None).order_by(SearchResult.created_at, SearchResult.id)
+    schema = snapshot_schema()
+
+    writers = {}
+    touched = set()
+    rows = 0
+    with engine.connect() as connection:
+        result = connection.execution_options(stream_results=True, yield_per=chunk_size).execute(query)
+        for chunk in result.partitions():
+            groups = {}
+            for row in chunk:
+                groups.setdefault((row.created_at.date().isoformat(), row.search_engine), []).append(row)
+            for key, group in groups.items():
+                if key not in writers:
+                    writers[key] = _PartWriter(partition_dir(root, *key), schema)
+                    touched.add(key)
+                writers[key].write(pa.RecordBatch.from_arrays(
+                    [pa.array([row[index] for row in group], type=field.type) for index, field in enumerate(schema)],
+                    schema=schema
+                ))
+            rows += len(chunk)
+            # Строки идут по дате: секции прошлых дней больше не пополнятся - их файлы закрываются
+            current_day = max(day for day, _ in groups)
+            for key in [key for key in writers if key[0] < current_day]:
+                writers.pop(key).close(run, run)
+    for writer in writers.values():
+        writer.close(run, run)
+    _write_watermark(root, run, exported_until)
+
+    compacted = 0
+    for key in touched:
+        directory = partition_dir(root, *key)
+        if len(_part_files(directory)) > max_parts:
+            compact_partition(directory)
+            compacted += 1
+
+    logger.info(
+        f"Снимок истории: {rows} новых строк, секций {len(touched)}, слито {compacted}, "
+        f"выгружено до {exported_until.isoformat(sep=' ', timespec='seconds')}"
+    )
+    return {
+        'rows': rows, 'partitions': len(touched), 'compacted': compacted,
+        'run': run, 'exported_until': exported_until,
+    }
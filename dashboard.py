@@ -9,6 +9,7 @@ from datetime import datetime, timedelta
 import json
 import os
 from database import db_manager
+from analytics import SerpHistory
 from config import Config
 
 # Настройка страницы
@@ -59,6 +60,15 @@ def get_competitors_data():
         st.error(f"Ошибка получения данных конкурентов: {e}")
         return pd.DataFrame()
 
+def get_share_of_voice(days, engine_name):
+    """Доля видимости доменов из снимка истории выдачи"""
+    try:
+        engine = None if engine_name == "Все" else engine_name.lower()
+        date_from = (datetime.utcnow() - timedelta(days=days)).date()
+        return pd.DataFrame(SerpHistory().share_of_voice(engine=engine, date_from=date_from))
+    except Exception:
+        return pd.DataFrame()
+
 # Основной контент
 tab1, tab2, tab3, tab4 = st.tabs(["📈 Обзор", "🏆 Конкуренты", "🔍 Ключевые слова", "📋 Отчеты"])
 
@@ -178,6 +188,22 @@ with tab2:
         st.dataframe(competitors_df, use_container_width=True)
     else:
         st.warning("Нет данных о конкурентах")
+    
+    # Доля видимости по колоночному снимку истории (без запросов к базе)
+    st.subheader("Доля видимости (CTR по позициям)")
+    share_df = get_share_of_voice(days_map[period], search_engine)
+    if not share_df.empty:
+        fig_share = px.bar(
+            share_df,
+            x='domain',
+            y='share',
+            hover_data=['appearances', 'avg_position'],
+            title="Доля видимости доменов, %"
+        )
+        fig_share.update_layout(xaxis_title="Домен", yaxis_title="Доля, %")
+        st.plotly_chart(fig_share, use_container_width=True)
+    else:
+        st.info("Снимок истории не найден: запустите `python scheduler.py snapshot`")
 
 with tab3:
     st.header("🔍 Анализ ключевых слов")
@@ -253,6 +279,25 @@ with tab3:
         
         st.dataframe(keyword_stats, use_container_width=True)
 
+    # Плотность ключевых запросов на страницах конкурентов
+    st.subheader("Плотность ключевых слов у конкурентов")
+
+    density_df = pd.DataFrame(db_manager.get_keyword_density_matrix(days=days_map[period]))
+    if not density_df.empty:
+        density_matrix = density_df.pivot_table(
+            index='domain', columns='keyword', values='density', aggfunc='mean'
+        ).fillna(0)
+        fig_density = px.imshow(
+            density_matrix,
+            labels=dict(x="Ключевое слово", y="Домен", color="Плотность, %"),
+            title="Плотность ключевых слов по доменам",
+            aspect='auto',
+            color_continuous_scale='Blues'
+        )
+        st.plotly_chart(fig_density, use_container_width=True)
+    else:
+        st.info("Нет данных о плотности ключевых слов")
+
 with tab4:
     st.header("📋 Отчеты и экспорт")
     
@@ -329,7 +374,7 @@ with tab4:
     - Регион Google: {Config.GOOGLE_REGION}
     - Регион Yandex: {Config.YANDEX_REGION}
     - Максимум результатов: {Config.MAX_RESULTS}
-    - Задержка: {Config.DELAY_MIN}-{Config.DELAY_MAX} сек
+    - Частота запросов (старт): Google {Config.RATE_LIMITS['google'][0]}, Yandex {Config.RATE_LIMITS['yandex'][0]} запр/с
     - Использование прокси: {Config.USE_PROXY}
     """)
 
@@ -2,6 +2,7 @@
 Модуль базы данных для SEO-анализа
 """
 from .models import *
+from .engine import get_engine, get_sessionmaker, dispose_engines
 from .manager import DatabaseManager, db_manager
 
-__all__ = ['DatabaseManager', 'db_manager'] 
\ No newline at end of file
+__all__ = ['DatabaseManager', 'db_manager', 'get_engine', 'get_sessionmaker', 'dispose_engines'] 
\ No newline at end of file
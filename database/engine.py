@@ -0,0 +1,68 @@
+"""
+Общий для процесса реестр движков SQLAlchemy с пулом соединений
+"""
+import threading
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import sessionmaker
+from loguru import logger
+from config import Config
+
+_engines = {}
+_sessionmakers = {}
+_lock = threading.Lock()
+
+
+def _pool_options(url):
+    """Параметры пула соединений из конфигурации"""
+    options = {
+        'pool_pre_ping': Config.DB_POOL_PRE_PING,
+        'pool_recycle': Config.DB_POOL_RECYCLE,
+    }
+    # У SQLite свой пул без переполнения, размеры к нему не применяются
+    if not url.startswith('sqlite'):
+        options.update({
+            'pool_size': Config.DB_POOL_SIZE,
+            'max_overflow': Config.DB_MAX_OVERFLOW,
+            'pool_timeout': Config.DB_POOL_TIMEOUT,
+        })
+    return options
+
+
+def get_engine(url=None):
+    """Получить движок для URL (создается один раз на процесс)"""
+    url = url or Config.DATABASE_URL
+    with _lock:
+        engine = _engines.get(url)
+        if engine is None:
+            engine = create_engine(url, **_pool_options(url))
+            _engines[url] = engine
+            logger.debug(f"Создан пул соединений с БД: {engine.url.render_as_string(hide_password=True)}")
+        return engine
+
+
+def get_sessionmaker(url=None):
+    """Фабрика сессий, привязанная к общему движку"""
+    url = url or Config.DATABASE_URL
+    engine = get_engine(url)
+    with _lock:
+        if url not in _sessionmakers:
+            _sessionmakers[url] = sessionmaker(bind=engine)
+        return _sessionmakers[url]
+
+
+def dispose_engines():
+    """Закрыть все пулы соединений (например, при остановке процесса)"""
+    with _lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+        _sessionmakers.clear()
+
+
+def dialect_insert(model, bind):
+    """INSERT с поддержкой ON CONFLICT для диалекта движка, соединения или сессии"""
+    dialect = bind.dialect if hasattr(bind, 'dialect') else bind.get_bind().dialect
+    if dialect.name == 'sqlite':
+        return sqlite.insert(model)
+    return postgresql.insert(model)
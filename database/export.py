@@ -0,0 +1,207 @@
+"""
+Потоковая выгрузка таблиц в CSV и Parquet (серверный курсор, постоянная память)
+"""
+import csv
+import os
+import tempfile
+import time
+from sqlalchemy import Boolean, DateTime, Float, Integer, select
+from loguru import logger
+from config import Config
+from database.models import Competitor, Keyword, PageData, SearchResult
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet необязателен: без pyarrow доступен только CSV
+    pa = pq = None
+
+
+# Выгружаемые наборы: колонки (имя -> выражение), FROM с join и колонка даты для фильтра
+EXPORTS = {
+    'search_results': {
+        'columns': {
+            'id': SearchResult.id,
+            'keyword': Keyword.keyword,
+            'search_engine': SearchResult.search_engine,
+            'region': Keyword.region,
+            'position': SearchResult.position,
+            'url': SearchResult.url,
+            'domain': SearchResult.domain,
+            'title': SearchResult.title,
+            'description': SearchResult.description,
+            'created_at': SearchResult.created_at,
+        },
+        'from': SearchResult.__table__.join(Keyword.__table__, SearchResult.keyword_id == Keyword.id),
+        'order_by': SearchResult.id,
+        'date_column': SearchResult.created_at,
+    },
+    'page_data': {
+        'columns': {
+            'id': PageData.id,
+            'url': SearchResult.url,
+            'domain': SearchResult.domain,
+            'title': PageData.title,
+            'description': PageData.description,
+            'word_count': PageData.word_count,
+            'images_count': PageData.images_count,
+            'links_count': PageData.links_count,
+            'has_title': PageData.has_title,
+            'has_description': PageData.has_description,
+            'has_h1': PageData.has_h1,
+            'has_images_with_alt': PageData.has_images_with_alt,
+            'has_canonical': PageData.has_canonical,
+            'has_robots': PageData.has_robots,
+            'has_schema': PageData.has_schema,
+            'is_https': PageData.is_https,
+            'keyword_density': PageData.keyword_density,
+            'keyword_count': PageData.keyword_count,
+            'keyword_scores': PageData.keyword_scores,
+            'content_hash': PageData.content_hash,
+            'created_at': PageData.created_at,
+        },
+        'from': PageData.__table__.join(SearchResult.__table__, PageData.search_result_id == SearchResult.id),
+        'order_by': PageData.id,
+        'date_column': PageData.created_at,
+    },
+    'competitors': {
+        'columns': {
+            'domain': Competitor.domain,
+            'total_positions': Competitor.total_positions,
+            'avg_position': Competitor.avg_position,
+            'top_3_positions': Competitor.top_3_positions,
+            'top_10_positions': Competitor.top_10_positions,
+            'updated_at': Competitor.updated_at,
+        },
+        'from': Competitor.__table__,
+        'order_by': Competitor.id,
+        'date_column': Competitor.updated_at,
+    },
+}
+
+FORMATS = ('csv', 'parquet')
+
+
+def build_query(table, columns=None, date_from=None, date_to=None):
+    """SELECT выбранных колонок набора с фильтром по дате [date_from, date_to)"""
+    if table not in EXPORTS:
+        raise ValueError(f"Неизвестный набор для выгрузки: {table}")
+    spec = EXPORTS[table]
+    columns = list(columns or spec['columns'])
+    unknown = [name for name in columns if name not in spec['columns']]
+    if unknown:
+        raise ValueError(f"Неизвестные колонки {table}: {', '.join(unknown)}")
+
+    query = select(*[spec['columns'][name].label(name) for name in columns]).select_from(spec['from'])
+    if date_from is not None:
+        query = query.where(spec['date_column'] >= date_from)
+    if date_to is not None:
+        query = query.where(spec['date_column'] < date_to)
+    return query.order_by(spec['order_by']), columns
+
+
+def _arrow_type(column):
+    """Тип колонки Parquet по типу SQLAlchemy"""
+    column_type = column.type
+    if isinstance(column_type, Boolean):
+        return pa.bool_()
+    if isinstance(column_type, Integer):
+        return pa.int64()
+    if isinstance(column_type, Float):
+        return pa.float64()
+    if isinstance(column_type, DateTime):
+        return pa.timestamp('us')
+    return pa.string()
+
+
+class _CsvWriter:
+    """Запись пачек строк в CSV (utf-8-sig, чтобы Excel понимал кириллицу)"""
+
+    def __init__(self, path, columns, table):
+        self._file = open(path, 'w', newline='', encoding='utf-8-sig')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(columns)
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.close()
+
+
+class _ParquetWriter:
+    """Запись пачек строк в Parquet: каждая пачка - отдельная группа строк"""
+
+    def __init__(self, path, columns, table):
+        if pq is None:
+            raise RuntimeError("Для выгрузки в Parquet нужен пакет pyarrow")
+        spec = EXPORTS[table]['columns']
+        self._schema = pa.schema([(name, _arrow_type(spec[name])) for name in columns])
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def write(self, rows):
+        arrays = [
+            pa.array([row[index] for row in rows], type=field.type)
+            for index, field in enumerate(self._schema)
+        ]
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+def export_table(engine, path, table='search_results', columns=None, date_from=None, date_to=None,
+                 fmt=None, chunk_size=None):
+    """Выгрузить набор в файл пачками по chunk_size строк.
+
+    Строки читаются серверным курсором (stream_results), поэтому память не
+    зависит от размера таблицы. Формат берется из fmt или расширения файла.
+    Файл появляется под своим именем только после успешной записи.
+    Возвращает статистику: rows, seconds, rows_per_sec, path.
+    """
+    fmt = fmt or os.path.splitext(path)[1].lstrip('.').lower() or 'csv'
+    if fmt not in FORMATS:
+        raise ValueError(f"Неподдерживаемый формат выгрузки: {fmt}")
+    chunk_size = chunk_size or Config.EXPORT_CHUNK_SIZE
+    query, columns = build_query(table, columns, date_from, date_to)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+
+    started = time.perf_counter()
+    rows_written = 0
+    next_report = Config.EXPORT_PROGRESS_ROWS
+    try:
+        writer = (_ParquetWriter if fmt == 'parquet' else _CsvWriter)(tmp_path, columns, table)
+        try:
+            with engine.connect() as connection:
+                result = connection.execution_options(stream_results=True, yield_per=chunk_size).execute(query)
+                for chunk in result.partitions():
+                    writer.write(chunk)
+                    rows_written += len(chunk)
+                    if rows_written >= next_report:
+                        elapsed = time.perf_counter() - started
+                        logger.info(f"Выгрузка {table}: {rows_written} строк, {rows_written / elapsed:.0f} строк/с")
+                        next_report += Config.EXPORT_PROGRESS_ROWS
+        finally:
+            writer.close()
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    seconds = time.perf_counter() - started
+    stats = {
+        'path': path,
+        'rows': rows_written,
+        'seconds': seconds,
+        'rows_per_sec': rows_written / seconds if seconds else 0.0,
+    }
+    logger.info(
+        f"Выгружено {table} в {path}: {rows_written} строк за {seconds:.2f} с "
+        f"({stats['rows_per_sec']:.0f} строк/с)"
+    )
+    return stats
@@ -1,117 +1,415 @@
 """
 Менеджер базы данных для SEO-анализа
 """
+import csv
 import json
-from datetime import datetime
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine, func, case
+import os
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import func, case, select, insert, text, tuple_
 from loguru import logger
 from config import Config
+from database.engine import get_engine, get_sessionmaker, dialect_insert
+from database.export import export_table
+from database.migrations import apply_migrations
+from database.partitions import ensure_partitions, drop_expired_partitions
+from database.rollups import apply_rollups, rebuild_rollups
 from database.models import (
-    Base, Keyword, SearchResult, PageData, Competitor, 
+    Base, Keyword, SearchResult, PageData, Competitor, CompetitorDailyStat,
     Backlink, AnalysisSession, create_tables, get_session
 )
 
 class DatabaseManager:
     """Менеджер базы данных"""
     
-    def __init__(self):
-        self.engine = create_engine(Config.DATABASE_URL)
-        self.Session = sessionmaker(bind=self.engine)
+    def __init__(self, database_url=None):
+        # Движок и пул соединений общие для всех менеджеров процесса
+        self.engine = get_engine(database_url)
+        self.Session = get_sessionmaker(database_url)
+        # Кэш id ключевых слов: (keyword, search_engine, region) -> id
+        self._keyword_ids = {}
+        self._keyword_lock = threading.Lock()
         
     def init_database(self):
         """Инициализация базы данных"""
         try:
             Base.metadata.create_all(self.engine)
+            apply_migrations(self.engine)
+            ensure_partitions(self.engine)
             logger.info("База данных инициализирована")
         except Exception as e:
             logger.error(f"Ошибка инициализации БД: {e}")
     
+    def maintain_partitions(self):
+        """Создание секций на будущие месяцы и удаление устаревших"""
+        try:
+            created = ensure_partitions(self.engine)
+            dropped = drop_expired_partitions(self.engine)
+            logger.info(f"Обслуживание секций: создано {len(created)}, удалено {len(dropped)}")
+            return created, dropped
+        except Exception as e:
+            logger.error(f"Ошибка обслуживания секций: {e}")
+            return [], []
+    
+    def _upsert(self, model):
+        """INSERT с поддержкой ON CONFLICT для диалекта текущей БД"""
+        return dialect_insert(model, self.engine)
+    
+    def _page_data_row(self, search_result_id, page_data):
+        """Строка page_data для массовой вставки"""
+        technical_seo = page_data.get('technical_seo', {})
+        keyword_analysis = page_data.get('keyword_analysis', {})
+        return {
+            'search_result_id': search_result_id,
+            'title': page_data.get('title', ''),
+            'description': page_data.get('description', ''),
+            'keywords': page_data.get('keywords', ''),
+            'h1_tags': json.dumps(page_data.get('h1', []), ensure_ascii=False),
+            'h2_tags': json.dumps(page_data.get('h2', []), ensure_ascii=False),
+            'h3_tags': json.dumps(page_data.get('h3', []), ensure_ascii=False),
+            'word_count': page_data.get('word_count', 0),
+            'images_count': len(page_data.get('images', [])),
+            'links_count': len(page_data.get('links', [])),
+            'has_title': technical_seo.get('has_title', False),
+            'has_description': technical_seo.get('has_description', False),
+            'has_keywords': technical_seo.get('has_keywords', False),
+            'has_h1': technical_seo.get('has_h1', False),
+            'has_images_with_alt': technical_seo.get('has_images_with_alt', False),
+            'has_canonical': technical_seo.get('has_canonical', False),
+            'has_robots': technical_seo.get('has_robots', False),
+            'has_schema': technical_seo.get('has_schema', False),
+            'is_https': technical_seo.get('is_https', False),
+            'keyword_density': keyword_analysis.get('keyword_density', 0.0),
+            'keyword_count': keyword_analysis.get('keyword_count', 0),
+            'keyword_scores': json.dumps(keyword_analysis.get('scores', {}), ensure_ascii=False),
+            'content_hash': page_data.get('content_hash'),
+            'created_at': datetime.utcnow()
+        }
+    
+    def _get_keyword_ids(self, session, keys):
+        """Получить id ключевых слов: из кэша, иначе upsert с ON CONFLICT DO NOTHING"""
+        keyword_ids = {}
+        missing = []
+        with self._keyword_lock:
+            for key in dict.fromkeys(keys):
+                if key in self._keyword_ids:
+                    keyword_ids[key] = self._keyword_ids[key]
+                else:
+                    missing.append(key)
+        
+        if not missing:
+            return keyword_ids
+        
+        # Вставляем недостающие; уже существующие (в т.ч. от параллельных писателей) пропускаются
+        now = datetime.utcnow()
+        created = session.execute(
+            self._upsert(Keyword).values([
+                {'keyword': keyword, 'search_engine': search_engine, 'region': region, 'created_at': now}
+                for keyword, search_engine, region in missing
+            ]).on_conflict_do_nothing(
+                index_elements=['keyword', 'search_engine', 'region']
+            ).returning(Keyword.id, Keyword.keyword, Keyword.search_engine, Keyword.region)
+        )
+        for row in created:
+            keyword_ids[(row.keyword, row.search_engine, row.region)] = row.id
+        
+        existing_keys = [key for key in missing if key not in keyword_ids]
+        if existing_keys:
+            existing = session.execute(
+                select(Keyword.id, Keyword.keyword, Keyword.search_engine, Keyword.region).where(
+                    tuple_(Keyword.keyword, Keyword.search_engine, Keyword.region).in_(existing_keys)
+                )
+            )
+            for row in existing:
+                keyword_ids[(row.keyword, row.search_engine, row.region)] = row.id
+        
+        return keyword_ids
+    
+    def _remember_keyword_ids(self, keyword_ids):
+        """Запомнить id ключевых слов после успешного коммита"""
+        with self._keyword_lock:
+            self._keyword_ids.update(keyword_ids)
+    
+    def clear_keyword_cache(self):
+        """Очистить кэш id ключевых слов"""
+        with self._keyword_lock:
+            self._keyword_ids.clear()
+    
     def save_search_results(self, keyword, search_engine, region, results):
         """Сохранение результатов поиска"""
+        return self.save_search_results_batch([(keyword, search_engine, region, results)])
+    
+    def save_search_results_batch(self, batch):
+        """Массовое сохранение результатов поиска по многим ключевым словам.
+        
+        batch - список кортежей (keyword, search_engine, region, results).
+        Число запросов к БД не зависит от количества результатов: ключевые
+        слова, результаты и данные страниц пишутся многострочными INSERT.
+        """
+        batch = [item for item in batch if item[3]]
+        if not batch:
+            return 0
+        
         session = self.Session()
         try:
-            # Создаем или получаем ключевое слово
-            keyword_obj = session.query(Keyword).filter_by(
-                keyword=keyword,
-                search_engine=search_engine,
-                region=region
-            ).first()
-            
-            if not keyword_obj:
-                keyword_obj = Keyword(
-                    keyword=keyword,
-                    search_engine=search_engine,
-                    region=region
-                )
-                session.add(keyword_obj)
-                session.flush()
-            
-            # Сохраняем результаты поиска
-            for result_data in results:
-                search_result = SearchResult(
-                    keyword_id=keyword_obj.id,
-                    position=result_data['position'],
-                    title=result_data['title'],
-                    url=result_data['url'],
-                    domain=result_data['domain'],
-                    description=result_data.get('description', ''),
-                    search_engine=search_engine
-                )
-                session.add(search_result)
-                session.flush()
-                
-                # Сохраняем данные страницы если есть
-                if 'page_data' in result_data and result_data['page_data']:
-                    page_data = result_data['page_data']
-                    page_obj = PageData(
-                        search_result_id=search_result.id,
-                        title=page_data.get('title', ''),
-                        description=page_data.get('description', ''),
-                        keywords=page_data.get('keywords', ''),
-                        h1_tags=json.dumps(page_data.get('h1', []), ensure_ascii=False),
-                        h2_tags=json.dumps(page_data.get('h2', []), ensure_ascii=False),
-                        h3_tags=json.dumps(page_data.get('h3', []), ensure_ascii=False),
-                        word_count=page_data.get('word_count', 0),
-                        images_count=len(page_data.get('images', [])),
-                        links_count=len(page_data.get('links', [])),
-                        has_title=page_data.get('technical_seo', {}).get('has_title', False),
-                        has_description=page_data.get('technical_seo', {}).get('has_description', False),
-                        has_keywords=page_data.get('technical_seo', {}).get('has_keywords', False),
-                        has_h1=page_data.get('technical_seo', {}).get('has_h1', False),
-                        has_images_with_alt=page_data.get('technical_seo', {}).get('has_images_with_alt', False),
-                        has_canonical=page_data.get('technical_seo', {}).get('has_canonical', False),
-                        has_robots=page_data.get('technical_seo', {}).get('has_robots', False),
-                        has_schema=page_data.get('technical_seo', {}).get('has_schema', False),
-                        is_https=page_data.get('technical_seo', {}).get('is_https', False),
-                        keyword_density=page_data.get('keyword_analysis', {}).get('keyword_density', 0.0),
-                        keyword_count=page_data.get('keyword_analysis', {}).get('keyword_count', 0)
-                    )
-                    session.add(page_obj)
+            # Создаем или получаем ключевые слова
+            keyword_ids = self._get_keyword_ids(
+                session, [(keyword, search_engine, region) for keyword, search_engine, region, _ in batch]
+            )
+            
+            # Сохраняем результаты поиска одной вставкой с возвратом id
+            now = datetime.utcnow()
+            search_rows = []
+            page_data_list = []
+            for keyword, search_engine, region, results in batch:
+                keyword_id = keyword_ids[(keyword, search_engine, region)]
+                for result_data in results:
+                    search_rows.append({
+                        'keyword_id': keyword_id,
+                        'position': result_data['position'],
+                        'title': result_data['title'],
+                        'url': result_data['url'],
+                        'domain': result_data['domain'],
+                        'description': result_data.get('description', ''),
+                        'search_engine': search_engine,
+                        'created_at': now
+                    })
+                    page_data_list.append(result_data.get('page_data'))
+            
+            search_result_ids = session.scalars(
+                insert(SearchResult).returning(SearchResult.id, sort_by_parameter_order=True),
+                search_rows
+            ).all()
+            
+            # Сохраняем данные страниц если есть
+            page_rows = [
+                self._page_data_row(search_result_id, page_data)
+                for search_result_id, page_data in zip(search_result_ids, page_data_list)
+                if page_data
+            ]
+            if page_rows:
+                session.execute(insert(PageData), page_rows)
+            
+            # Агрегаты конкурентов обновляются в той же транзакции
+            apply_rollups(session, search_rows)
             
             session.commit()
-            logger.info(f"Сохранено {len(results)} результатов для '{keyword}' в {search_engine}")
+            self._remember_keyword_ids(keyword_ids)
+            for keyword, search_engine, _, results in batch:
+                logger.info(f"Сохранено {len(results)} результатов для '{keyword}' в {search_engine}")
+            return len(search_rows)
             
         except Exception as e:
             session.rollback()
             logger.error(f"Ошибка сохранения результатов: {e}")
+            return 0
+        finally:
+            session.close()
+    
+    def _page_search_result_ids(self, session, urls, since=None):
+        """Строки выдачи для мета-данных страниц: {url: [id]}.
+
+        С since - все результаты поиска с URL, сохраненные начиная с since (один URL
+        по разным запросам и системам за запуск); иначе или если таких нет -
+        последний результат с URL.
+        """
+        search_result_ids = {
+            url: [search_result_id]
+            for url, search_result_id in session.execute(
+                select(SearchResult.url, func.max(SearchResult.id))
+                .where(SearchResult.url.in_(urls))
+                .group_by(SearchResult.url)
+            ).all()
+        }
+        if since is not None:
+            recent = {}
+            for url, search_result_id in session.execute(
+                select(SearchResult.url, SearchResult.id)
+                .where(SearchResult.url.in_(urls), SearchResult.created_at >= since)
+                .order_by(SearchResult.id)
+            ).all():
+                recent.setdefault(url, []).append(search_result_id)
+            search_result_ids.update(recent)
+        return search_result_ids
+    
+    def save_page_metadata(self, url, metadata, content_hash=None, since=None):
+        """Сохранение мета-данных страницы к результатам поиска с этим URL"""
+        return self.save_page_metadata_batch([(url, metadata, content_hash)], since=since)
+    
+    def save_page_metadata_batch(self, items, since=None):
+        """Массовое сохранение мета-данных страниц.
+        
+        items - список кортежей (url, metadata, content_hash). Страница
+        привязывается ко всем результатам поиска с ее URL, сохраненным начиная
+        с since (начало запуска), без since - к последнему результату.
+        """
+        items = [item for item in items if item[1]]
+        if not items:
+            return 0
+        
+        session = self.Session()
+        try:
+            urls = list(dict.fromkeys(url for url, _, _ in items))
+            search_result_ids = self._page_search_result_ids(session, urls, since)
+            
+            page_rows = []
+            for url, metadata, content_hash in items:
+                if url not in search_result_ids:
+                    logger.warning(f"Нет результата поиска для страницы {url}")
+                    continue
+                page_data = dict(metadata, content_hash=content_hash)
+                page_rows.extend(
+                    self._page_data_row(search_result_id, page_data)
+                    for search_result_id in search_result_ids[url]
+                )
+            if page_rows:
+                session.execute(insert(PageData), page_rows)
+            session.commit()
+            return len(page_rows)
+            
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Ошибка сохранения мета-данных страниц: {e}")
+            return 0
+        finally:
+            session.close()
+    
+    def copy_page_metadata_batch(self, urls, since=None):
+        """Перенос последнего анализа неизменившихся страниц на их новые результаты поиска.
+
+        Страница без изменений не разбирается заново, но каждый результат поиска
+        с ее URL (см. save_page_metadata_batch) получает копию последней строки
+        page_data. Результаты, у которых мета-данные уже есть, пропускаются.
+        """
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return 0
+
+        session = self.Session()
+        try:
+            search_result_ids = self._page_search_result_ids(session, urls, since)
+            targets = [search_result_id for ids in search_result_ids.values() for search_result_id in ids]
+            analyzed = set(session.execute(
+                select(PageData.search_result_id).where(PageData.search_result_id.in_(targets))
+            ).scalars()) if targets else set()
+            latest = (
+                select(func.max(PageData.id).label('id'))
+                .join(SearchResult, PageData.search_result_id == SearchResult.id)
+                .where(SearchResult.url.in_(urls))
+                .group_by(SearchResult.url)
+                .subquery()
+            )
+            columns = [column for column in PageData.__table__.columns if column.name != 'id']
+            rows = session.execute(
+                select(SearchResult.url, *columns)
+                .join(PageData, PageData.search_result_id == SearchResult.id)
+                .where(PageData.id.in_(select(latest.c.id)))
+            ).all()
+
+            page_rows = []
+            now = datetime.utcnow()
+            for row in rows:
+                for search_result_id in search_result_ids[row.url]:
+                    if search_result_id in analyzed:
+                        continue
+                    page_row = {column.name: row._mapping[column] for column in columns}
+                    page_row.update(search_result_id=search_result_id, created_at=now)
+                    page_rows.append(page_row)
+            if page_rows:
+                session.execute(insert(PageData), page_rows)
+            session.commit()
+            return len(page_rows)
+
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Ошибка переноса мета-данных страниц: {e}")
+            return 0
+        finally:
+            session.close()
+
+    def get_page_hashes(self, urls):
+        """Хэши содержимого последнего анализа страниц: {url: content_hash}"""
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return {}
+        
+        session = self.Session()
+        try:
+            latest = (
+                select(func.max(PageData.id).label('id'))
+                .join(SearchResult, PageData.search_result_id == SearchResult.id)
+                .where(SearchResult.url.in_(urls), PageData.content_hash.isnot(None))
+                .group_by(SearchResult.url)
+                .subquery()
+            )
+            rows = session.execute(
+                select(SearchResult.url, PageData.content_hash)
+                .join(PageData, PageData.search_result_id == SearchResult.id)
+                .where(PageData.id.in_(select(latest.c.id)))
+            ).all()
+            return {row.url: row.content_hash for row in rows}
+        except Exception as e:
+            logger.error(f"Ошибка получения хэшей страниц: {e}")
+            return {}
+        finally:
+            session.close()
+    
+    def get_keyword_density_matrix(self, days=30):
+        """Плотность запросов по последнему анализу страниц: строки (url, domain, keyword, count, density)"""
+        session = self.Session()
+        try:
+            cutoff_date = datetime.utcnow() - timedelta(days=days)
+            latest = (
+                select(func.max(PageData.id).label('id'))
+                .join(SearchResult, PageData.search_result_id == SearchResult.id)
+                .where(PageData.created_at >= cutoff_date, PageData.keyword_scores.isnot(None))
+                .group_by(SearchResult.url)
+                .subquery()
+            )
+            rows = session.execute(
+                select(SearchResult.url, SearchResult.domain, PageData.keyword_scores)
+                .join(PageData, PageData.search_result_id == SearchResult.id)
+                .where(PageData.id.in_(select(latest.c.id)))
+            ).all()
+            
+            matrix = []
+            for row in rows:
+                for keyword, score in json.loads(row.keyword_scores).items():
+                    matrix.append({
+                        'url': row.url,
+                        'domain': row.domain,
+                        'keyword': keyword,
+                        'count': score.get('count', 0),
+                        'density': score.get('density', 0.0),
+                        'coverage': score.get('coverage', 0.0)
+                    })
+            return matrix
+        except Exception as e:
+            logger.error(f"Ошибка получения плотности ключевых слов: {e}")
+            return []
         finally:
             session.close()
     
+    def _competitors_query(self, session, limit=20):
+        """Агрегация по доменам по всей истории (эталон для накопительных агрегатов)"""
+        return session.query(
+            SearchResult.domain,
+            func.count(SearchResult.id).label('total_positions'),
+            func.avg(SearchResult.position).label('avg_position'),
+            func.sum(case((SearchResult.position <= 3, 1), else_=0)).label('top_3_positions'),
+            func.sum(case((SearchResult.position <= 10, 1), else_=0)).label('top_10_positions')
+        ).group_by(SearchResult.domain).order_by(
+            func.count(SearchResult.id).desc()
+        ).limit(limit)
+    
     def get_competitors_analysis(self, limit=20):
         """Получение анализа конкурентов"""
         session = self.Session()
         try:
-            # Агрегируем данные по доменам
-            competitors_data = session.query(
-                SearchResult.domain,
-                func.count(SearchResult.id).label('total_positions'),
-                func.avg(SearchResult.position).label('avg_position'),
-                func.sum(case((SearchResult.position <= 3, 1), else_=0)).label('top_3_positions'),
-                func.sum(case((SearchResult.position <= 10, 1), else_=0)).label('top_10_positions')
-            ).group_by(SearchResult.domain).order_by(
-                func.count(SearchResult.id).desc()
-            ).limit(limit).all()
+            # Агрегаты уже посчитаны при сохранении выдачи
+            competitors_data = session.query(Competitor).filter(
+                Competitor.total_positions > 0
+            ).order_by(Competitor.total_positions.desc()).limit(limit).all()
             
             return [
                 {
@@ -130,14 +428,80 @@ class DatabaseManager:
         finally:
             session.close()
     
+    def get_competitor_daily_stats(self, days=30, domain=None):
+        """Дневная статистика конкурентов за период"""
+        session = self.Session()
+        try:
+            cutoff_date = (datetime.utcnow() - timedelta(days=days)).date()
+            query = session.query(CompetitorDailyStat).filter(CompetitorDailyStat.stat_date >= cutoff_date)
+            if domain:
+                query = query.filter(CompetitorDailyStat.domain == domain)
+            
+            return [
+                {
+                    'domain': row.domain,
+                    'date': row.stat_date.isoformat(),
+                    'search_engine': row.search_engine,
+                    'total_positions': row.total_positions,
+                    'avg_position': row.position_sum / row.total_positions if row.total_positions else 0.0,
+                    'top_3_positions': row.top_3_positions,
+                    'top_10_positions': row.top_10_positions
+                }
+                for row in query.order_by(CompetitorDailyStat.stat_date).all()
+            ]
+            
+        except Exception as e:
+            logger.error(f"Ошибка получения дневной статистики конкурентов: {e}")
+            return []
+        finally:
+            session.close()
+    
+    def rebuild_competitor_rollups(self):
+        """Пересчет агрегатов конкурентов по всей истории"""
+        session = self.Session()
+        try:
+            domains = rebuild_rollups(session)
+            session.commit()
+            logger.info(f"Агрегаты пересчитаны для {domains} доменов")
+            return domains
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Ошибка пересчета агрегатов конкурентов: {e}")
+            return 0
+        finally:
+            session.close()
+    
+    def verify_competitor_rollups(self, limit=20):
+        """Сверка накопительных агрегатов с агрегацией по истории (список расхождений)"""
+        session = self.Session()
+        try:
+            expected = {
+                row.domain: (row.total_positions, int(row.top_3_positions), int(row.top_10_positions))
+                for row in self._competitors_query(session, limit).all()
+            }
+            stored = {
+                row.domain: (row.total_positions, row.top_3_positions, row.top_10_positions)
+                for row in session.query(Competitor).filter(Competitor.domain.in_(list(expected))).all()
+            }
+            return [domain for domain, values in expected.items() if stored.get(domain) != values]
+        except Exception as e:
+            logger.error(f"Ошибка сверки агрегатов конкурентов: {e}")
+            return None
+        finally:
+            session.close()
+    
+    def _keyword_positions_query(self, session, keyword, search_engine='google'):
+        """Запрос позиций по ключевому слову"""
+        return session.query(SearchResult).join(Keyword).filter(
+            Keyword.keyword == keyword,
+            SearchResult.search_engine == search_engine
+        ).order_by(SearchResult.position)
+    
     def get_keyword_positions(self, keyword, search_engine='google'):
         """Получение позиций по ключевому слову"""
         session = self.Session()
         try:
-            results = session.query(SearchResult).join(Keyword).filter(
-                Keyword.keyword == keyword,
-                SearchResult.search_engine == search_engine
-            ).order_by(SearchResult.position).all()
+            results = self._keyword_positions_query(session, keyword, search_engine).all()
             
             return [
                 {
@@ -156,16 +520,19 @@ class DatabaseManager:
         finally:
             session.close()
     
+    def _recent_analysis_query(self, session, cutoff_date):
+        """Запрос результатов начиная с даты"""
+        return session.query(SearchResult).join(Keyword).filter(
+            SearchResult.created_at >= cutoff_date
+        ).order_by(SearchResult.created_at.desc())
+    
     def get_recent_analysis(self, days=7):
         """Получение недавних анализов"""
         session = self.Session()
         try:
-            from datetime import timedelta
             cutoff_date = datetime.utcnow() - timedelta(days=days)
             
-            results = session.query(SearchResult).join(Keyword).filter(
-                SearchResult.created_at >= cutoff_date
-            ).order_by(SearchResult.created_at.desc()).all()
+            results = self._recent_analysis_query(session, cutoff_date).all()
             
             return [
                 {
@@ -185,6 +552,76 @@ class DatabaseManager:
         finally:
             session.close()
     
+    def _explain(self, session, query):
+        """План выполнения запроса (EXPLAIN / EXPLAIN QUERY PLAN)"""
+        connection = session.connection()
+        compiled = query.statement.compile(dialect=connection.dialect)
+        params = compiled.params
+        if compiled.positional:
+            params = tuple(params[name] for name in compiled.positiontup)
+        
+        if connection.dialect.name == 'sqlite':
+            rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params)
+            return "\n".join(row[-1] for row in rows)
+        
+        rows = connection.exec_driver_sql(f"EXPLAIN {compiled}", params)
+        return "\n".join(row[0] for row in rows)
+    
+    def _index_names(self, session, index_name):
+        """Имя индекса и имена его копий на секциях (для секционированных таблиц)"""
+        names = {index_name}
+        if self.engine.dialect.name == 'postgresql':
+            names.update(session.execute(text("""
+                SELECT child.relname FROM pg_inherits
+                JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                WHERE parent.relname = :name
+            """), {'name': index_name}).scalars())
+        return names
+    
+    def check_query_plans(self):
+        """Проверка через EXPLAIN, что запросы дашборда используют свои индексы.
+        
+        На маленьких таблицах PostgreSQL предпочитает последовательное
+        сканирование, поэтому оно отключается на время проверки: проверяется
+        пригодность индекса, а не выбор планировщика на текущем объеме данных.
+        """
+        session = self.Session()
+        try:
+            if self.engine.dialect.name == 'postgresql':
+                session.execute(text("SET LOCAL enable_seqscan = off"))
+            
+            checks = {
+                'verify_competitor_rollups': (
+                    self._competitors_query(session), 'ix_search_results_domain'),
+                'get_keyword_positions': (
+                    self._keyword_positions_query(session, 'keyword'),
+                    'ix_search_results_keyword_engine_position'),
+                'get_recent_analysis': (
+                    self._recent_analysis_query(session, datetime.utcnow() - timedelta(days=7)),
+                    'ix_search_results_created_at'),
+            }
+            
+            report = {}
+            for name, (query, index_name) in checks.items():
+                plan = self._explain(session, query)
+                used = any(
+                    candidate in plan for candidate in self._index_names(session, index_name)
+                )
+                report[name] = {'index': index_name, 'uses_index': used, 'plan': plan}
+                if used:
+                    logger.info(f"{name}: используется индекс {index_name}")
+                else:
+                    logger.warning(f"{name}: индекс {index_name} не используется\n{plan}")
+            return report
+            
+        except Exception as e:
+            logger.error(f"Ошибка проверки планов запросов: {e}")
+            return {}
+        finally:
+            session.rollback()
+            session.close()
+    
     def create_analysis_session(self, session_name, keywords_count):
         """Создание сессии анализа"""
         session = self.Session()
@@ -223,17 +660,36 @@ class DatabaseManager:
         finally:
             session.close()
     
+    def export_results(self, filename=None, table='search_results', columns=None,
+                       date_from=None, date_to=None, fmt=None):
+        """Потоковая выгрузка набора (search_results, page_data, competitors) в CSV или Parquet"""
+        try:
+            if filename is None:
+                filename = f"{table}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt or 'csv'}"
+            filepath = os.path.join(Config.CSV_OUTPUT_DIR, filename)
+            export_table(
+                self.engine, filepath, table=table, columns=columns,
+                date_from=date_from, date_to=date_to, fmt=fmt
+            )
+            return filepath
+            
+        except Exception as e:
+            logger.error(f"Ошибка выгрузки {table}: {e}")
+            return None
+    
     def export_to_csv(self, filename, data):
-        """Экспорт данных в CSV"""
-        import pandas as pd
-        import os
-        
+        """Экспорт данных в CSV (data - любой итерируемый набор словарей, пишется построчно)"""
         try:
             os.makedirs(Config.CSV_OUTPUT_DIR, exist_ok=True)
             filepath = os.path.join(Config.CSV_OUTPUT_DIR, filename)
             
-            df = pd.DataFrame(data)
-            df.to_csv(filepath, index=False, encoding='utf-8-sig')
+            with open(filepath, 'w', newline='', encoding='utf-8-sig') as csv_file:
+                writer = None
+                for row in data:
+                    if writer is None:
+                        writer = csv.DictWriter(csv_file, fieldnames=list(row))
+                        writer.writeheader()
+                    writer.writerow(row)
             
             logger.info(f"Данные экспортированы в {filepath}")
             return filepath
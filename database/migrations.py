@@ -0,0 +1,145 @@
+"""
+Версионные миграции схемы базы данных
+"""
+from datetime import datetime
+from sqlalchemy import inspect, text
+from loguru import logger
+from database.models import SchemaMigration, CompetitorDailyStat
+from database.partitions import PARTITIONED_TABLES, partition_table
+from database.rollups import rebuild_rollups
+
+
+def _partition_by_month(connection):
+    """Секционирование по created_at (только PostgreSQL).
+
+    Внешний ключ page_data -> search_results при этом удаляется: ссылку на
+    секционированную таблицу PostgreSQL не поддерживает. page_data секционирована
+    по времени анализа, поэтому при удалении устаревших секций выдачи ее строки
+    удаляются отдельно (drop_expired_partitions).
+    """
+    if connection.dialect.name != 'postgresql':
+        return
+    for table_name in PARTITIONED_TABLES:
+        partition_table(connection, table_name)
+
+
+def _add_competitor_rollups(connection):
+    """Счетчики для накопительных агрегатов конкурентов и их заполнение по истории"""
+    columns = {column['name'] for column in inspect(connection).get_columns('competitors')}
+    if 'position_sum' not in columns:
+        connection.execute(text("ALTER TABLE competitors ADD COLUMN position_sum INTEGER DEFAULT 0"))
+    CompetitorDailyStat.__table__.create(connection, checkfirst=True)
+    rebuild_rollups(connection)
+
+
+def _add_content_hash(connection):
+    """Хэш содержимого страниц для инкрементального анализа"""
+    columns = {column['name'] for column in inspect(connection).get_columns('page_data')}
+    if 'content_hash' not in columns:
+        connection.execute(text("ALTER TABLE page_data ADD COLUMN content_hash VARCHAR(64)"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_search_results_url ON search_results (url)"))
+
+
+def _add_keyword_scores(connection):
+    """Плотность всех ключевых запросов по странице (JSON)"""
+    columns = {column['name'] for column in inspect(connection).get_columns('page_data')}
+    if 'keyword_scores' not in columns:
+        connection.execute(text("ALTER TABLE page_data ADD COLUMN keyword_scores TEXT"))
+
+
+# Миграция: (версия, описание, шаги). Шаг - SQL-строка или функция(connection).
+# Шаги должны быть идемпотентными: на новой БД create_all уже создал объекты моделей.
+MIGRATIONS = [
+    (1, "Уникальность ключевых слов (keyword, search_engine, region)", [
+        # Переносим результаты на самый ранний дубль ключевого слова и удаляем остальные
+        """
+        UPDATE search_results SET keyword_id = (
+            SELECT MIN(k2.id) FROM keywords k1
+            JOIN keywords k2 ON k2.keyword = k1.keyword
+                AND k2.search_engine = k1.search_engine AND k2.region = k1.region
+            WHERE k1.id = search_results.keyword_id
+        )
+        WHERE keyword_id NOT IN (
+            SELECT MIN(id) FROM keywords GROUP BY keyword, search_engine, region
+        )
+        """,
+        """
+        DELETE FROM keywords WHERE id NOT IN (
+            SELECT MIN(id) FROM keywords GROUP BY keyword, search_engine, region
+        )
+        """,
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_keywords_keyword_engine_region "
+        "ON keywords (keyword, search_engine, region)",
+    ]),
+    (2, "Индексы для запросов дашборда", [
+        "CREATE INDEX IF NOT EXISTS ix_search_results_keyword_engine_position "
+        "ON search_results (keyword_id, search_engine, position)",
+        "CREATE INDEX IF NOT EXISTS ix_search_results_created_at ON search_results (created_at)",
+        lambda connection: connection.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_search_results_domain ON search_results (domain)"
+            + (" INCLUDE (position)" if connection.dialect.name == 'postgresql' else "")
+        )),
+        "CREATE INDEX IF NOT EXISTS ix_page_data_search_result_id ON page_data (search_result_id)",
+    ]),
+    (3, "Секционирование search_results и page_data по месяцам", [
+        _partition_by_month,
+    ]),
+    (4, "Накопительные агрегаты конкурентов", [
+        _add_competitor_rollups,
+    ]),
+    (5, "Хэш содержимого страниц", [
+        _add_content_hash,
+    ]),
+    (6, "Плотность ключевых запросов по страницам", [
+        _add_keyword_scores,
+    ]),
+]
+
+
+def _applied_versions(connection):
+    """Версии уже примененных миграций"""
+    return set(connection.execute(text("SELECT version FROM schema_migrations")).scalars())
+
+
+def _run_step(connection, step):
+    """Выполнить шаг миграции"""
+    if callable(step):
+        step(connection)
+    else:
+        connection.execute(text(step))
+
+
+def apply_migrations(engine, migrations=None):
+    """Применить недостающие миграции; возвращает список примененных версий"""
+    migrations = migrations if migrations is not None else MIGRATIONS
+    SchemaMigration.__table__.create(engine, checkfirst=True)
+
+    applied = []
+    for version, description, steps in sorted(migrations, key=lambda migration: migration[0]):
+        with engine.begin() as connection:
+            # Блокировка защищает от одновременного запуска миграций несколькими процессами
+            if connection.dialect.name == 'postgresql':
+                connection.execute(text("SELECT pg_advisory_xact_lock(hashtext('schema_migrations'))"))
+            if version in _applied_versions(connection):
+                continue
+
+            logger.info(f"Миграция {version}: {description}")
+            for step in steps:
+                _run_step(connection, step)
+            connection.execute(
+                SchemaMigration.__table__.insert().values(
+                    version=version, description=description, applied_at=datetime.utcnow()
+                )
+            )
+            applied.append(version)
+
+    if applied:
+        logger.info(f"Применены миграции: {applied}")
+    return applied
+
+
+def current_version(engine):
+    """Текущая версия схемы (0, если миграций не было)"""
+    SchemaMigration.__table__.create(engine, checkfirst=True)
+    with engine.connect() as connection:
+        return max(_applied_versions(connection), default=0)
@@ -1,17 +1,20 @@
 """
 Модели базы данных для SEO-анализа
 """
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Boolean, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, Boolean, Float, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import relationship
 from datetime import datetime
-from config import Config
+from database.engine import get_engine, get_sessionmaker
 
 Base = declarative_base()
 
 class Keyword(Base):
     """Модель ключевых слов"""
     __tablename__ = 'keywords'
+    __table_args__ = (
+        UniqueConstraint('keyword', 'search_engine', 'region', name='uq_keywords_keyword_engine_region'),
+    )
     
     id = Column(Integer, primary_key=True)
     keyword = Column(String(500), nullable=False, index=True)
@@ -25,6 +28,16 @@ class Keyword(Base):
 class SearchResult(Base):
     """Модель результатов поиска"""
     __tablename__ = 'search_results'
+    __table_args__ = (
+        # get_keyword_positions: join по keyword_id, фильтр по системе, сортировка по позиции
+        Index('ix_search_results_keyword_engine_position', 'keyword_id', 'search_engine', 'position'),
+        # get_recent_analysis: фильтр и сортировка по дате
+        Index('ix_search_results_created_at', 'created_at'),
+        # get_competitors_analysis: группировка по домену (в PostgreSQL - покрывающий индекс)
+        Index('ix_search_results_domain', 'domain', postgresql_include=['position']),
+        # get_page_hashes / save_page_metadata_batch: поиск последних результатов по URL
+        Index('ix_search_results_url', 'url'),
+    )
     
     id = Column(Integer, primary_key=True)
     keyword_id = Column(Integer, ForeignKey('keywords.id'), nullable=False)
@@ -45,7 +58,7 @@ class PageData(Base):
     __tablename__ = 'page_data'
     
     id = Column(Integer, primary_key=True)
-    search_result_id = Column(Integer, ForeignKey('search_results.id'), nullable=False)
+    search_result_id = Column(Integer, ForeignKey('search_results.id'), nullable=False, index=True)
     title = Column(String(1000))
     description = Column(Text)
     keywords = Column(Text)
@@ -70,6 +83,10 @@ class PageData(Base):
     # Анализ ключевых слов
     keyword_density = Column(Float, default=0.0)
     keyword_count = Column(Integer, default=0)
+    keyword_scores = Column(Text)  # JSON: {запрос: {count, density, coverage, terms}}
+    
+    # Хэш нормализованного HTML: по нему неизменившиеся страницы не анализируются повторно
+    content_hash = Column(String(64))
     
     created_at = Column(DateTime, default=datetime.utcnow)
     
@@ -88,12 +105,29 @@ class Competitor(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    # Статистика
+    # Статистика (накопительно обновляется при сохранении каждой выдачи)
     total_positions = Column(Integer, default=0)
+    position_sum = Column(Integer, default=0)  # Сумма позиций для пересчета средней
     avg_position = Column(Float, default=0.0)
     top_3_positions = Column(Integer, default=0)
     top_10_positions = Column(Integer, default=0)
 
+class CompetitorDailyStat(Base):
+    """Модель дневной статистики конкурента"""
+    __tablename__ = 'competitor_daily_stats'
+    __table_args__ = (
+        UniqueConstraint('domain', 'stat_date', 'search_engine', name='uq_competitor_daily_stats'),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    domain = Column(String(500), nullable=False)
+    stat_date = Column(Date, nullable=False)
+    search_engine = Column(String(50), nullable=False)
+    total_positions = Column(Integer, default=0)
+    position_sum = Column(Integer, default=0)
+    top_3_positions = Column(Integer, default=0)
+    top_10_positions = Column(Integer, default=0)
+
 class Backlink(Base):
     """Модель обратных ссылок"""
     __tablename__ = 'backlinks'
@@ -123,16 +157,23 @@ class AnalysisSession(Base):
     completed_at = Column(DateTime)
     error_message = Column(Text)
 
+class SchemaMigration(Base):
+    """Модель примененных миграций схемы"""
+    __tablename__ = 'schema_migrations'
+    
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    description = Column(String(500))
+    applied_at = Column(DateTime, default=datetime.utcnow)
+
 # Создание таблиц
 def create_tables():
     """Создание всех таблиц в базе данных"""
-    engine = create_engine(Config.DATABASE_URL)
+    engine = get_engine()
     Base.metadata.create_all(engine)
     return engine
 
 # Создание сессии
 def get_session():
     """Получение сессии базы данных"""
-    engine = create_engine(Config.DATABASE_URL)
-    Session = sessionmaker(bind=engine)
-    return Session() 
\ No newline at end of file
+    Session = get_sessionmaker()
+    return Session()
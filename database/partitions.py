@@ -0,0 +1,205 @@
+"""
+Секционирование search_results и page_data по месяцам (PostgreSQL)
+"""
+import re
+from datetime import datetime
+from sqlalchemy import column, delete, or_, select, table, text
+from loguru import logger
+from config import Config
+from database.models import Base, PageData, SearchResult
+from database.rollups import aggregate_stored, subtract_rollups
+
+# Секционируемые таблицы; ключ секционирования - created_at
+PARTITIONED_TABLES = ('search_results', 'page_data')
+
+_PARTITION_NAME = re.compile(r'_p(\d{4})(\d{2})$')
+
+# Колонки search_results, по которым считаются агрегаты конкурентов
+_ROLLUP_COLUMNS = ('domain', 'position', 'search_engine', 'created_at')
+
+
+def _month_start(value, shift=0):
+    """Первое число месяца, сдвинутого на shift месяцев"""
+    month_index = value.year * 12 + value.month - 1 + shift
+    return datetime(month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_name(table_name, month):
+    """Имя месячной секции: search_results_p202610"""
+    return f"{table_name}_p{month:%Y%m}"
+
+
+def is_partitioned(connection, table_name):
+    """Является ли таблица секционированной"""
+    relkind = connection.execute(
+        text("SELECT relkind FROM pg_class WHERE relname = :name AND relnamespace = 'public'::regnamespace"),
+        {'name': table_name}
+    ).scalar()
+    return relkind == 'p'
+
+
+def list_partitions(connection, table_name):
+    """Секции таблицы: {имя: первое число месяца} (секция по умолчанию не входит)"""
+    names = connection.execute(text("""
+        SELECT child.relname FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :name
+    """), {'name': table_name}).scalars()
+
+    partitions = {}
+    for name in names:
+        match = _PARTITION_NAME.search(name)
+        if match:
+            partitions[name] = datetime(int(match.group(1)), int(match.group(2)), 1)
+    return partitions
+
+
+def create_month_partition(connection, table_name, month):
+    """Создать секцию месяца, перенеся подходящие строки из секции по умолчанию"""
+    name = partition_name(table_name, month)
+    start, end = _month_start(month), _month_start(month, 1)
+    bounds = {'start': start, 'end': end}
+
+    connection.execute(text(f'CREATE TABLE "{name}" (LIKE "{table_name}" INCLUDING DEFAULTS)'))
+    # Строки, попавшие в секцию по умолчанию, иначе помешают подключить новую секцию
+    connection.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM "{table_name}_default"
+            WHERE created_at >= :start AND created_at < :end
+            RETURNING *
+        )
+        INSERT INTO "{name}" SELECT * FROM moved
+    """), bounds)
+    connection.execute(text(
+        f"""ALTER TABLE "{table_name}" ATTACH PARTITION "{name}" """
+        f"""FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"""
+    ))
+    logger.info(f"Создана секция {name}")
+
+
+def partition_table(connection, table_name, months_ahead=None):
+    """Преобразовать обычную таблицу в секционированную по created_at (по месяцам)"""
+    if is_partitioned(connection, table_name):
+        return
+
+    months_ahead = Config.DB_PARTITIONS_AHEAD if months_ahead is None else months_ahead
+    legacy = f"{table_name}_legacy"
+    logger.info(f"Секционирование таблицы {table_name}")
+
+    # Ключ секционирования входит в первичный ключ и не может быть пустым
+    connection.execute(text(f"UPDATE {table_name} SET created_at = now() WHERE created_at IS NULL"))
+
+    # Внешний ключ на id секционированной таблицы невозможен (id уникален только вместе с created_at).
+    # Ссылочная целостность page_data -> search_results больше не проверяется базой: строки
+    # page_data удаляются вместе со строками выдачи в drop_expired_partitions.
+    if table_name == 'search_results':
+        connection.execute(text(
+            "ALTER TABLE page_data DROP CONSTRAINT IF EXISTS page_data_search_result_id_fkey"
+        ))
+
+    sequence = connection.execute(
+        text("SELECT pg_get_serial_sequence(:table, 'id')"), {'table': table_name}
+    ).scalar()
+    connection.execute(text(f"ALTER TABLE {table_name} RENAME TO {legacy}"))
+    if sequence:
+        connection.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY NONE"))
+
+    connection.execute(text(
+        f"CREATE TABLE {table_name} (LIKE {legacy} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)"
+    ))
+    connection.execute(text(f"ALTER TABLE {table_name} ALTER COLUMN created_at SET NOT NULL"))
+    connection.execute(text(f"ALTER TABLE {table_name} ADD PRIMARY KEY (id, created_at)"))
+    connection.execute(text(f"CREATE TABLE {table_name}_default PARTITION OF {table_name} DEFAULT"))
+
+    # Секции на весь период существующих данных и на months_ahead месяцев вперед
+    first, last = connection.execute(text(f"SELECT min(created_at), max(created_at) FROM {legacy}")).one()
+    now = datetime.utcnow()
+    month = _month_start(min(first or now, now))
+    until = _month_start(max(last or now, now), months_ahead)
+    while month <= until:
+        create_month_partition(connection, table_name, month)
+        month = _month_start(month, 1)
+
+    connection.execute(text(f"INSERT INTO {table_name} SELECT * FROM {legacy}"))
+    connection.execute(text(f"DROP TABLE {legacy}"))
+    if sequence:
+        connection.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {table_name}.id"))
+
+    # Внешние ключи на другие таблицы и индексы моделей (создаются на всех секциях)
+    if table_name == 'search_results':
+        connection.execute(text(
+            "ALTER TABLE search_results ADD CONSTRAINT search_results_keyword_id_fkey "
+            "FOREIGN KEY (keyword_id) REFERENCES keywords (id)"
+        ))
+    for index in Base.metadata.tables[table_name].indexes:
+        index.create(connection)
+
+
+def ensure_partitions(engine, months_ahead=None):
+    """Создать недостающие секции от текущего месяца на months_ahead вперед"""
+    if engine.dialect.name != 'postgresql':
+        return []
+
+    months_ahead = Config.DB_PARTITIONS_AHEAD if months_ahead is None else months_ahead
+    created = []
+    with engine.begin() as connection:
+        for table_name in PARTITIONED_TABLES:
+            if not is_partitioned(connection, table_name):
+                continue
+            existing = set(list_partitions(connection, table_name).values())
+            current = _month_start(datetime.utcnow())
+            for shift in range(months_ahead + 1):
+                month = _month_start(current, shift)
+                if month not in existing:
+                    create_month_partition(connection, table_name, month)
+                    created.append(partition_name(table_name, month))
+    return created
+
+
+def _delete_expired_rows(connection, cutoff):
+    """Удалить строки старше cutoff из несекционированных таблиц; возвращает затронутые таблицы"""
+    expired_ids = select(SearchResult.id).where(SearchResult.created_at < cutoff)
+    pages = connection.execute(delete(PageData).where(
+        or_(PageData.search_result_id.in_(expired_ids), PageData.created_at < cutoff)
+    )).rowcount
+    # Накопительные агрегаты конкурентов должны совпадать с оставшимися строками
+    subtract_rollups(connection, *aggregate_stored(connection, where=SearchResult.created_at < cutoff))
+    results = connection.execute(delete(SearchResult).where(SearchResult.created_at < cutoff)).rowcount
+    if results or pages:
+        logger.info(f"Удалено строк старше {cutoff:%Y-%m-%d}: search_results {results}, page_data {pages}")
+    return [name for name, count in (('search_results', results), ('page_data', pages)) if count]
+
+
+def drop_expired_partitions(engine, retention_months=None):
+    """Удалить данные, весь месяц которых старше срока хранения.
+
+    В PostgreSQL секции удаляются целиком, без секций (SQLite) - строки.
+    Возвращает имена удаленных секций или таблиц, из которых удалены строки.
+    """
+    retention_months = Config.DB_RETENTION_MONTHS if retention_months is None else retention_months
+    if retention_months <= 0:
+        return []
+
+    cutoff = _month_start(datetime.utcnow(), -retention_months)
+    dropped = []
+    with engine.begin() as connection:
+        if connection.dialect.name != 'postgresql' or not is_partitioned(connection, 'search_results'):
+            return _delete_expired_rows(connection, cutoff)
+
+        for table_name in PARTITIONED_TABLES:
+            for name, month in list_partitions(connection, table_name).items():
+                if _month_start(month, 1) <= cutoff:
+                    # page_data секционирована по времени анализа, а не по дате строки выдачи,
+                    # и внешнего ключа нет: ссылки на удаляемые строки выдачи убираются явно
+                    if table_name == 'search_results':
+                        connection.execute(text(
+                            f'DELETE FROM page_data WHERE search_result_id IN (SELECT id FROM "{name}")'
+                        ))
+                        # Из накопительных агрегатов конкурентов вычитается удаляемый месяц
+                        partition = table(name, *(column(c) for c in _ROLLUP_COLUMNS))
+                        subtract_rollups(connection, *aggregate_stored(connection, source=partition))
+                    connection.execute(text(f'DROP TABLE "{name}"'))
+                    dropped.append(name)
+                    logger.info(f"Удалена секция {name} (срок хранения {retention_months} мес.)")
+    return dropped
@@ -0,0 +1,195 @@
+"""
+Накопительные агрегаты по конкурентам (таблицы competitors и competitor_daily_stats)
+"""
+from datetime import datetime
+from sqlalchemy import Float, bindparam, case, cast, delete, func, select, update
+from database.engine import dialect_insert
+from database.models import Competitor, CompetitorDailyStat, SearchResult
+
+
+# Строк в одном многострочном INSERT ... ON CONFLICT
+BATCH_SIZE = 1000
+
+
+def _batches(items):
+    """Разбить отсортированные элементы на пачки"""
+    items = sorted(items)
+    for start in range(0, len(items), BATCH_SIZE):
+        yield items[start:start + BATCH_SIZE]
+
+
+def _empty_stats():
+    """Пустой набор счетчиков"""
+    return {'total_positions': 0, 'position_sum': 0, 'top_3_positions': 0, 'top_10_positions': 0}
+
+
+def aggregate_results(rows):
+    """Свернуть строки search_results в агрегаты по домену и по домену за день.
+    
+    rows - словари с ключами domain, position, search_engine, created_at.
+    """
+    totals = {}
+    daily = {}
+    for row in rows:
+        position = row['position']
+        keys = [
+            (totals, row['domain']),
+            (daily, (row['domain'], row['created_at'].date(), row['search_engine'])),
+        ]
+        for target, key in keys:
+            stats = target.setdefault(key, _empty_stats())
+            stats['total_positions'] += 1
+            stats['position_sum'] += position
+            stats['top_3_positions'] += position <= 3
+            stats['top_10_positions'] += position <= 10
+    return totals, daily
+
+
+def _added(column, excluded):
+    """Текущее значение счетчика плюс прибавка"""
+    return func.coalesce(column, 0) + excluded
+
+
+def upsert_competitor_totals(executor, totals):
+    """Прибавить агрегаты к строкам competitors (новые домены создаются)"""
+    if not totals:
+        return
+    now = datetime.utcnow()
+    # Фиксированный порядок доменов исключает взаимные блокировки параллельных писателей
+    for batch in _batches(totals.items()):
+        values = [
+            {
+                'domain': domain,
+                'website_url': f"https://{domain}",
+                'avg_position': stats['position_sum'] / stats['total_positions'],
+                'created_at': now,
+                'updated_at': now,
+                **stats
+            }
+            for domain, stats in batch
+        ]
+        stmt = dialect_insert(Competitor, executor).values(values)
+        excluded = stmt.excluded
+        total = _added(Competitor.total_positions, excluded.total_positions)
+        position_sum = _added(Competitor.position_sum, excluded.position_sum)
+        executor.execute(stmt.on_conflict_do_update(
+            index_elements=['domain'],
+            set_={
+                'total_positions': total,
+                'position_sum': position_sum,
+                'avg_position': cast(position_sum, Float) / total,
+                'top_3_positions': _added(Competitor.top_3_positions, excluded.top_3_positions),
+                'top_10_positions': _added(Competitor.top_10_positions, excluded.top_10_positions),
+                'updated_at': excluded.updated_at,
+            }
+        ))
+
+
+def upsert_daily_stats(executor, daily):
+    """Прибавить агрегаты к дневной статистике доменов"""
+    if not daily:
+        return
+    for batch in _batches(daily.items()):
+        values = [
+            {'domain': domain, 'stat_date': stat_date, 'search_engine': search_engine, **stats}
+            for (domain, stat_date, search_engine), stats in batch
+        ]
+        stmt = dialect_insert(CompetitorDailyStat, executor).values(values)
+        excluded = stmt.excluded
+        executor.execute(stmt.on_conflict_do_update(
+            index_elements=['domain', 'stat_date', 'search_engine'],
+            set_={
+                name: _added(getattr(CompetitorDailyStat, name), getattr(excluded, name))
+                for name in _empty_stats()
+            }
+        ))
+
+
+def apply_rollups(executor, rows):
+    """Обновить агрегаты для только что сохраненных строк search_results"""
+    totals, daily = aggregate_results(rows)
+    upsert_competitor_totals(executor, totals)
+    upsert_daily_stats(executor, daily)
+
+
+def aggregate_stored(executor, source=None, where=None):
+    """Агрегаты по сохраненным строкам выдачи: source - search_results или ее секция"""
+    source = SearchResult.__table__ if source is None else source
+    stat_date = func.date(source.c.created_at)
+    query = select(
+        source.c.domain,
+        stat_date.label('stat_date'),
+        source.c.search_engine,
+        func.count().label('total_positions'),
+        func.sum(source.c.position).label('position_sum'),
+        func.sum(case((source.c.position <= 3, 1), else_=0)).label('top_3_positions'),
+        func.sum(case((source.c.position <= 10, 1), else_=0)).label('top_10_positions'),
+    ).group_by(source.c.domain, stat_date, source.c.search_engine)
+    if where is not None:
+        query = query.where(where)
+    grouped = executor.execute(query)
+
+    totals = {}
+    daily = {}
+    for row in grouped:
+        stats = {name: int(getattr(row, name) or 0) for name in _empty_stats()}
+        # SQLite возвращает date() строкой
+        day = row.stat_date
+        if isinstance(day, str):
+            day = datetime.strptime(day, '%Y-%m-%d').date()
+        daily[(row.domain, day, row.search_engine)] = stats
+        domain_stats = totals.setdefault(row.domain, _empty_stats())
+        for name, value in stats.items():
+            domain_stats[name] += value
+    return totals, daily
+
+
+def subtract_rollups(executor, totals, daily):
+    """Вычесть агрегаты удаляемых строк выдачи; опустевшая дневная статистика удаляется"""
+    if totals:
+        total = Competitor.total_positions - bindparam('b_total_positions')
+        position_sum = Competitor.position_sum - bindparam('b_position_sum')
+        executor.execute(
+            update(Competitor).where(Competitor.domain == bindparam('b_domain')).values(
+                total_positions=total,
+                position_sum=position_sum,
+                avg_position=case((total > 0, cast(position_sum, Float) / total), else_=0.0),
+                top_3_positions=Competitor.top_3_positions - bindparam('b_top_3_positions'),
+                top_10_positions=Competitor.top_10_positions - bindparam('b_top_10_positions'),
+            ),
+            [
+                {'b_domain': domain, **{f"b_{name}": value for name, value in stats.items()}}
+                for domain, stats in sorted(totals.items())
+            ]
+        )
+    if daily:
+        executor.execute(
+            update(CompetitorDailyStat).where(
+                CompetitorDailyStat.domain == bindparam('b_domain'),
+                CompetitorDailyStat.stat_date == bindparam('b_stat_date'),
+                CompetitorDailyStat.search_engine == bindparam('b_search_engine'),
+            ).values(**{
+                name: getattr(CompetitorDailyStat, name) - bindparam(f"b_{name}") for name in _empty_stats()
+            }),
+            [
+                {
+                    'b_domain': domain, 'b_stat_date': stat_date, 'b_search_engine': search_engine,
+                    **{f"b_{name}": value for name, value in stats.items()}
+                }
+                for (domain, stat_date, search_engine), stats in sorted(daily.items())
+            ]
+        )
+        executor.execute(delete(CompetitorDailyStat).where(CompetitorDailyStat.total_positions <= 0))
+
+
+def rebuild_rollups(executor):
+    """Пересчитать агрегаты по всей истории search_results"""
+    executor.execute(update(Competitor).values(
+        total_positions=0, position_sum=0, avg_position=0.0, top_3_positions=0, top_10_positions=0
+    ))
+    executor.execute(delete(CompetitorDailyStat))
+
+    totals, daily = aggregate_stored(executor)
+    upsert_competitor_totals(executor, totals)
+    upsert_daily_stats(executor, daily)
+    return len(totals)
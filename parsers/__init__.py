@@ -4,5 +4,6 @@
 from .google_parser import GoogleParser
 from .yandex_parser import YandexParser
 from .page_parser import PageParser
+from .page_pipeline import PagePipeline, PageDocument
 
-__all__ = ['GoogleParser', 'YandexParser', 'PageParser'] 
\ No newline at end of file
+__all__ = ['GoogleParser', 'YandexParser', 'PageParser', 'PagePipeline', 'PageDocument'] 
\ No newline at end of file
@@ -2,12 +2,13 @@
 Альтернативный парсер для обхода блокировок Google
 """
 import requests
-import time
 import random
 from bs4 import BeautifulSoup
 from loguru import logger
 from config import Config
 from utils.proxy_manager import proxy_manager
+from utils.proxy_pool import proxy_pool
+from utils.rate_limiter import rate_limiter, retry_after_seconds
 
 class AlternativeParser:
     """Альтернативный парсер с различными методами"""
@@ -34,18 +35,7 @@ class AlternativeParser:
             }
             
             response = requests.get(url, params=params, timeout=30)
-            data = response.json()
-            
-            results = []
-            if 'organic_results' in data:
-                for i, result in enumerate(data['organic_results'], 1):
-                    results.append({
-                        'position': i,
-                        'title': result.get('title', ''),
-                        'url': result.get('link', ''),
-                        'domain': result.get('displayed_link', ''),
-                        'description': result.get('snippet', '')
-                    })
+            results = self.parse_serpapi_results(response.json())
             
             logger.info(f"SerpAPI: найдено {len(results)} результатов")
             return results
@@ -54,6 +44,19 @@ class AlternativeParser:
             logger.error(f"Ошибка SerpAPI: {e}")
             return []
     
+    def parse_serpapi_results(self, data):
+        """Разбор JSON-ответа SerpAPI"""
+        results = []
+        for i, result in enumerate(data.get('organic_results', []), 1):
+            results.append({
+                'position': i,
+                'title': result.get('title', ''),
+                'url': result.get('link', ''),
+                'domain': result.get('displayed_link', ''),
+                'description': result.get('snippet', '')
+            })
+        return results
+    
     def parse_with_scraperapi(self, keyword):
         """Парсинг через ScraperAPI"""
         try:
@@ -161,14 +164,24 @@ class AlternativeParser:
             # URL поиска
             search_url = f"https://www.google.com/search?q={keyword}&gl={Config.GOOGLE_REGION}&hl={Config.GOOGLE_LANGUAGE}&num={Config.MAX_RESULTS}&safe=off&pws=0"
             
-            # Случайная задержка
-            time.sleep(random.uniform(2, 5))
+            # Запрос идет напрямую в Google: общий с GoogleParser лимит частоты
+            rate_limiter.acquire("google")
             
-            response = requests.get(search_url, headers=headers, timeout=30)
+            with proxy_pool.lease() as proxy_lease:
+                response = requests.get(search_url, headers=headers, timeout=30, proxies=proxy_lease.proxies)
+                if response.status_code == 429:
+                    proxy_lease.captcha()
             
             if response.status_code == 200:
                 soup = BeautifulSoup(response.content, 'html.parser')
-                return self.parse_google_results(soup)
+                results = self.parse_google_results(soup)
+                if results:
+                    rate_limiter.success("google")
+                return results
+            elif response.status_code == 429:
+                logger.warning("Google ограничил частоту запросов (429)")
+                rate_limiter.throttled("google", retry_after_seconds(response.headers))
+                return []
             else:
                 logger.error(f"Запрос вернул код: {response.status_code}")
                 return []
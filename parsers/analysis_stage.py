@@ -0,0 +1,109 @@
+"""
+Этап анализа страниц в пуле процессов, отделенный от загрузки
+"""
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from loguru import logger
+from config import Config
+from parsers.page_pipeline import PagePipeline, content_hash
+
+# Конвейер рабочего процесса (создается при первом вызове в процессе)
+_worker_pipeline = None
+
+
+def analyze_page(url, html, known_hash=None, keyword=None):
+    """Анализ одной страницы в рабочем процессе.
+
+    Возвращает (статус, url, мета-данные, хэш), статус - analyzed, skipped
+    (хэш совпал с прошлым анализом) или failed (вместо мета-данных - текст ошибки).
+    """
+    global _worker_pipeline
+    try:
+        page_hash = content_hash(html)
+        if known_hash == page_hash:
+            return 'skipped', url, None, page_hash
+        if _worker_pipeline is None:
+            _worker_pipeline = PagePipeline()
+        return 'analyzed', url, _worker_pipeline.run(html, url, keyword=keyword), page_hash
+    except Exception as e:
+        return 'failed', url, str(e), None
+
+
+class AnalysisStage:
+    """Анализ страниц по мере загрузки.
+
+    Загрузка кладет (url, html) в ограниченную очередь, обработчики берут
+    страницы из нее и отдают разбор в ProcessPoolExecutor, поэтому сеть и
+    разбор HTML идут одновременно, а разбор масштабируется по ядрам. Полная
+    очередь приостанавливает загрузку. При workers=0 разбор идет в текущем
+    процессе.
+    """
+
+    def __init__(self, workers=None, queue_size=None):
+        self.workers = Config.ANALYSIS_WORKERS if workers is None else workers
+        self.queue_size = queue_size or Config.ANALYSIS_QUEUE_SIZE
+        self._executor = None
+
+    def _get_executor(self):
+        """Пул процессов (запускается один раз и переиспользуется между запусками)"""
+        if self._executor is None and self.workers:
+            # spawn: рабочие процессы не наследуют потоки и блокировки родителя
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+            )
+            logger.info(f"Запущен пул анализа страниц: {self.workers} процессов")
+        return self._executor
+
+    async def run_async(self, pages, known_hashes=None, on_result=None, keywords=None):
+        """Проанализировать страницы из асинхронного итератора (url, html).
+
+        on_result(статус, url, мета-данные, хэш) вызывается для каждой страницы
+        в порядке готовности; страницы без HTML приходят со статусом failed.
+        keywords - запрос выдачи для каждого URL (для плотности ключевых слов).
+        """
+        known_hashes = known_hashes or {}
+        keywords = keywords or {}
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        consumers = max(self.workers, 1)
+        results = []
+
+        def emit(result):
+            results.append(result)
+            if on_result:
+                on_result(*result)
+
+        async def produce():
+            try:
+                async for url, html in pages:
+                    await queue.put((url, html))
+            finally:
+                for _ in range(consumers):
+                    await queue.put(None)
+
+        async def consume():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                url, html = item
+                if not html:
+                    emit(('failed', url, None, None))
+                    continue
+                args = (url, html, known_hashes.get(url), keywords.get(url))
+                if executor:
+                    result = await loop.run_in_executor(executor, analyze_page, *args)
+                else:
+                    result = analyze_page(*args)
+                emit(result)
+
+        await asyncio.gather(produce(), *[consume() for _ in range(consumers)])
+        return results
+
+    def close(self):
+        """Остановить пул процессов"""
+        if self._executor:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,156 @@
+"""
+Асинхронная загрузка страниц конкурентов (aiohttp)
+"""
+import asyncio
+from urllib.parse import urlparse
+import aiohttp
+from loguru import logger
+from config import Config
+from utils.proxy_manager import proxy_manager
+from utils.http_cache import response_cache
+from utils.proxy_pool import proxy_pool as default_proxy_pool
+from utils.rate_limiter import rate_limiter as default_rate_limiter, retry_after_seconds
+from parsers.streaming import BoundedBody, is_html_content_type
+
+
+class AsyncPageFetcher:
+    """Параллельная загрузка страниц: общий лимит запросов и вежливость по доменам"""
+
+    def __init__(self, concurrency=None, per_domain=None, rate_limiter=None, cache=None, proxy_pool=None):
+        self.concurrency = concurrency or Config.FETCH_CONCURRENCY
+        self.per_domain = per_domain or Config.FETCH_PER_DOMAIN
+        self.rate_limiter = rate_limiter or default_rate_limiter
+        self.proxy_pool = proxy_pool if proxy_pool is not None else default_proxy_pool
+        self.cache = cache if cache is not None else response_cache
+        self.stats = {'fetched': 0, 'failed': 0, 'truncated': 0, 'rejected': 0}
+
+    def _domain_slot(self, domain):
+        """Семафор одновременных запросов к домену"""
+        if domain not in self._domain_semaphores:
+            self._domain_semaphores[domain] = asyncio.Semaphore(self.per_domain)
+        return self._domain_semaphores[domain]
+
+    async def _wait_domain_turn(self, domain):
+        """Дождаться своей очереди к домену (паузы между запросами к одному хосту)"""
+        # Токен резервируется сразу, поэтому параллельные задачи не стартуют разом
+        wait = self.rate_limiter.reserve(domain)
+        if wait:
+            await asyncio.sleep(wait)
+
+    async def _fetch(self, session, url):
+        """Загрузить одну страницу"""
+        entry = self.cache.lookup(url) if self.cache else None
+        if entry and entry['fresh']:
+            # Свежая запись кэша: ни запроса, ни паузы для домена
+            return url, self.cache.hit(entry)
+
+        domain = urlparse(url).netloc
+        async with self._domain_slot(domain):
+            await self._wait_domain_turn(domain)
+            try:
+                logger.info(f"Парсинг страницы: {url}")
+                headers = self.cache.conditional_headers(entry) if self.cache else {}
+                async with self.proxy_pool.lease_async() as proxy_lease, session.get(
+                    url, headers=headers, proxy=proxy_lease.url
+                ) as response:
+                    # Ответ получен - прокси отработал, даже если сайт вернет ошибку
+                    proxy_lease.ok()
+                    if response.status == 304 and entry:
+                        return url, self.cache.revalidate(entry, response.headers)
+                    if response.status in (429, 503):
+                        self.rate_limiter.throttled(domain, retry_after_seconds(response.headers))
+                    response.raise_for_status()
+                    self.rate_limiter.success(domain)
+
+                    # Тип проверяется по заголовкам, тело читается частями до лимита
+                    content_type = response.headers.get('Content-Type')
+                    if not is_html_content_type(content_type):
+                        self.stats['rejected'] += 1
+                        logger.warning(f"Пропуск {url}: тип содержимого {content_type}")
+                        return url, None
+
+                    # Как и в PageParser: без явной кодировки считаем страницу UTF-8
+                    body = BoundedBody(response.charset or 'utf-8')
+                    async for chunk in response.content.iter_chunked(Config.FETCH_CHUNK_SIZE):
+                        if not body.feed(chunk):
+                            break
+                    html = body.text
+                    if body.truncated:
+                        self.stats['truncated'] += 1
+                        logger.warning(f"Страница {url} обрезана до {body.size} байт")
+                    elif self.cache:
+                        self.cache.store(url, body.content, response.headers, body.encoding)
+                self.stats['fetched'] += 1
+                return url, html
+            except Exception as e:
+                self.stats['failed'] += 1
+                logger.error(f"Ошибка при получении страницы {url}: {e}")
+                return url, None
+
+    async def _worker(self, session, pending, results):
+        """Загружать страницы из общего итератора URL, пока он не опустеет"""
+        for url in pending:
+            try:
+                result = await self._fetch(session, url)
+            except Exception as e:
+                self.stats['failed'] += 1
+                logger.error(f"Ошибка при получении страницы {url}: {e}")
+                result = url, None
+            # Полная очередь результатов останавливает загрузку, пока потребитель не заберет страницу
+            await results.put(result)
+
+    async def iter_pages(self, urls):
+        """Асинхронно отдавать (url, html) по мере загрузки.
+
+        Загружают concurrency обработчиков, готовые страницы ждут в очереди на
+        concurrency элементов: если потребитель не забирает страницы, новые не
+        запрашиваются.
+        """
+        self._domain_semaphores = {}
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return
+
+        timeout = aiohttp.ClientTimeout(total=Config.TIMEOUT)
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_domain)
+        async with aiohttp.ClientSession(
+            headers=proxy_manager.get_headers(), timeout=timeout, connector=connector
+        ) as session:
+            pending = iter(urls)
+            results = asyncio.Queue(maxsize=self.concurrency)
+            workers = [
+                asyncio.ensure_future(self._worker(session, pending, results))
+                for _ in range(min(self.concurrency, len(urls)))
+            ]
+            try:
+                for _ in urls:
+                    yield await results.get()
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+
+    async def fetch_all_async(self, urls):
+        """Загрузить все страницы, вернуть словарь url -> html"""
+        pages = {}
+        async for url, html in self.iter_pages(urls):
+            pages[url] = html
+        return pages
+
+    def reset_stats(self):
+        """Сбросить счетчики загрузки"""
+        self.stats = {'fetched': 0, 'failed': 0, 'truncated': 0, 'rejected': 0}
+
+    def log_stats(self):
+        """Вывести счетчики загрузки в лог"""
+        logger.info(
+            f"Загружено страниц: {self.stats['fetched']}, ошибок: {self.stats['failed']}, "
+            f"обрезано: {self.stats['truncated']}, отклонено по типу: {self.stats['rejected']}"
+        )
+
+    def fetch_all(self, urls):
+        """Синхронная обертка над fetch_all_async"""
+        self.reset_stats()
+        pages = asyncio.run(self.fetch_all_async(urls))
+        self.log_stats()
+        return pages
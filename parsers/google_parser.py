@@ -5,94 +5,56 @@ import re
 import urllib.parse
 import time
 import random
-from bs4 import BeautifulSoup
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.service import Service
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from loguru import logger
 from config import Config
 from utils.proxy_manager import proxy_manager
-from selenium_stealth import stealth
+from utils.proxy_pool import proxy_pool
+from utils.driver_pool import driver_pool
+from utils.rate_limiter import rate_limiter, retry_after_seconds
+from utils.lean_browser import TrafficMeter, wait_dom_ready
+from parsers.selector_plan import SelectorPlan, parse_html
 
 
+# План извлечения органической выдачи: селекторы по приоритету
+ORGANIC_CONTAINERS = [
+    'div.g',  # Стандартный селектор
+    'div[data-hveid]',  # Альтернативный селектор
+    'div.rc',  # Еще один вариант
+    'div[jscontroller]',  # Современный селектор
+    'div[jsname]',  # Новый селектор
+]
+# Если блоки не найдены - любые div со ссылками
+ORGANIC_FALLBACK = ('div', 'a[href]')
+ORGANIC_FIELDS = {
+    'title': ['h3', 'a h3', '.LC20lb', '.DKV0Md', '.r', '.title'],
+    'link': (['a[href]'], 'href'),
+    'description': ['.VwiC3b', '.s3v9rd', '.st', '.aCOpRe', '.snippet-content'],
+}
+# Форма капчи на странице /sorry/ (reCAPTCHA); слова вроде "robot" в выдаче признаком не считаются
+CAPTCHA_FORM = re.compile(r'<form[^>]+id="captcha-form"|class="g-recaptcha"|action="[^"]*/sorry/', re.I)
+
+
+def is_captcha_page(url, html):
+    """Капча Google по явным признакам: редирект на /sorry/ или форма капчи"""
+    return '/sorry/' in urllib.parse.urlparse(url).path or bool(CAPTCHA_FORM.search(html or ''))
+
+
+def is_consent_page(url):
+    """Страница согласия с cookies (consent.google.com) - не капча и не вина прокси"""
+    return urllib.parse.urlparse(url).netloc.startswith('consent.')
+
 
 class GoogleParser:
     """Парсер результатов поиска Google"""
     
     def __init__(self, use_selenium=True):
         self.use_selenium = use_selenium
-        self.driver = None
+        self.selector_plan = SelectorPlan(ORGANIC_CONTAINERS, ORGANIC_FIELDS, fallback=ORGANIC_FALLBACK)
         self.session = proxy_manager.get_session()
-
-    def setup_selenium(self):
-        """Настройка stealth WebDriver"""
-        service = Service(ChromeDriverManager().install())
-        chrome_options = webdriver.ChromeOptions()
-
-        # Базовые настройки
-        #chrome_options.add_argument("--headless=new")  # Новый headless режим
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        chrome_options.add_experimental_option('useAutomationExtension', False)
-        chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])
-
-        # Настройки для обхода детекции
-        chrome_options.add_argument("--disable-extensions")
-        chrome_options.add_argument("--disable-plugins")
-        chrome_options.add_argument("--disable-popup-blocking")
-        chrome_options.add_argument("--profile-directory=Default")
-        chrome_options.add_argument("--disable-infobars")
-
-        # Региональные настройки для Кыргызстана
-        chrome_options.add_argument("--lang=ru-RU")  # Основной язык интерфейса
-        chrome_options.add_argument("--timezone=Asia/Bishkek")  # Часовой пояс
-        chrome_options.add_argument("--geo-location=lat=42.87,lon=74.59")  # Координаты Бишкека
-
-        # Фиксированный user-agent (лучше не использовать случайные)
-        user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        chrome_options.add_argument(f"user-agent={user_agent}")
-
-        # Настройки прокси
-        if Config.USE_PROXY and Config.PROXY_LIST:
-            proxy = proxy_manager.get_proxy()
-            if proxy:
-                chrome_options.add_extension(proxy)
-
-        try:
-            # Инициализация драйвера
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
-
-
-            # # Применение stealth-режима
-            # stealth(
-            #     self.driver,
-            #     languages=["ru-RU", "ru", "ky-KG"],
-            #     vendor="Google Inc.",
-            #     platform="Win32",
-            #     webgl_vendor="Intel Inc.",
-            #     renderer="Intel HD Graphics 620",  # Типичная графика для ноутбуков
-            #     fix_hairline=True,
-            #     run_on_insecure_origins=True  # Важно для некоторых сайтов
-            # )
-            #
-            # # Дополнительные настройки для маскировки
-            # self.driver.execute_script(
-            #     "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
-            # )
-            # self.driver.execute_cdp_cmd(
-            #     "Network.setUserAgentOverride",
-            #     {"userAgent": user_agent}
-            # )
-
-        except Exception as e:
-            logger.error(f"Ошибка создания WebDriver: {e}")
-            self.driver = None
+        self.traffic = TrafficMeter("google")
 
     def build_search_url(self, keyword, page=1):
         """Построить URL для поиска"""
@@ -106,7 +68,7 @@ class GoogleParser:
             'pws': '0',  # Отключаем персонализацию
         }
 
-        base_url = "https://www.google.com/search"
+        base_url = Config.GOOGLE_SEARCH_URL
         query_string = urllib.parse.urlencode(params)
         return f"{base_url}?{query_string}"
 
@@ -119,89 +81,28 @@ class GoogleParser:
         except:
             return url
     
-    def parse_organic_results(self, soup):
-        """Парсинг органических результатов"""
+    def parse_organic_results(self, page):
+        """Парсинг органических результатов (HTML или BeautifulSoup)"""
         results = []
         
-        # Различные селекторы для поиска результатов
-        selectors = [
-            'div.g',  # Стандартный селектор
-            'div[data-hveid]',  # Альтернативный селектор
-            'div.rc',  # Еще один вариант
-            'div[jscontroller]',  # Современный селектор
-            'div[jsname]',  # Новый селектор
-        ]
-        
-        organic_results = []
-        for selector in selectors:
-            try:
-                if '.' in selector:
-                    class_name = selector.split('.')[-1]
-                    organic_results = soup.find_all('div', class_=class_name)
-                else:
-                    # Для селекторов с атрибутами
-                    if '[' in selector:
-                        attr_name = selector.split('[')[1].split(']')[0]
-                        if '=' in attr_name:
-                            name, value = attr_name.split('=')
-                            organic_results = soup.find_all('div', attrs={name.strip(): value.strip().strip('"')})
-                        else:
-                            organic_results = soup.find_all('div', attrs={attr_name: True})
-                    else:
-                        organic_results = soup.find_all('div')
-                
-                if organic_results:
-                    logger.info(f"Найдены результаты с селектором: {selector}")
-                    break
-            except Exception as e:
-                logger.debug(f"Ошибка с селектором {selector}: {e}")
-                continue
-        
-        if not organic_results:
-            # Попробуем найти любые div с ссылками
-            organic_results = soup.find_all('div')
-            organic_results = [div for div in organic_results if div.find('a', href=True)]
-            logger.info("Используем fallback селектор")
-        
+        organic_results = self.selector_plan.find_containers(parse_html(page))
         logger.info(f"Найдено {len(organic_results)} потенциальных результатов")
         
         for i, result in enumerate(organic_results, 1):
             try:
-                # Поиск заголовка и ссылки
-                title_element = None
-                link_element = None
+                # Заголовок, ссылка и описание - одним обходом блока
+                fields = self.selector_plan.extract_fields(result)
+                title = fields['title']
+                url = fields['link']
                 
-                # Различные селекторы для заголовка
-                title_selectors = ['h3', 'a h3', '.LC20lb', '.DKV0Md', '.r', '.title']
-                for selector in title_selectors:
-                    try:
-                        if selector == 'h3':
-                            title_element = result.find('h3')
-                        elif selector.startswith('.'):
-                            title_element = result.select_one(selector)
-                        else:
-                            title_element = result.select_one(selector)
-                        
-                        if title_element and title_element.get_text(strip=True):
-                            break
-                    except:
-                        continue
-                
-                # Поиск ссылки
-                link_element = result.find('a', href=True)
-                
-                if not title_element or not link_element:
+                if not title or not url:
                     continue
                 
-                title = title_element.get_text(strip=True)
-                url = link_element.get('href', '')
-                
                 # Извлекаем реальный URL из Google redirect
                 if url.startswith('/url?q='):
                     url = url.split('/url?q=')[1].split('&')[0]
                 elif url.startswith('/url?'):
                     # Альтернативный формат
-                    import urllib.parse
                     parsed = urllib.parse.parse_qs(urllib.parse.urlparse(url).query)
                     if 'q' in parsed:
                         url = parsed['q'][0]
@@ -210,18 +111,7 @@ class GoogleParser:
                 if 'google.com' in url or not url.startswith('http'):
                     continue
                 
-                # Описание
-                description_element = None
-                desc_selectors = ['.VwiC3b', '.s3v9rd', '.st', '.aCOpRe', '.snippet-content']
-                for selector in desc_selectors:
-                    try:
-                        description_element = result.select_one(selector)
-                        if description_element and description_element.get_text(strip=True):
-                            break
-                    except:
-                        continue
-                
-                description = description_element.get_text(strip=True) if description_element else ""
+                description = fields['description'] or ""
                 
                 # Домен
                 domain = self.extract_domain(url)
@@ -265,31 +155,29 @@ class GoogleParser:
                 'Cache-Control': 'max-age=0',
             }
             
-            # Добавляем случайную задержку
-            time.sleep(random.uniform(1, 3))
-            
-            response = self.session.get(url, headers=headers, timeout=Config.TIMEOUT)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Проверка на капчу
-            captcha_indicators = [
-                "captcha", "robot", "verify", "security check",
-                "sorry/index", "consent", "unusual traffic"
-            ]
-            
-            page_text = response.text.lower()
-            if any(indicator in page_text for indicator in captcha_indicators):
-                logger.warning("Обнаружена капча в Google")
-                return self.handle_captcha(keyword, page)
-            
-            # Проверка на блокировку
-            if "sorry/index" in response.url or "consent" in response.url:
-                logger.warning("Google требует согласие или блокирует запрос")
-                return []
+            # Прокси выбирается из пула на каждый запрос; капча и 429 ухудшают его оценку
+            with proxy_pool.lease() as proxy_lease:
+                response = self.session.get(
+                    url, headers=headers, timeout=Config.TIMEOUT, proxies=proxy_lease.proxies
+                )
+                if response.status_code == 429:
+                    logger.warning("Google ограничил частоту запросов (429)")
+                    proxy_lease.captcha()
+                    rate_limiter.throttled("google", retry_after_seconds(response.headers))
+                    return []
+                response.raise_for_status()
+                
+                # Капча снижает оценку прокси и частоту запросов, страница согласия - нет
+                if is_captcha_page(response.url, response.text):
+                    logger.warning("Обнаружена капча в Google")
+                    proxy_lease.captcha()
+                    return self.handle_captcha(keyword, page)
+                proxy_lease.ok()
+                if is_consent_page(response.url):
+                    logger.warning("Google требует согласие на использование cookies")
+                    return []
             
-            results = self.parse_organic_results(soup)
+            results = self.parse_organic_results(response.text)
             logger.info(f"Найдено {len(results)} результатов для '{keyword}'")
             
             return results
@@ -299,74 +187,94 @@ class GoogleParser:
             return []
 
     def parse_with_selenium(self, keyword, page=1):
-        """Парсинг с помощью Selenium + stealth"""
+        """Парсинг с помощью Selenium (браузер арендуется из общего пула)"""
         try:
-            if not self.driver:
-                self.setup_selenium()
-
-            if not self.driver:
-                logger.error("Не удалось создать WebDriver")
-                return []
+            with driver_pool.lease() as driver:
+                return self._parse_in_browser(driver, keyword, page)
+        except Exception as e:
+            logger.error(f"Ошибка при парсинге Google (Selenium): {e}")
+            return []
 
-            url = self.build_search_url(keyword, page)
-            logger.info(f"Парсинг Google (Selenium): {keyword}, страница {page}")
+    def _parse_in_browser(self, driver, keyword, page):
+        """Загрузка и разбор выдачи в арендованном браузере"""
+        url = self.build_search_url(keyword, page)
+        logger.info(f"Парсинг Google (Selenium): {keyword}, страница {page}")
+        lean = Config.SELENIUM_LEAN_MODE
 
-            # 1. Сначала загружаем целевую страницу
-            self.driver.get(url)
+        # 1. Сначала загружаем целевую страницу
+        if lean:
+            self.traffic.start(driver)
+        driver.get(url)
+        if lean:
+            wait_dom_ready(driver)
+        else:
             time.sleep(random.uniform(2, 4))
 
-            # 2. Проверяем наличие капчи
-            if "sorry/index" in self.driver.current_url or "consent" in self.driver.current_url:
-                logger.warning("Обнаружена страница согласия или капчи")
-                # Попробуем принять условия
-                try:
-                    accept_button = self.driver.find_element(By.XPATH, '//button/div[contains(text(), "Принять все")]')
-                    accept_button.click()
-                    time.sleep(random.uniform(2, 3))
-                except:
-                    return self.handle_captcha(keyword, page)
-
-            # 3. Ожидание загрузки результатов
+        # 2. Проверяем наличие капчи (редирект на /sorry/) и страницы согласия
+        if is_captcha_page(driver.current_url, None):
+            logger.warning("Обнаружена капча в Google")
+            proxy_pool.record(getattr(driver, 'proxy', None), 'captcha')
+            return self.handle_captcha(keyword, page)
+        if is_consent_page(driver.current_url):
+            logger.warning("Обнаружена страница согласия")
+            # Попробуем принять условия
             try:
-                WebDriverWait(self.driver, 15).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "div.MjjYud"))
-                )
-                logger.info("Результаты поиска загружены")
+                accept_button = driver.find_element(By.XPATH, '//button/div[contains(text(), "Принять все")]')
+                accept_button.click()
+                if lean:
+                    wait_dom_ready(driver)
+                else:
+                    time.sleep(random.uniform(2, 3))
             except:
-                logger.warning("Не удалось найти результаты поиска")
+                logger.warning("Не удалось принять условия на странице согласия")
                 return []
 
-            # 4. Прокрутка для имитации поведения пользователя
+        # 3. Ожидание загрузки результатов
+        try:
+            WebDriverWait(driver, 15).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "div.MjjYud"))
+            )
+            logger.info("Результаты поиска загружены")
+        except:
+            logger.warning("Не удалось найти результаты поиска")
+            return []
+
+        # 4. Прокрутка для имитации поведения пользователя (в облегченном режиме не нужна:
+        # органическая выдача целиком приходит в HTML)
+        if not lean:
             for _ in range(3):
-                self.driver.execute_script("window.scrollBy(0, 500)")
+                driver.execute_script("window.scrollBy(0, 500)")
                 time.sleep(random.uniform(0.5, 1.5))
 
             logger.info('Прокрутка страницы завершена')
 
-            # 5. Получение и парсинг HTML
-            html = self.driver.page_source
-            soup = BeautifulSoup(html, 'html.parser')
-
-            return self.parse_organic_results(soup)
-
-        except Exception as e:
-            logger.error(f"Ошибка при парсинге Google (Selenium): {e}")
-            return []
+        # 5. Получение и парсинг HTML
+        html = driver.page_source
+        if lean:
+            self.traffic.finish(driver, keyword)
+        proxy_pool.record(getattr(driver, 'proxy', None), 'ok')
+        return self.parse_organic_results(html)
     
     def handle_captcha(self, keyword, page):
         """Обработка капчи"""
+        rate_limiter.throttled("google")
         logger.warning("Требуется ручное решение капчи")
         # Здесь можно интегрировать 2captcha или другие сервисы
         return []
     
     def parse_keyword(self, keyword, page=1):
         """Основной метод парсинга ключевого слова"""
-        proxy_manager.random_delay()
+        # Паузу перед запросом задает ограничитель частоты (ускоряется без капчи, замедляется на капче и 429)
+        rate_limiter.acquire("google")
         
         if self.use_selenium:
-            return self.parse_with_selenium(keyword, page)
+            results = self.parse_with_selenium(keyword, page)
         else:
-            return self.parse_with_requests(keyword, page)
+            results = self.parse_with_requests(keyword, page)
+        
+        if results:
+            rate_limiter.success("google")
+        return results
 
     def check_ip(self):
         """Проверяет текущий IP-адрес через внешний API"""
@@ -395,9 +303,5 @@ class GoogleParser:
             return None
 
     def close(self):
-        """Закрыть браузер"""
-        if self.driver:
-            try:
-                self.driver.quit()
-            except:
-                pass 
\ No newline at end of file
+        """Браузеры принадлежат общему пулу и закрываются при выходе из процесса"""
+        pass
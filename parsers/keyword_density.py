@@ -0,0 +1,122 @@
+"""
+Плотность ключевых слов: один проход по тексту страницы на все ключевые запросы
+"""
+import re
+from functools import lru_cache
+from config import Config
+from parsers.phrase_matcher import PhraseMatcher
+
+_TOKEN_RE = re.compile(r'\w+')
+
+# Кыргызские буквы сводятся к русским: запросы и тексты пишут и так, и так
+_FOLD = str.maketrans({'ё': 'е', 'ң': 'н', 'ө': 'о', 'ү': 'у'})
+
+# Окончания русских существительных, прилагательных и глаголов (длинные проверяются первыми)
+_ENDINGS = sorted([
+    'иями', 'ами', 'ями', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'ите', 'ить', 'ать', 'ять',
+    'ой', 'ей', 'ий', 'ый', 'ая', 'яя', 'ое', 'ее', 'ую', 'юю', 'ом', 'ем', 'ах', 'ях',
+    'ов', 'ев', 'ам', 'ям', 'ия', 'ие', 'ию', 'ии',
+    'а', 'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь',
+], key=len, reverse=True)
+_MIN_STEM = 3
+
+# Служебные слова не считаются отдельными терминами, но остаются в фразах
+STOP_WORDS = frozenset({
+    'в', 'во', 'на', 'и', 'с', 'со', 'по', 'для', 'из', 'от', 'до', 'к', 'о', 'об', 'у', 'за',
+})
+
+
+@lru_cache(maxsize=100000)
+def normalize_word(word):
+    """Нормальная форма слова: нижний регистр, ё/ң/ө/ү, отсечение окончания"""
+    word = word.lower().translate(_FOLD)
+    for ending in _ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= _MIN_STEM:
+            return word[:-len(ending)]
+    return word
+
+
+def tokenize(text):
+    """Нормализованные слова текста"""
+    return [normalize_word(word) for word in _TOKEN_RE.findall(text)]
+
+
+class DensityEngine:
+    """Плотность всех ключевых запросов за один разбор текста.
+
+    Текст страницы один раз разбивается на нормализованные слова, а все
+    фразы запросов и их значимые слова считаются одним проходом автомата
+    Ахо-Корасик, построенного при создании движка.
+    """
+
+    def __init__(self, keywords=None):
+        self.keywords = list(dict.fromkeys(keywords if keywords is not None else Config.KEYWORDS))
+        self._phrases = {keyword: self._compile(keyword) for keyword in self.keywords}
+        self._matcher = self._build_matcher(self._phrases)
+        # Автоматы для запросов выдачи, которых нет в списке
+        self._extra = {}
+
+    @staticmethod
+    def _compile(keyword):
+        """Фраза запроса и ее значимые слова в нормальной форме"""
+        phrase = tuple(tokenize(keyword))
+        terms = tuple(dict.fromkeys(term for term in phrase if term not in STOP_WORDS))
+        return phrase, terms
+
+    @staticmethod
+    def _build_matcher(phrases):
+        """Автомат по фразам запросов и их отдельным словам"""
+        patterns = []
+        for phrase, terms in phrases.values():
+            patterns.append(phrase)
+            patterns.extend((term,) for term in terms)
+        return PhraseMatcher(patterns)
+
+    def _phrases_for(self, keyword):
+        """Фразы и автомат с учетом запроса выдачи"""
+        if not keyword or keyword in self._phrases:
+            return self._phrases, self._matcher
+        if keyword not in self._extra:
+            if len(self._extra) >= 256:
+                self._extra.clear()
+            phrases = {**self._phrases, keyword: self._compile(keyword)}
+            self._extra[keyword] = phrases, self._build_matcher(phrases)
+        return self._extra[keyword]
+
+    def score(self, text, keyword=None):
+        """Оценка страницы по всем запросам; keyword - запрос выдачи, по которому она найдена"""
+        phrases, matcher = self._phrases_for(keyword)
+        tokens = tokenize(text or '')
+        total = len(tokens)
+        counts = matcher.count(tokens)
+
+        scores = {}
+        for name, (phrase, terms) in phrases.items():
+            count = counts.get(phrase, 0)
+            found = [term for term in terms if counts.get((term,))]
+            scores[name] = {
+                'count': count,
+                'density': round(count / total * 100, 4) if total else 0.0,
+                'coverage': round(len(found) / len(terms), 4) if terms else 0.0,
+                'terms': {term: counts.get((term,), 0) for term in terms},
+            }
+
+        primary = scores.get(keyword, {})
+        return {
+            'total_words': total,
+            'keyword': keyword,
+            'keyword_count': primary.get('count', 0),
+            'keyword_density': primary.get('density', 0.0),
+            'scores': scores,
+        }
+
+    def matrix(self, pages):
+        """Матрица страница × запрос: {url: {запрос: плотность}} для {url: текст}"""
+        return {
+            url: {name: item['density'] for name, item in self.score(text)['scores'].items()}
+            for url, text in pages.items()
+        }
+
+
+# Движок по Config.KEYWORDS (в каждом процессе создается при импорте)
+density_engine = DensityEngine()
@@ -0,0 +1,270 @@
+"""
+Конвейер анализа страницы: однократный разбор DOM и подключаемые экстракторы
+"""
+import hashlib
+import re
+import time
+from urllib.parse import urljoin, urlparse
+from bs4 import BeautifulSoup, FeatureNotFound
+from loguru import logger
+from config import Config
+from parsers.keyword_density import density_engine
+
+
+def make_soup(html, parser=None):
+    """Разобрать HTML (lxml, если установлен, иначе html.parser)"""
+    try:
+        return BeautifulSoup(html, parser or Config.HTML_PARSER)
+    except FeatureNotFound:
+        return BeautifulSoup(html, 'html.parser')
+
+
+# Части HTML, не влияющие на результат анализа, но меняющиеся от загрузки к загрузке:
+# комментарии, тела скриптов и стилей (get_text их не учитывает), nonce и пробелы
+_VOLATILE_HTML = [
+    (re.compile(r'<!--.*?-->', re.S), ''),
+    (re.compile(r'(<(script|style)\b[^>]*>).*?(</\2\s*>)', re.S | re.I), r'\1\3'),
+    (re.compile(r'\snonce="[^"]*"', re.I), ''),
+    (re.compile(r'\s+'), ' '),
+]
+
+
+def content_hash(html):
+    """Хэш нормализованного HTML для обнаружения неизменившихся страниц"""
+    for pattern, replacement in _VOLATILE_HTML:
+        html = pattern.sub(replacement, html)
+    return hashlib.sha256(html.strip().encode('utf-8')).hexdigest()
+
+
+class PageDocument:
+    """Однократно разобранный HTML-документ, общий для всех экстракторов"""
+
+    def __init__(self, html, url, parser=None):
+        self.html = html
+        self.url = url
+        self.soup = make_soup(html, parser)
+        self._text = None
+
+    @property
+    def text(self):
+        """Текст страницы (get_text вызывается один раз на документ)"""
+        if self._text is None:
+            self._text = self.soup.get_text()
+        return self._text
+
+
+def extract_meta(doc, keyword=None):
+    """Экстрактор мета-данных: title, description, заголовки, изображения, ссылки"""
+    soup = doc.soup
+    url = doc.url
+
+    meta_data = {
+        'url': url,
+        'title': '',
+        'description': '',
+        'keywords': '',
+        'h1': [],
+        'h2': [],
+        'h3': [],
+        'images': [],
+        'links': [],
+        'word_count': 0
+    }
+
+    try:
+        # Title
+        title_tag = soup.find('title')
+        if title_tag:
+            meta_data['title'] = title_tag.get_text(strip=True)
+
+        # Meta description
+        meta_desc = soup.find('meta', attrs={'name': 'description'})
+        if meta_desc:
+            meta_data['description'] = meta_desc.get('content', '')
+
+        # Meta keywords
+        meta_keywords = soup.find('meta', attrs={'name': 'keywords'})
+        if meta_keywords:
+            meta_data['keywords'] = meta_keywords.get('content', '')
+
+        # Заголовки H1-H3
+        for i in range(1, 4):
+            headers = soup.find_all(f'h{i}')
+            meta_data[f'h{i}'] = [h.get_text(strip=True) for h in headers]
+
+        # Изображения
+        images = soup.find_all('img')
+        meta_data['images'] = [
+            {
+                'src': img.get('src', ''),
+                'alt': img.get('alt', ''),
+                'title': img.get('title', '')
+            }
+            for img in images if img.get('src')
+        ]
+
+        # Ссылки
+        links = soup.find_all('a', href=True)
+        meta_data['links'] = [
+            {
+                'href': urljoin(url, link.get('href')),
+                'text': link.get_text(strip=True),
+                'title': link.get('title', '')
+            }
+            for link in links
+        ]
+
+        # Подсчет слов
+        meta_data['word_count'] = len(doc.text.split())
+
+    except Exception as e:
+        logger.error(f"Ошибка при извлечении мета-данных: {e}")
+
+    return meta_data
+
+
+def keyword_density(doc, keyword=None, engine=None):
+    """Плотность запроса выдачи и всех Config.KEYWORDS по тексту документа"""
+    return (engine or density_engine).score(doc.text, keyword)
+
+
+def extract_keywords(doc, keyword=None):
+    """Экстрактор анализа ключевых слов"""
+    return {'keyword_analysis': keyword_density(doc, keyword)}
+
+
+def technical_seo(doc):
+    """Проверка технического SEO по документу"""
+    soup = doc.soup
+
+    technical_checks = {
+        'has_title': False,
+        'has_description': False,
+        'has_keywords': False,
+        'has_h1': False,
+        'has_images_with_alt': False,
+        'has_canonical': False,
+        'has_robots': False,
+        'has_schema': False,
+        'is_https': False,
+        'has_ssl': False
+    }
+
+    try:
+        # Проверка HTTPS
+        parsed_url = urlparse(doc.url)
+        technical_checks['is_https'] = parsed_url.scheme == 'https'
+
+        # Проверка мета-тегов
+        technical_checks['has_title'] = bool(soup.find('title'))
+        technical_checks['has_description'] = bool(soup.find('meta', attrs={'name': 'description'}))
+        technical_checks['has_keywords'] = bool(soup.find('meta', attrs={'name': 'keywords'}))
+        technical_checks['has_h1'] = bool(soup.find('h1'))
+        technical_checks['has_canonical'] = bool(soup.find('link', attrs={'rel': 'canonical'}))
+        technical_checks['has_robots'] = bool(soup.find('meta', attrs={'name': 'robots'}))
+
+        # Проверка изображений с alt
+        images = soup.find_all('img')
+        images_with_alt = [img for img in images if img.get('alt')]
+        technical_checks['has_images_with_alt'] = len(images_with_alt) > 0
+
+        # Проверка Schema.org разметки
+        schema_scripts = soup.find_all('script', type='application/ld+json')
+        technical_checks['has_schema'] = len(schema_scripts) > 0
+
+    except Exception as e:
+        logger.error(f"Ошибка при проверке технического SEO: {e}")
+
+    return technical_checks
+
+
+def extract_technical(doc, keyword=None):
+    """Экстрактор технического SEO"""
+    return {'technical_seo': technical_seo(doc)}
+
+
+class PagePipeline:
+    """Конвейер: один разбор документа, затем цепочка экстракторов с замером времени"""
+
+    def __init__(self, stages=None):
+        # Экстрактор получает (doc, keyword) и возвращает фрагмент результата
+        self.stages = list(stages) if stages is not None else [
+            ('meta', extract_meta),
+            ('keywords', extract_keywords),
+            ('technical', extract_technical),
+        ]
+        self.stats = {}
+
+    def register(self, name, extractor, before=None):
+        """Добавить экстрактор (в конец или перед указанным этапом)"""
+        self.unregister(name)
+        position = len(self.stages)
+        if before is not None:
+            names = [stage_name for stage_name, _ in self.stages]
+            if before in names:
+                position = names.index(before)
+        self.stages.insert(position, (name, extractor))
+
+    def unregister(self, name):
+        """Удалить экстрактор по имени"""
+        self.stages = [stage for stage in self.stages if stage[0] != name]
+
+    def _record(self, name, elapsed):
+        """Накопить время этапа"""
+        stage_stats = self.stats.setdefault(name, {'calls': 0, 'total': 0.0})
+        stage_stats['calls'] += 1
+        stage_stats['total'] += elapsed
+
+    def run(self, html, url, keyword=None):
+        """Разобрать документ один раз и прогнать все экстракторы"""
+        timings = {}
+
+        started = time.perf_counter()
+        doc = html if isinstance(html, PageDocument) else PageDocument(html, url)
+        timings['parse'] = time.perf_counter() - started
+        self._record('parse', timings['parse'])
+
+        result = {}
+        for name, extractor in self.stages:
+            started = time.perf_counter()
+            try:
+                fragment = extractor(doc, keyword)
+                if fragment:
+                    result.update(fragment)
+            except Exception as e:
+                logger.error(f"Ошибка экстрактора {name} для {url}: {e}")
+            timings[name] = time.perf_counter() - started
+            self._record(name, timings[name])
+
+        result['timings'] = timings
+        return result
+
+    def merge_timings(self, timings):
+        """Учесть замеры этапов, сделанные в другом процессе (result['timings'])"""
+        for name, elapsed in timings.items():
+            self._record(name, elapsed)
+
+    def timing_report(self):
+        """Сводка времени по этапам: всего, среднее и доля"""
+        total = sum(stage['total'] for stage in self.stats.values())
+        report = {}
+        for name, stage in self.stats.items():
+            report[name] = {
+                'calls': stage['calls'],
+                'total': stage['total'],
+                'avg': stage['total'] / stage['calls'] if stage['calls'] else 0.0,
+                'share': (stage['total'] / total) * 100 if total else 0.0
+            }
+        return report
+
+    def log_timing_report(self):
+        """Вывести сводку времени по этапам в лог"""
+        for name, stage in self.timing_report().items():
+            logger.info(
+                f"Этап {name}: {stage['calls']} вызовов, {stage['total']:.3f} с "
+                f"(в среднем {stage['avg'] * 1000:.1f} мс, {stage['share']:.1f}%)"
+            )
+
+    def reset_stats(self):
+        """Сбросить накопленную статистику"""
+        self.stats = {}
@@ -0,0 +1,68 @@
+"""
+Поиск множества фраз за один проход (автомат Ахо-Корасик по словам)
+"""
+from collections import Counter
+
+
+class PhraseMatcher:
+    """Автомат Ахо-Корасик над последовательностями слов.
+
+    Строится один раз на набор фраз (кортежей нормализованных слов) и
+    считает вхождения всех фраз, включая перекрывающиеся, за один линейный
+    проход по словам текста - независимо от числа фраз.
+    """
+
+    def __init__(self, phrases):
+        self.phrases = list(dict.fromkeys(tuple(phrase) for phrase in phrases if phrase))
+        # Узел автомата: переходы по слову, ссылка неудачи, номера фраз, оканчивающихся в узле
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        for index, phrase in enumerate(self.phrases):
+            self._add(index, phrase)
+        self._link()
+        self.vocabulary = frozenset(word for phrase in self.phrases for word in phrase)
+
+    def _add(self, index, phrase):
+        """Добавить фразу в бор"""
+        node = 0
+        for word in phrase:
+            next_node = self._goto[node].get(word)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][word] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            node = next_node
+        self._out[node] += (index,)
+
+    def _link(self):
+        """Ссылки неудачи обходом в ширину; выходы наследуются по ссылкам"""
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for word, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and word not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(word, 0)
+                self._out[child] += self._out[self._fail[child]]
+                queue.append(child)
+
+    def count(self, words):
+        """Число вхождений каждой фразы: {фраза: количество} (только найденные)"""
+        goto, fail, out = self._goto, self._fail, self._out
+        vocabulary = self.vocabulary
+        hits = Counter()
+        node = 0
+        for word in words:
+            if word not in vocabulary:
+                # Слово не входит ни в одну фразу - автомат возвращается в корень
+                node = 0
+                continue
+            while node and word not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(word, 0)
+            if out[node]:
+                hits.update(out[node])
+        return {self.phrases[index]: count for index, count in hits.items()}
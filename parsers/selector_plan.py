@@ -0,0 +1,175 @@
+"""
+Скомпилированный план извлечения результатов выдачи по CSS-селекторам (lxml)
+"""
+from collections import Counter
+from cssselect import HTMLTranslator, parse
+from cssselect.parser import CombinedSelector
+from lxml import etree, html as lxml_html
+from loguru import logger
+
+_translator = HTMLTranslator()
+
+# Видимый текст элемента (как get_text(strip=True) в BeautifulSoup)
+_TEXT = etree.XPath('.//text()[not(ancestor::script or ancestor::style)]')
+
+
+def _self_test(tree):
+    """XPath-условие «элемент соответствует селектору» для проверки уже найденного узла"""
+    if isinstance(tree, CombinedSelector):
+        axes = {' ': 'ancestor', '>': 'parent'}
+        if tree.combinator not in axes:
+            raise ValueError(f"Комбинатор '{tree.combinator}' не поддерживается")
+        return f"{_self_test(tree.subselector)}[{axes[tree.combinator]}::*[{_self_test(tree.selector)}]]"
+    expr = _translator.xpath(tree)
+    return f"self::{expr.element}" + (f"[{expr.condition}]" if expr.condition else "")
+
+
+def compile_selector(css):
+    """Скомпилированная проверка соответствия узла CSS-селектору"""
+    (selector,) = parse(css)
+    return etree.XPath(f"boolean({_self_test(selector.parsed_tree)})")
+
+
+def selector_xpath(css, prefix='descendant::'):
+    """XPath поиска по CSS-селектору"""
+    return _translator.css_to_xpath(css, prefix=prefix)
+
+
+def parse_html(page):
+    """Дерево lxml из HTML (строка, байты или BeautifulSoup)"""
+    if not isinstance(page, (str, bytes)):
+        page = str(page)
+    try:
+        return lxml_html.fromstring(page)
+    except ValueError:
+        # Строка с объявлением кодировки XML - разбираем как байты
+        return lxml_html.fromstring(page.encode('utf-8'))
+
+
+def element_text(element):
+    """Текст элемента без пробелов по краям строк"""
+    return ''.join(text.strip() for text in _TEXT(element))
+
+
+class SelectorPlan:
+    """План извлечения: селекторы объявляются и компилируются один раз.
+
+    containers - селекторы блоков результатов по приоритету; fallback - пара
+    (селектор блока, обязательный вложенный элемент) на случай, если ни один
+    из них не нашел блоков; fields - {поле: [селекторы]} или
+    {поле: ([селекторы], атрибут)}. Блоки и поля каждого блока находятся одним
+    XPath-запросом по объединению селекторов (обход дерева выполняет lxml),
+    затем узлы распределяются по селекторам. Для каждой группы считается,
+    какой селектор сработал (hit_report). Порядок селекторов - приоритет
+    (срабатывает первый), поэтому reorder вызывается только вручную.
+    """
+
+    def __init__(self, containers, fields, fallback=None):
+        self.containers = list(containers)
+        self.fields = {}
+        self.field_attrs = {}
+        for name, spec in fields.items():
+            selectors, attr = spec if isinstance(spec, tuple) else (spec, None)
+            self.fields[name] = list(selectors)
+            self.field_attrs[name] = attr
+        self._field_selectors = list(dict.fromkeys(s for group in self.fields.values() for s in group))
+
+        self._tests = {
+            selector: compile_selector(selector)
+            for selector in self.containers + self._field_selectors
+        }
+        self._containers_union = etree.XPath(' | '.join(
+            selector_xpath(selector, prefix='descendant-or-self::') for selector in self.containers
+        ))
+        self._fields_union = etree.XPath(
+            ' | '.join(selector_xpath(selector) for selector in self._field_selectors)
+        )
+
+        self.fallback = None
+        self._fallback = None
+        if fallback:
+            block, required = fallback
+            self.fallback = f"{block}:has({required})"
+            self._fallback = etree.XPath(
+                f"{selector_xpath(block, prefix='descendant-or-self::')}[{selector_xpath(required)}]"
+            )
+
+        self.hits = {'containers': Counter()}
+        self.hits.update({name: Counter() for name in self.fields})
+
+    def find_containers(self, root):
+        """Блоки результатов первого по приоритету селектора, который что-то нашел"""
+        buckets = {selector: [] for selector in self.containers}
+        for element in self._containers_union(root):
+            for selector in self.containers:
+                if self._tests[selector](element):
+                    buckets[selector].append(element)
+
+        for selector in self.containers:
+            if buckets[selector]:
+                self.hits['containers'][selector] += 1
+                logger.info(f"Найдены результаты с селектором: {selector}")
+                return buckets[selector]
+
+        if self._fallback is not None:
+            self.hits['containers'][self.fallback] += 1
+            logger.info("Используем fallback селектор")
+            return self._fallback(root)
+        return []
+
+    def _value(self, element, attr):
+        """Значение поля: атрибут или текст элемента"""
+        if attr:
+            return element.get(attr, '')
+        return element_text(element)
+
+    def extract_fields(self, container):
+        """Значения полей блока.
+
+        Для каждого поля селекторы проверяются по приоритету: берется первый
+        элемент селектора, пустое значение передает ход следующему селектору.
+        """
+        pending = list(self._field_selectors)
+        first_matches = {}
+        for element in self._fields_union(container):
+            for selector in pending:
+                if self._tests[selector](element):
+                    first_matches[selector] = element
+            pending = [selector for selector in pending if selector not in first_matches]
+            if not pending:
+                break
+
+        values = {}
+        for name, selectors in self.fields.items():
+            values[name] = None
+            for selector in selectors:
+                element = first_matches.get(selector)
+                if element is None:
+                    continue
+                value = self._value(element, self.field_attrs[name])
+                if value:
+                    values[name] = value
+                    self.hits[name][selector] += 1
+                    break
+        return values
+
+    def reorder(self):
+        """Переупорядочить селекторы каждой группы по частоте попаданий"""
+        self.containers.sort(key=lambda selector: -self.hits['containers'][selector])
+        for name, selectors in self.fields.items():
+            selectors.sort(key=lambda selector: -self.hits[name][selector])
+
+    def hit_report(self):
+        """Частота попаданий селекторов: {группа: {селектор: число}}"""
+        report = {'containers': {s: self.hits['containers'][s] for s in self.containers}}
+        if self.fallback:
+            report['containers'][self.fallback] = self.hits['containers'][self.fallback]
+        for name, selectors in self.fields.items():
+            report[name] = {selector: self.hits[name][selector] for selector in selectors}
+        return report
+
+    def log_hit_report(self):
+        """Вывести частоту попаданий селекторов в лог"""
+        for group, selectors in self.hit_report().items():
+            used = ', '.join(f"{selector}: {count}" for selector, count in selectors.items() if count)
+            logger.info(f"Селекторы {group}: {used or 'нет попаданий'}")
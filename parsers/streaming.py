@@ -0,0 +1,57 @@
+"""
+Потоковое чтение тела страницы с ограничением размера
+"""
+import codecs
+from config import Config
+
+# Типы содержимого, которые имеет смысл разбирать как HTML
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+
+
+def is_html_content_type(content_type):
+    """Подходит ли Content-Type для анализа (без заголовка считаем страницу HTML)"""
+    if not content_type:
+        return True
+    return content_type.split(';', 1)[0].strip().lower() in HTML_CONTENT_TYPES
+
+
+class BoundedBody:
+    """Тело ответа, читаемое по частям: не больше max_bytes, декодируется по мере чтения"""
+
+    def __init__(self, encoding=None, max_bytes=None):
+        self.encoding = encoding or 'utf-8'
+        self.max_bytes = Config.MAX_PAGE_BYTES if max_bytes is None else max_bytes
+        self.size = 0
+        self.truncated = False
+        self._chunks = []
+        self._parts = []
+        try:
+            self._decoder = codecs.getincrementaldecoder(self.encoding)(errors='replace')
+        except LookupError:
+            self.encoding = 'utf-8'
+            self._decoder = codecs.getincrementaldecoder(self.encoding)(errors='replace')
+
+    def feed(self, chunk):
+        """Добавить часть тела; False - лимит достигнут, дальше читать не нужно"""
+        if self.truncated:
+            return False
+        if self.max_bytes and self.size + len(chunk) > self.max_bytes:
+            chunk = chunk[:self.max_bytes - self.size]
+            self.truncated = True
+        self.size += len(chunk)
+        self._chunks.append(chunk)
+        self._parts.append(self._decoder.decode(chunk))
+        return not self.truncated
+
+    @property
+    def content(self):
+        """Прочитанные байты"""
+        return b''.join(self._chunks)
+
+    @property
+    def text(self):
+        """Декодированный текст (незавершенный символ в конце заменяется)"""
+        if self._decoder is not None:
+            self._parts.append(self._decoder.decode(b'', final=True))
+            self._decoder = None
+        return ''.join(self._parts)
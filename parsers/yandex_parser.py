@@ -1,39 +1,36 @@
 """
 Парсер Яндекса с региональными настройками Бишкека
 """
+import re
 import urllib.parse
 from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from loguru import logger
 from config import Config
 from utils.proxy_manager import proxy_manager
+from utils.proxy_pool import proxy_pool
+from utils.driver_pool import driver_pool
+from utils.rate_limiter import rate_limiter, retry_after_seconds
+from utils.lean_browser import TrafficMeter
+
+# Капча Яндекса: редирект на /showcaptcha и форма проверки (слово "robot" в выдаче - не признак)
+CAPTCHA_FORM = re.compile(r'action="[^"]*/checkcaptcha|class="[^"]*CheckboxCaptcha', re.I)
+
+
+def is_captcha_page(url, html):
+    """Капча Яндекса по явным признакам: адрес /showcaptcha или форма капчи"""
+    path = urllib.parse.urlparse(url).path
+    return path.startswith(('/showcaptcha', '/checkcaptcha')) or bool(CAPTCHA_FORM.search(html or ''))
 
 class YandexParser:
     """Парсер результатов поиска Яндекса"""
     
     def __init__(self, use_selenium=False):
         self.use_selenium = use_selenium
-        self.driver = None
         self.session = proxy_manager.get_session()
-        
-    def setup_selenium(self):
-        """Настройка Selenium WebDriver"""
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument(f"--user-agent={proxy_manager.get_random_user_agent()}")
-        
-        if Config.USE_PROXY and Config.PROXY_LIST:
-            proxy = proxy_manager.get_proxy()
-            if proxy:
-                chrome_options.add_argument(f"--proxy-server={proxy}")
-        
-        self.driver = webdriver.Chrome(options=chrome_options)
+        self.traffic = TrafficMeter("yandex")
         
     def build_search_url(self, keyword, page=1):
         """Построить URL для поиска в Яндексе"""
@@ -44,7 +41,7 @@ class YandexParser:
             'numdoc': Config.MAX_RESULTS
         }
         
-        base_url = "https://yandex.ru/search"
+        base_url = Config.YANDEX_SEARCH_URL
         query_string = urllib.parse.urlencode(params)
         return f"{base_url}?{query_string}"
     
@@ -103,16 +100,24 @@ class YandexParser:
             url = self.build_search_url(keyword, page)
             logger.info(f"Парсинг Яндекса: {keyword}, страница {page}")
             
-            response = self.session.get(url, timeout=Config.TIMEOUT)
-            response.raise_for_status()
+            # Прокси выбирается из пула на каждый запрос; капча и 429 ухудшают его оценку
+            with proxy_pool.lease() as proxy_lease:
+                response = self.session.get(url, timeout=Config.TIMEOUT, proxies=proxy_lease.proxies)
+                if response.status_code == 429:
+                    logger.warning("Яндекс ограничил частоту запросов (429)")
+                    proxy_lease.captcha()
+                    rate_limiter.throttled("yandex", retry_after_seconds(response.headers))
+                    return []
+                response.raise_for_status()
+                
+                # Проверка на капчу
+                if is_captcha_page(response.url, response.text):
+                    logger.warning("Обнаружена капча в Яндексе")
+                    proxy_lease.captcha()
+                    return self.handle_captcha(keyword, page)
             
             soup = BeautifulSoup(response.content, 'html.parser')
             
-            # Проверка на капчу
-            if "captcha" in response.text.lower() or "robot" in response.text.lower():
-                logger.warning("Обнаружена капча в Яндексе")
-                return self.handle_captcha(keyword, page)
-            
             results = self.parse_organic_results(soup)
             logger.info(f"Найдено {len(results)} результатов в Яндексе для '{keyword}'")
             
@@ -123,23 +128,26 @@ class YandexParser:
             return []
     
     def parse_with_selenium(self, keyword, page=1):
-        """Парсинг с помощью Selenium"""
+        """Парсинг с помощью Selenium (браузер арендуется из общего пула)"""
         try:
-            if not self.driver:
-                self.setup_selenium()
-            
             url = self.build_search_url(keyword, page)
             logger.info(f"Парсинг Яндекса (Selenium): {keyword}, страница {page}")
             
-            self.driver.get(url)
-            
-            # Ждем загрузки результатов
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "serp-item"))
-            )
-            
-            # Получаем HTML
-            html = self.driver.page_source
+            with driver_pool.lease() as driver:
+                if Config.SELENIUM_LEAN_MODE:
+                    self.traffic.start(driver)
+                driver.get(url)
+                
+                # Ждем загрузки результатов
+                WebDriverWait(driver, 10).until(
+                    EC.presence_of_element_located((By.CLASS_NAME, "serp-item"))
+                )
+                
+                # Получаем HTML
+                html = driver.page_source
+                if Config.SELENIUM_LEAN_MODE:
+                    self.traffic.finish(driver, keyword)
+                proxy_pool.record(getattr(driver, 'proxy', None), 'ok')
             soup = BeautifulSoup(html, 'html.parser')
             
             results = self.parse_organic_results(soup)
@@ -153,20 +161,25 @@ class YandexParser:
     
     def handle_captcha(self, keyword, page):
         """Обработка капчи"""
+        rate_limiter.throttled("yandex")
         logger.warning("Требуется ручное решение капчи в Яндексе")
         # Здесь можно интегрировать 2captcha или другие сервисы
         return []
     
     def parse_keyword(self, keyword, page=1):
         """Основной метод парсинга ключевого слова"""
-        proxy_manager.random_delay()
+        # Паузу перед запросом задает ограничитель частоты (ускоряется без капчи, замедляется на капче и 429)
+        rate_limiter.acquire("yandex")
         
         if self.use_selenium:
-            return self.parse_with_selenium(keyword, page)
+            results = self.parse_with_selenium(keyword, page)
         else:
-            return self.parse_with_requests(keyword, page)
+            results = self.parse_with_requests(keyword, page)
+        
+        if results:
+            rate_limiter.success("yandex")
+        return results
     
     def close(self):
-        """Закрыть браузер"""
-        if self.driver:
-            self.driver.quit() 
\ No newline at end of file
+        """Браузеры принадлежат общему пулу и закрываются при выходе из процесса"""
+        pass
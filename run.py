@@ -104,6 +104,24 @@ def init_database():
     db_manager.init_database()
     logger.info("База данных инициализирована")
 
+def migrate_database():
+    """Применение миграций схемы БД"""
+    from database import db_manager
+    from database.migrations import apply_migrations, current_version
+    
+    logger.info("Применение миграций")
+    apply_migrations(db_manager.engine)
+    logger.info(f"Версия схемы: {current_version(db_manager.engine)}")
+
+def check_indexes():
+    """Проверка планов запросов дашборда"""
+    from database import db_manager
+    
+    logger.info("Проверка использования индексов")
+    report = db_manager.check_query_plans()
+    if not report or not all(check['uses_index'] for check in report.values()):
+        sys.exit(1)
+
 def main():
     """Основная функция"""
     parser = argparse.ArgumentParser(
@@ -118,12 +136,15 @@ def main():
   python run.py scheduler    # Запуск планировщика
   python run.py manual       # Ручной анализ
   python run.py init-db      # Инициализация БД
+  python run.py migrate      # Миграции схемы БД
+  python run.py check-indexes # Проверка индексов (EXPLAIN)
         """
     )
     
     parser.add_argument(
         "command",
-        choices=["analysis", "dashboard", "test", "simple-test", "scheduler", "manual", "init-db"],
+        choices=["analysis", "dashboard", "test", "simple-test", "scheduler", "manual", "init-db",
+                 "migrate", "check-indexes"],
         help="Команда для выполнения"
     )
     
@@ -155,6 +176,10 @@ def main():
         run_manual()
     elif args.command == "init-db":
         init_database()
+    elif args.command == "migrate":
+        migrate_database()
+    elif args.command == "check-indexes":
+        check_indexes()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -16,16 +16,13 @@ def run_daily_analysis():
     
     try:
         # Создание анализатора
-        analyzer = SEOAnalyzer(use_selenium=False, parse_pages=True)
+        analyzer = SEOAnalyzer()
         
-        # Анализ ключевых слов
-        analyzer.analyze_keywords_batch()
-        
-        # Анализ конкурентов
+        # Анализ выдачи по всем ключевым словам и мета-данных страниц конкурентов
         analyzer.analyze_competitors()
         
         # Экспорт результатов
-        analyzer.export_results()
+        analyzer.export_results(days=1)
         
         # Генерация отчета
         analyzer.generate_report()
@@ -45,17 +42,14 @@ def run_weekly_analysis():
     logger.info("Запуск еженедельного SEO-анализа")
     
     try:
-        # Создание анализатора с Selenium для более детального анализа
-        analyzer = SEOAnalyzer(use_selenium=True, parse_pages=True)
-        
-        # Расширенный анализ ключевых слов
-        analyzer.analyze_keywords_batch()
+        # Создание анализатора (Selenium включается через USE_SELENIUM)
+        analyzer = SEOAnalyzer()
         
-        # Детальный анализ конкурентов
-        competitors = analyzer.analyze_competitors(limit=50)
+        # Анализ выдачи по всем ключевым словам и мета-данных страниц конкурентов
+        analyzer.analyze_competitors()
         
         # Экспорт расширенных результатов
-        analyzer.export_results(f"weekly_analysis_{datetime.now().strftime('%Y%m%d')}.csv")
+        analyzer.export_results(f"weekly_analysis_{datetime.now().strftime('%Y%m%d')}.csv", days=7)
         
         # Генерация еженедельного отчета
         analyzer.generate_report()
@@ -76,16 +70,13 @@ def run_monthly_analysis():
     
     try:
         # Создание анализатора
-        analyzer = SEOAnalyzer(use_selenium=True, parse_pages=True)
-        
-        # Полный анализ всех ключевых слов
-        analyzer.analyze_keywords_batch()
+        analyzer = SEOAnalyzer()
         
-        # Полный анализ конкурентов
-        competitors = analyzer.analyze_competitors(limit=100)
+        # Полный анализ выдачи и мета-данных страниц конкурентов
+        analyzer.analyze_competitors()
         
         # Экспорт полных результатов
-        analyzer.export_results(f"monthly_analysis_{datetime.now().strftime('%Y%m')}.csv")
+        analyzer.export_results(f"monthly_analysis_{datetime.now().strftime('%Y%m')}.csv", days=30)
         
         # Генерация ежемесячного отчета
         analyzer.generate_report()
@@ -100,11 +91,38 @@ def run_monthly_analysis():
         except:
             pass
 
+def run_partition_maintenance():
+    """Обслуживание секций БД: новые месяцы и срок хранения"""
+    logger.info("Обслуживание секций БД")
+    
+    try:
+        from database import db_manager
+        db_manager.maintain_partitions()
+    except Exception as e:
+        logger.error(f"Ошибка обслуживания секций: {e}")
+
+def run_history_snapshot():
+    """Дописать новые результаты выдачи в колоночный снимок для аналитики"""
+    logger.info("Обновление снимка истории выдачи")
+    
+    try:
+        from analytics import build_snapshot
+        from database import db_manager
+        build_snapshot(db_manager.engine)
+    except Exception as e:
+        logger.error(f"Ошибка обновления снимка истории: {e}")
+
 def setup_scheduler():
     """Настройка расписания"""
+    # Обслуживание секций БД в 00:30
+    schedule.every().day.at("00:30").do(run_partition_maintenance)
+    
     # Ежедневный анализ в 9:00
     schedule.every().day.at("09:00").do(run_daily_analysis)
     
+    # Снимок истории выдачи после ежедневного анализа в 12:00
+    schedule.every().day.at("12:00").do(run_history_snapshot)
+    
     # Еженедельный анализ по воскресеньям в 10:00
     schedule.every().sunday.at("10:00").do(run_weekly_analysis)
     
@@ -112,7 +130,9 @@ def setup_scheduler():
     schedule.every().month.at("11:00").do(run_monthly_analysis)
     
     logger.info("Планировщик настроен:")
+    logger.info("- Обслуживание секций БД: 00:30")
     logger.info("- Ежедневный анализ: 09:00")
+    logger.info("- Снимок истории выдачи: 12:00")
     logger.info("- Еженедельный анализ: воскресенье 10:00")
     logger.info("- Ежемесячный анализ: первое число месяца 11:00")
 
@@ -137,16 +157,13 @@ def run_manual_analysis():
     logger.info("Ручной запуск SEO-анализа")
     
     try:
-        analyzer = SEOAnalyzer(use_selenium=False, parse_pages=True)
+        analyzer = SEOAnalyzer()
         
         # Анализ только части ключевых слов для быстрого теста
         test_keywords = Config.KEYWORDS[:3]  # Первые 3 ключевых слова
         
-        for keyword in test_keywords:
-            analyzer.analyze_keyword(keyword, ['google'])
-        
-        analyzer.analyze_competitors(limit=10)
-        analyzer.export_results("manual_test.csv")
+        analyzer.analyze_competitors(test_keywords)
+        analyzer.export_results("manual_test.csv", days=1)
         
         logger.info("Ручной анализ завершен")
         
@@ -173,6 +190,10 @@ if __name__ == "__main__":
             run_manual_analysis()
         elif command == "scheduler":
             run_scheduler()
+        elif command == "partitions":
+            run_partition_maintenance()
+        elif command == "snapshot":
+            run_history_snapshot()
         else:
             print("Доступные команды:")
             print("  daily    - Ежедневный анализ")
@@ -180,6 +201,8 @@ if __name__ == "__main__":
             print("  monthly  - Ежемесячный анализ")
             print("  manual   - Ручной анализ (тест)")
             print("  scheduler - Запуск планировщика")
+            print("  partitions - Обслуживание секций БД")
+            print("  snapshot - Обновление снимка истории выдачи")
     else:
         # По умолчанию запускаем планировщик
         run_scheduler() 
\ No newline at end of file
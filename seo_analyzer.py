@@ -1,10 +1,9 @@
 """
 Основной модуль для SEO-анализа конкурентов в Кыргызстане
 """
+import asyncio
 import os
-import time
-import random
-from datetime import datetime
+from datetime import datetime, timedelta
 from tqdm import tqdm
 from loguru import logger
 from config import Config
@@ -12,27 +11,35 @@ from parsers.google_parser import GoogleParser
 from parsers.yandex_parser import YandexParser
 from parsers.page_parser import PageParser
 from parsers.alternative_parser import AlternativeParser
-from database.manager import DatabaseManager
-from utils.proxy_manager import proxy_manager
+from parsers.async_fetcher import AsyncPageFetcher
+from parsers.analysis_stage import AnalysisStage
+from database.manager import db_manager
+from utils.engine_scheduler import EngineScheduler
+from utils.proxy_pool import proxy_pool
+from utils.rate_limiter import rate_limiter
 
 
 class SEOAnalyzer:
     """Основной класс для SEO-анализа конкурентов"""
     
     def __init__(self):
-        self.db_manager = DatabaseManager()
+        # Общий менеджер БД: пул соединений переиспользуется между запусками
+        self.db_manager = db_manager
         self.google_parser = GoogleParser(use_selenium=Config.USE_SELENIUM)
         self.yandex_parser = YandexParser()
         self.page_parser = PageParser()
         self.alternative_parser = AlternativeParser()
+        self.page_fetcher = AsyncPageFetcher()
+        self.analysis_stage = AnalysisStage()
+        self.engine_scheduler = EngineScheduler()
+        self.metadata_stats = {'analyzed': 0, 'skipped': 0, 'failed': 0}
+        # Фоновая проверка прокси (без настроенных прокси ничего не делает)
+        proxy_pool.start_health_checks()
         
     def analyze_keyword(self, keyword, search_engine="google"):
-        """Анализ одного ключевого слова"""
+        """Анализ одного ключевого слова (паузы между запросами задает ограничитель частоты в парсерах)"""
         logger.info(f"Анализ '{keyword}' в {search_engine}")
         
-        # Случайная задержка
-        proxy_manager.random_delay()
-        
         results = []
         
         if search_engine == "google":
@@ -51,7 +58,8 @@ class SEOAnalyzer:
         
         # Сохраняем результаты
         if results:
-            self.db_manager.save_search_results(keyword, search_engine, results)
+            region = Config.GOOGLE_REGION if search_engine == "google" else Config.YANDEX_REGION
+            self.db_manager.save_search_results(keyword, search_engine, region, results)
         
         return results
     
@@ -70,56 +78,121 @@ class SEOAnalyzer:
             keywords = Config.KEYWORDS
         
         logger.info("Анализ топ-конкурентов")
+        # Результаты поиска этого запуска - сохраненные после его начала
+        started_at = datetime.utcnow()
         
-        all_results = {}
+        # Google и Yandex опрашиваются параллельно, у каждого своя очередь и лимит частоты
+        engine_results = self.engine_scheduler.run(keywords, {
+            "google": lambda keyword: self.analyze_keyword(keyword, "google"),
+            "yandex": lambda keyword: self.analyze_keyword(keyword, "yandex"),
+        })
+        rate_limiter.log_stats(["google", "yandex"])
+        proxy_pool.log_stats()
         
+        all_results = {}
         for keyword in keywords:
-            logger.info(f"Обработка ключевого слова: {keyword}")
-            
-            # Анализ в Google
-            google_results = self.analyze_keyword(keyword, "google")
-            if google_results:
-                all_results[f"{keyword}_google"] = google_results
-            
-            # Небольшая пауза между запросами
-            time.sleep(random.uniform(1, 3))
-            
-            # Анализ в Yandex
-            yandex_results = self.analyze_keyword(keyword, "yandex")
-            if yandex_results:
-                all_results[f"{keyword}_yandex"] = yandex_results
-            
-            # Пауза между ключевыми словами
-            time.sleep(random.uniform(2, 5))
+            for search_engine, results_by_keyword in engine_results.items():
+                if results_by_keyword.get(keyword):
+                    all_results[f"{keyword}_{search_engine}"] = results_by_keyword[keyword]
+        
+        # Какие селекторы Google сработали; порядок селекторов не меняется (срабатывает первый)
+        self.google_parser.selector_plan.log_hit_report()
+        
+        # Трафик загрузки выдачи браузером (облегченный режим Selenium)
+        self.google_parser.traffic.log_totals()
+        self.yandex_parser.traffic.log_totals()
         
         # Анализ мета-данных для найденных страниц
-        self.analyze_all_metadata(all_results)
+        self.analyze_all_metadata(all_results, since=started_at)
         
         return all_results
     
-    def analyze_all_metadata(self, all_results):
-        """Анализ мета-данных для всех найденных страниц"""
+    def analyze_all_metadata(self, all_results, since=None):
+        """Анализ мета-данных для всех найденных страниц.
+
+        Мета-данные привязываются ко всем результатам поиска с URL страницы,
+        сохраненным начиная с since; без since - к последнему результату.
+        """
         logger.info("Анализ мета-данных страниц")
         
-        processed_urls = set()
-        
-        for keyword_results in all_results.values():
+        # Уникальные URL в порядке появления в выдаче и запрос, по которому URL найден впервые
+        url_keywords = {}
+        for key, keyword_results in all_results.items():
+            keyword = key.rsplit('_', 1)[0]
             for result in keyword_results:
                 url = result.get('url')
-                if url and url not in processed_urls:
-                    try:
-                        metadata = self.analyze_page_metadata(url)
-                        if metadata:
-                            # Сохраняем мета-данные
-                            self.db_manager.save_page_metadata(url, metadata)
-                            processed_urls.add(url)
-                        
-                        # Небольшая пауза между запросами страниц
-                        time.sleep(random.uniform(0.5, 1.5))
-                        
-                    except Exception as e:
-                        logger.error(f"Ошибка при анализе {url}: {e}")
-                        continue
+                if url and url not in url_keywords:
+                    url_keywords[url] = keyword
+        urls = list(url_keywords)
+        
+        # Статистика этапов, кэша и загрузки - только за этот запуск
+        self.page_parser.pipeline.reset_stats()
+        if self.page_parser.cache:
+            self.page_parser.cache.reset_stats()
+        
+        # Хэши прошлого анализа: неизменившиеся страницы не разбираются заново
+        known_hashes = self.db_manager.get_page_hashes(urls) if Config.INCREMENTAL_ANALYSIS else {}
+        self.metadata_stats = {'analyzed': 0, 'skipped': 0, 'failed': 0}
+        
+        analyzed = []
+        unchanged = []
+        
+        def collect(status, url, metadata, page_hash):
+            """Итог анализа страницы из пула процессов"""
+            if status == 'analyzed':
+                analyzed.append((url, metadata, page_hash))
+                self.metadata_stats['analyzed'] += 1
+                self.page_parser.pipeline.merge_timings(metadata.get('timings', {}))
+                logger.info(f"Успешно проанализирована страница: {url}")
+            elif status == 'skipped':
+                unchanged.append(url)
+                self.metadata_stats['skipped'] += 1
+            else:
+                self.metadata_stats['failed'] += 1
+                if metadata:
+                    logger.error(f"Ошибка при анализе {url}: {metadata}")
+        
+        # Загрузка и разбор идут одновременно: страницы уходят в пул процессов по мере загрузки
+        asyncio.run(self.analysis_stage.run_async(
+            self._iter_pages(urls), known_hashes, collect, keywords=url_keywords
+        ))
+        
+        # Мета-данные всех страниц сохраняются одной пачкой
+        self.db_manager.save_page_metadata_batch(analyzed, since=since)
+        # Новые результаты поиска неизменившихся страниц получают копию прошлого анализа
+        self.db_manager.copy_page_metadata_batch(unchanged, since=since)
+        logger.info(
+            f"Страниц проанализировано: {self.metadata_stats['analyzed']}, "
+            f"без изменений (пропущено): {self.metadata_stats['skipped']}, "
+            f"ошибок: {self.metadata_stats['failed']}"
+        )
+        
+        # Разбивка времени анализа страниц по этапам
+        self.page_parser.pipeline.log_timing_report()
+        if self.page_parser.cache:
+            self.page_parser.cache.log_stats()
+    
+    async def _iter_pages(self, urls):
+        """Загруженные страницы (url, html) по мере готовности"""
+        if Config.USE_ASYNC_FETCH:
+            # Разные домены загружаются параллельно, один домен - с паузами
+            self.page_fetcher.reset_stats()
+            async for url, html in self.page_fetcher.iter_pages(urls):
+                yield url, html
+            self.page_fetcher.log_stats()
+            return
+        
+        loop = asyncio.get_running_loop()
+        self.page_parser.fetch_stats = {'fetched': 0, 'truncated': 0, 'rejected': 0}
+        for url in urls:
+            # Загрузка в потоке, чтобы анализ уже полученных страниц не ждал сеть;
+            # паузы между запросами к одному домену делает ограничитель частоты в PageParser
+            yield url, await loop.run_in_executor(None, self.page_parser.get_page_content, url)
+        fetch_stats = self.page_parser.fetch_stats
+        logger.info(
+            f"Загружено страниц: {fetch_stats['fetched']}, обрезано: {fetch_stats['truncated']}, "
+            f"отклонено по типу: {fetch_stats['rejected']}"
+        )
     
     def get_competitor_analysis(self):
         """Получение анализа конкурентов из БД"""
@@ -129,20 +202,21 @@ class SEOAnalyzer:
             logger.error(f"Ошибка получения анализа конкурентов: {e}")
             return []
     
-    def export_to_csv(self, filename=None):
-        """Экспорт данных в CSV"""
+    def export_to_csv(self, filename=None, table='search_results', columns=None, date_from=None, date_to=None):
+        """Экспорт данных в CSV (потоковая выгрузка из БД)"""
         if filename is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"seo_analysis_{timestamp}.csv"
         
-        try:
-            data = self.get_competitor_analysis()
-            # Здесь будет логика экспорта в CSV
-            logger.info(f"Данные экспортированы в {filename}")
-            return filename
-        except Exception as e:
-            logger.error(f"Ошибка экспорта в CSV: {e}")
-            return None
+        return self.db_manager.export_results(
+            filename, table=table, columns=columns, date_from=date_from, date_to=date_to, fmt='csv'
+        )
+    
+    def export_results(self, filename=None, days=None, date_from=None, date_to=None):
+        """Экспорт результатов анализа (используется планировщиком); days - за последние N дней"""
+        if days is not None:
+            date_from = datetime.utcnow() - timedelta(days=days)
+        return self.export_to_csv(filename, date_from=date_from, date_to=date_to)
     
     def generate_report(self):
         """Генерация отчета"""
@@ -160,6 +234,7 @@ class SEOAnalyzer:
         logger.info("Ресурсы очищены")
         if hasattr(self.google_parser, 'close'):
             self.google_parser.close()
+        self.analysis_stage.close()
 
 def main():
     """Основная функция"""
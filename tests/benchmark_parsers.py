@@ -0,0 +1,188 @@
+"""
+Микробенчмарки парсеров на синтетических ответах поисковых систем (без сети).
+
+Страницы в tests/fixtures/serp - сгенерированный однострочный HTML с разметкой
+выдачи и генерируемыми классами, а не сохраненные ответы.
+
+Запуск: python tests/benchmark_parsers.py [--rounds N] [--update-baseline]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Добавляем корень проекта в путь
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+from loguru import logger
+from parsers.alternative_parser import AlternativeParser
+from parsers.google_parser import GoogleParser
+from parsers.page_parser import PageParser
+from parsers.yandex_parser import YandexParser
+from utils.http_cache import ResponseCache
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'serp')
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'benchmark_baseline.json')
+COMPETITOR_URL = "https://kivano.kg/catalog/iphone"
+DEFAULT_ROUNDS = 20
+# Допустимое ухудшение относительно эталона (0.5 - на 50%)
+DEFAULT_TOLERANCE = float(os.getenv("BENCH_TOLERANCE", "0.5"))
+
+
+def load_fixture(name):
+    """Текст синтетического ответа"""
+    with open(os.path.join(FIXTURES_DIR, name), 'r', encoding='utf-8') as fixture_file:
+        return fixture_file.read()
+
+
+def _calibration_workload():
+    """Фиксированная нагрузка на чистом Python для учета скорости машины"""
+    counts = {}
+    for i in range(200000):
+        key = i % 97
+        counts[key] = counts.get(key, 0) + i
+    return counts
+
+
+def build_cases(cache_dir):
+    """Сценарии: {имя: функция без аргументов}; парсеры получают ответ так же, как при работе"""
+    google_html = load_fixture('google.html')
+    yandex_html = load_fixture('yandex.html')
+    scraperapi_html = load_fixture('scraperapi_google.html')
+    serpapi_json = load_fixture('serpapi.json')
+
+    google_parser = GoogleParser(use_selenium=False)
+    yandex_parser = YandexParser()
+    alternative_parser = AlternativeParser()
+
+    # parse_page берет страницу из заранее заполненного кэша, без запроса к сайту
+    cache = ResponseCache(cache_dir=cache_dir, ttl=3600)
+    cache.store(COMPETITOR_URL, load_fixture('competitor_page.html').encode('utf-8'), {})
+    page_parser = PageParser(cache=cache)
+
+    return {
+        'google_parse_organic_results': lambda: google_parser.parse_organic_results(google_html),
+        'yandex_parse_organic_results': lambda: yandex_parser.parse_organic_results(
+            BeautifulSoup(yandex_html, 'html.parser')
+        ),
+        'alternative_parse_google_results': lambda: alternative_parser.parse_google_results(
+            BeautifulSoup(scraperapi_html, 'html.parser')
+        ),
+        'alternative_parse_serpapi_results': lambda: alternative_parser.parse_serpapi_results(
+            json.loads(serpapi_json)
+        ),
+        'page_parser_parse_page': lambda: page_parser.parse_page(COMPETITOR_URL, keyword="купить iPhone Бишкек"),
+    }
+
+
+def measure(func, rounds, min_sample=0.005):
+    """Медианное время одного вызова и пиковая память (tracemalloc, только Python-объекты).
+
+    Быстрые функции вызываются пачками, чтобы один замер длился не меньше min_sample.
+    """
+    started = time.perf_counter()
+    func()  # прогрев
+    number = max(1, int(min_sample / max(time.perf_counter() - started, 1e-9)))
+
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - started) / number)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return statistics.median(timings), peak
+
+
+def run_benchmarks(rounds=DEFAULT_ROUNDS):
+    """Прогнать все сценарии: страниц в секунду, пиковая память и время относительно калибровки"""
+    calibration, _ = measure(_calibration_workload, max(rounds // 4, 3))
+    results = {}
+    logger.disable('parsers')
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            for name, func in build_cases(cache_dir).items():
+                seconds, peak = measure(func, rounds)
+                results[name] = {
+                    'pages_per_sec': 1 / seconds if seconds else 0.0,
+                    'seconds': seconds,
+                    'relative': seconds / calibration,
+                    'peak_kb': peak / 1024,
+                }
+    finally:
+        logger.enable('parsers')
+    return results
+
+
+def load_baseline(path=BASELINE_PATH):
+    """Сохраненный эталон (пустой, если его нет)"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as baseline_file:
+        return json.load(baseline_file)
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    """Сохранить эталон: относительное время и пиковую память"""
+    baseline = {
+        name: {'relative': round(result['relative'], 4), 'peak_kb': round(result['peak_kb'], 1)}
+        for name, result in results.items()
+    }
+    with open(path, 'w', encoding='utf-8') as baseline_file:
+        json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+        baseline_file.write('\n')
+
+
+def check_regressions(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Список ухудшений относительно эталона сверх допуска"""
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if not expected:
+            continue
+        for metric in ('relative', 'peak_kb'):
+            limit = expected[metric] * (1 + tolerance)
+            if result[metric] > limit:
+                regressions.append(f"{name}: {metric} {result[metric]:.2f} > {limit:.2f}")
+    return regressions
+
+
+def main():
+    """Запуск из командной строки"""
+    arg_parser = argparse.ArgumentParser(description="Бенчмарк парсеров на синтетических ответах")
+    arg_parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS)
+    arg_parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    arg_parser.add_argument('--update-baseline', action='store_true')
+    args = arg_parser.parse_args()
+
+    results = run_benchmarks(args.rounds)
+    for name, result in results.items():
+        print(
+            f"{name:36} {result['pages_per_sec']:9.1f} стр/с  {result['seconds'] * 1000:8.2f} мс  "
+            f"{result['peak_kb']:9.1f} КБ"
+        )
+
+    if args.update_baseline:
+        save_baseline(results)
+        print(f"Эталон сохранен: {BASELINE_PATH}")
+        return 0
+
+    regressions = check_regressions(results, load_baseline(), args.tolerance)
+    for regression in regressions:
+        print(f"Ухудшение: {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Бенчмарк подсчета отслеживаемых фраз: автомат Ахо-Корасик против цикла по фразам
+
+Запуск: python tests/benchmark_phrases.py [--rounds N] [--phrases 10 100 1000]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+
+# Добавляем корень проекта и каталог тестов в путь
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_parsers import COMPETITOR_URL, load_fixture, measure
+from parsers.keyword_density import DensityEngine
+from parsers.page_pipeline import PageDocument, keyword_density
+
+DEFAULT_PHRASES = [10, 100, 1000]
+DEFAULT_ROUNDS = 5
+
+
+def legacy_keyword_density(text, keywords):
+    """Прежний подсчет: по каждому запросу words.count на слово и str.count на фразу"""
+    text_content = re.sub(r'[^\w\s]', ' ', text.lower())
+    words = text_content.split()
+    results = {}
+    for keyword in keywords:
+        keyword_parts = keyword.lower().split()
+        counts = {word: words.count(word) for word in keyword_parts}
+        if len(keyword_parts) > 1:
+            counts[' '.join(keyword_parts)] = text_content.count(' '.join(keyword_parts))
+        results[keyword] = counts
+    return results
+
+
+def make_phrases(text, count, seed=42):
+    """Отслеживаемые фразы: половина взята из текста страницы, половина - случайные сочетания слов"""
+    rng = random.Random(seed)
+    words = re.findall(r'\w+', text.lower())
+    phrases = set()
+    while len(phrases) < count:
+        size = rng.choice((1, 2, 3))
+        if len(phrases) % 2:
+            start = rng.randrange(len(words) - size)
+            phrases.add(' '.join(words[start:start + size]))
+        else:
+            phrases.add(' '.join(rng.choice(words) for _ in range(size)))
+    return sorted(phrases)
+
+
+def run_benchmarks(phrase_counts=DEFAULT_PHRASES, rounds=DEFAULT_ROUNDS):
+    """Время на страницу для каждого числа фраз: {число фраз: {legacy, matcher, build, speedup}}"""
+    doc = PageDocument(load_fixture('competitor_page.html'), COMPETITOR_URL)
+    text = doc.text
+    results = {}
+    for count in phrase_counts:
+        phrases = make_phrases(text, count)
+        build, _ = measure(lambda: DensityEngine(phrases), 3)
+        engine = DensityEngine(phrases)
+        matcher, _ = measure(lambda: keyword_density(doc, None, engine), rounds)
+        legacy, _ = measure(lambda: legacy_keyword_density(text, phrases), rounds)
+        results[count] = {
+            'legacy': legacy,
+            'matcher': matcher,
+            'build': build,
+            'speedup': legacy / matcher if matcher else 0.0,
+        }
+    return results
+
+
+def main():
+    """Запуск из командной строки"""
+    arg_parser = argparse.ArgumentParser(description="Бенчмарк подсчета отслеживаемых фраз")
+    arg_parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS)
+    arg_parser.add_argument('--phrases', type=int, nargs='+', default=DEFAULT_PHRASES)
+    args = arg_parser.parse_args()
+
+    for count, result in run_benchmarks(args.phrases, args.rounds).items():
+        print(
+            f"{count:6} фраз  цикл {result['legacy'] * 1000:9.2f} мс  "
+            f"автомат {result['matcher'] * 1000:7.2f} мс  (x{result['speedup']:.1f}, "
+            f"построение {result['build'] * 1000:.2f} мс)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,22 @@
+"""
+Общие настройки тестов: бенчмарки запускаются только по запросу (RUN_BENCHMARKS=1)
+"""
+import os
+
+import pytest
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "benchmark: замер производительности, запускается только с RUN_BENCHMARKS=1"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """Замеры времени зависят от загрузки машины, поэтому по умолчанию пропускаются"""
+    if os.getenv("RUN_BENCHMARKS") == "1":
+        return
+    skip = pytest.mark.skip(reason="бенчмарки запускаются с RUN_BENCHMARKS=1")
+    for item in items:
+        if 'benchmark' in item.keywords:
+            item.add_marker(skip)
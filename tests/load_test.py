@@ -0,0 +1,147 @@
+"""
+Сквозной нагрузочный тест на локальном стенде: analyze_competitors -> парсеры -> БД
+
+Запуск: python tests/load_test.py [--keywords N] [--page-size БАЙТ] [--latency СЕК]
+                                  [--captcha-rate ДОЛЯ] [--error-rate ДОЛЯ] [--database-url URL]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Добавляем корень проекта и каталог тестов в путь
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from loguru import logger
+from sqlalchemy import func
+from config import Config
+from database.manager import DatabaseManager
+from database.models import PageData, SearchResult
+from mock_search_server import MockSearchServer
+from seo_analyzer import SEOAnalyzer
+from utils.rate_limiter import rate_limiter
+
+
+def make_keywords(count):
+    """Ключевые слова для прогона: запросы из конфигурации с номерами"""
+    return [f"{Config.KEYWORDS[i % len(Config.KEYWORDS)]} {i}" for i in range(count)]
+
+
+STAND_SETTINGS = ('GOOGLE_SEARCH_URL', 'YANDEX_SEARCH_URL', 'USE_SELENIUM', 'USE_ALTERNATIVE_PARSER')
+# Стенд выдерживает высокую частоту: (начальная, минимальная, максимальная), запросов в секунду
+STAND_ENGINE_RATE = (20.0, 1.0, 50.0)
+STAND_SITE_RATE = (50.0, 5.0, 200.0)
+
+
+def configure_for_stand(server):
+    """Направить парсеры на стенд и поднять лимиты частоты; возвращает прежние настройки"""
+    previous = {name: getattr(Config, name) for name in STAND_SETTINGS}
+    previous['rate_limits'] = (rate_limiter.limits, rate_limiter.default)
+    Config.GOOGLE_SEARCH_URL = server.google_url
+    Config.YANDEX_SEARCH_URL = server.yandex_url
+    Config.USE_SELENIUM = False
+    Config.USE_ALTERNATIVE_PARSER = False
+    # Капча и 429 стенда по-прежнему замедляют ограничитель (AIMD)
+    rate_limiter.limits = {'google': STAND_ENGINE_RATE, 'yandex': STAND_ENGINE_RATE}
+    rate_limiter.default = STAND_SITE_RATE
+    rate_limiter.reset()
+    return previous
+
+
+def restore_settings(previous):
+    """Вернуть настройки, измененные configure_for_stand"""
+    rate_limiter.limits, rate_limiter.default = previous.pop('rate_limits')
+    rate_limiter.reset()
+    for name, value in previous.items():
+        setattr(Config, name, value)
+
+
+def count_rows(manager):
+    """Число строк результатов и данных страниц"""
+    session = manager.Session()
+    try:
+        return (
+            session.query(func.count(SearchResult.id)).scalar()
+            + session.query(func.count(PageData.id)).scalar()
+        )
+    finally:
+        session.close()
+
+
+def run_load_test(keywords=10, page_size=50000, latency=0.05, captcha_rate=0.0, error_rate=0.0,
+                  database_url=None):
+    """Прогнать analyze_competitors на стенде и вернуть метрики пропускной способности"""
+    with tempfile.TemporaryDirectory() as work_dir, MockSearchServer(
+        page_size=page_size, latency=latency, captcha_rate=captcha_rate, error_rate=error_rate, seed=15
+    ) as server:
+        previous = configure_for_stand(server)
+        manager = DatabaseManager(database_url or f"sqlite:///{os.path.join(work_dir, 'load.db')}")
+        manager.init_database()
+
+        analyzer = SEOAnalyzer()
+        analyzer.db_manager = manager
+        # Каждый прогон загружает страницы заново
+        analyzer.page_parser.cache = None
+        analyzer.page_fetcher.cache = None
+
+        rows_before = count_rows(manager)
+        started = time.perf_counter()
+        try:
+            analyzer.analyze_competitors(make_keywords(keywords))
+        finally:
+            analyzer.cleanup()
+            elapsed = time.perf_counter() - started
+            rates = {engine: rate_limiter.rate(engine) for engine in ('google', 'yandex')}
+            restore_settings(previous)
+        rows = count_rows(manager) - rows_before
+
+    minutes = elapsed / 60
+    return {
+        'keywords': keywords,
+        'seconds': elapsed,
+        'keywords_per_min': keywords / minutes,
+        'pages_per_min': server.stats['pages'] / minutes,
+        'rows_per_sec': rows / elapsed,
+        'rows': rows,
+        'server': dict(server.stats),
+        'metadata': dict(analyzer.metadata_stats),
+        'rates': rates,
+    }
+
+
+def main():
+    """Запуск из командной строки"""
+    arg_parser = argparse.ArgumentParser(description="Нагрузочный тест на локальном стенде")
+    arg_parser.add_argument('--keywords', type=int, default=10)
+    arg_parser.add_argument('--page-size', type=int, default=50000)
+    arg_parser.add_argument('--latency', type=float, default=0.05)
+    arg_parser.add_argument('--captcha-rate', type=float, default=0.0)
+    arg_parser.add_argument('--error-rate', type=float, default=0.0)
+    arg_parser.add_argument('--database-url')
+    arg_parser.add_argument('--verbose', action='store_true')
+    args = arg_parser.parse_args()
+
+    if not args.verbose:
+        logger.remove()
+        logger.add(sys.stderr, level="WARNING")
+
+    report = run_load_test(
+        keywords=args.keywords, page_size=args.page_size, latency=args.latency,
+        captcha_rate=args.captcha_rate, error_rate=args.error_rate, database_url=args.database_url
+    )
+    print(f"Ключевых слов: {report['keywords']} за {report['seconds']:.1f} с")
+    print(f"Ключевых слов/мин: {report['keywords_per_min']:.1f}")
+    print(f"Страниц/мин: {report['pages_per_min']:.1f}")
+    print(f"Строк БД/с: {report['rows_per_sec']:.1f} (всего {report['rows']})")
+    print(f"Стенд: {report['server']}")
+    print(f"Анализ страниц: {report['metadata']}")
+    print("Частота к концу прогона, запр/с: " + ", ".join(
+        f"{engine} {rate:.2f}" for engine, rate in report['rates'].items()
+    ))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+Локальный стенд для нагрузочных тестов: поисковые системы и сайты конкурентов
+
+Google и Яндекс отдают синтетические страницы выдачи из tests/fixtures/serp, в которых
+ссылки ведут на сайты конкурентов этого же стенда. Каждый сайт конкурента слушает
+свой порт, поэтому ограничения «на домен» работают так же, как с настоящими сайтами.
+"""
+import asyncio
+import hashlib
+import os
+import random
+import re
+import socket
+import threading
+from aiohttp import web
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'serp')
+_COMPETITOR_LINK = re.compile(r'https://([a-z0-9-]+\.kg)/')
+
+# Страницы капчи с теми же признаками, что у настоящих: форма /sorry/ (Google) и /checkcaptcha (Яндекс)
+CAPTCHA_PAGES = {
+    'google': (
+        "<html><head><title>Sorry...</title></head><body>"
+        "<p>Our systems have detected unusual traffic from your computer network.</p>"
+        '<form id="captcha-form" action="/sorry/index" method="post">'
+        '<div id="recaptcha" class="g-recaptcha"></div></form></body></html>'
+    ),
+    'yandex': (
+        "<html><head><title>Ой!</title></head><body>"
+        '<form class="CheckboxCaptcha" action="/checkcaptcha" method="get">'
+        "<p>Подтвердите, что запросы отправляли вы, а не робот</p></form></body></html>"
+    ),
+}
+
+PARAGRAPH = (
+    "<p>Купить iPhone в Бишкеке с доставкой по Кыргызстану. Оригинальные смартфоны, "
+    "гарантия, рассрочка и низкие цены в интернет-магазине.</p>"
+)
+
+
+def _free_port():
+    """Свободный локальный порт"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _read_fixture(name):
+    """Сохраненная страница выдачи"""
+    with open(os.path.join(FIXTURES_DIR, name), 'r', encoding='utf-8') as fixture_file:
+        return fixture_file.read()
+
+
+class MockSearchServer:
+    """Стенд в фоновом потоке: выдача Google/Яндекса и синтетические страницы конкурентов.
+
+    page_size - размер страницы конкурента в байтах, latency - задержка ответа
+    конкурента в секундах, captcha_rate и error_rate - доля ответов поисковых
+    систем с капчей и с кодом 429.
+    """
+
+    def __init__(self, page_size=50000, latency=0.05, captcha_rate=0.0, error_rate=0.0, seed=None):
+        self.page_size = page_size
+        self.latency = latency
+        self.captcha_rate = captcha_rate
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._templates = {'google': _read_fixture('google.html'), 'yandex': _read_fixture('yandex.html')}
+        self._domains = sorted(set(
+            domain for template in self._templates.values() for domain in _COMPETITOR_LINK.findall(template)
+        ))
+        self.ports = {name: _free_port() for name in ['google', 'yandex'] + self._domains}
+        self.stats = {'serp': 0, 'pages': 0, 'captcha': 0, 'too_many_requests': 0}
+        self._loop = None
+        self._runners = []
+        self._thread = None
+        self._page_cache = {}
+
+    @property
+    def google_url(self):
+        return f"http://127.0.0.1:{self.ports['google']}/search"
+
+    @property
+    def yandex_url(self):
+        return f"http://127.0.0.1:{self.ports['yandex']}/search"
+
+    def _serp(self, engine, keyword):
+        """Выдача по ключевому слову: ссылки ведут на сайты стенда, путь зависит от запроса"""
+        slug = hashlib.sha1(keyword.encode('utf-8')).hexdigest()[:10]
+        return _COMPETITOR_LINK.sub(
+            lambda match: f"http://127.0.0.1:{self.ports[match.group(1)]}/{slug}/",
+            self._templates[engine]
+        )
+
+    def _competitor_page(self, domain, path):
+        """Синтетическая страница конкурента заданного размера"""
+        if domain not in self._page_cache:
+            head = (
+                f"<!DOCTYPE html><html lang='ru'><head><meta charset='utf-8'>"
+                f"<title>{domain} — купить iPhone в Бишкеке</title>"
+                f"<meta name='description' content='Интернет-магазин {domain}'>"
+                f"<link rel='canonical' href='https://{domain}/'></head><body>"
+                f"<h1>Купить iPhone в Бишкеке</h1><h2>Каталог</h2>"
+            )
+            repeats = max(1, (self.page_size - len(head)) // len(PARAGRAPH.encode('utf-8')))
+            self._page_cache[domain] = head + PARAGRAPH * repeats + "</body></html>"
+        return self._page_cache[domain].replace('</h2>', f'</h2><p>{path}</p>', 1)
+
+    def _search_handler(self, engine, query_param):
+        """Обработчик страницы поиска с внедрением капчи и 429"""
+        async def handler(request):
+            self.stats['serp'] += 1
+            roll = self._random.random()
+            if roll < self.error_rate:
+                self.stats['too_many_requests'] += 1
+                return web.Response(status=429, headers={'Retry-After': '1'}, text="Too Many Requests")
+            if roll < self.error_rate + self.captcha_rate:
+                self.stats['captcha'] += 1
+                return web.Response(text=CAPTCHA_PAGES[engine], content_type='text/html')
+            keyword = request.query.get(query_param, '')
+            return web.Response(text=self._serp(engine, keyword), content_type='text/html')
+        return handler
+
+    def _page_handler(self, domain):
+        """Обработчик страниц сайта конкурента"""
+        async def handler(request):
+            self.stats['pages'] += 1
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            return web.Response(text=self._competitor_page(domain, request.path), content_type='text/html')
+        return handler
+
+    async def _start_site(self, name):
+        """Запустить приложение одного «хоста» на своем порту"""
+        app = web.Application()
+        if name == 'google':
+            app.router.add_get('/search', self._search_handler('google', 'q'))
+        elif name == 'yandex':
+            app.router.add_get('/search', self._search_handler('yandex', 'text'))
+        else:
+            app.router.add_get('/{tail:.*}', self._page_handler(name))
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', self.ports[name]).start()
+        self._runners.append(runner)
+
+    def start(self):
+        """Запустить стенд в фоновом потоке"""
+        started = threading.Event()
+
+        def serve():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            for name in self.ports:
+                self._loop.run_until_complete(self._start_site(name))
+            started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=serve, name="mock-search-server", daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def stop(self):
+        """Остановить стенд"""
+        if not self._loop:
+            return
+        for runner in self._runners:
+            asyncio.run_coroutine_threadsafe(runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,54 @@
+"""
+Тесты этапа анализа страниц в пуле процессов
+"""
+import sys
+import os
+import asyncio
+
+# Добавляем корень проекта в путь
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from parsers.analysis_stage import AnalysisStage
+from parsers.page_pipeline import content_hash
+
+PAGES = [
+    (f"https://shop{i}.kg/", f"<html><head><title>Кофе {i}</title></head><body><h1>Кофе</h1></body></html>")
+    for i in range(6)
+]
+
+
+async def feed(pages):
+    """Асинхронный источник страниц, как у загрузчика"""
+    for url, html in pages:
+        await asyncio.sleep(0)
+        yield url, html
+
+
+@pytest.mark.parametrize('workers', [0, 1])
+def test_pages_analyzed_skipped_and_failed(workers):
+    """Все страницы доходят до итога: разобраны, пропущены по хэшу или с ошибкой"""
+    pages = PAGES + [("https://broken.kg/", None)]
+    known_hashes = {PAGES[0][0]: content_hash(PAGES[0][1])}
+    seen = []
+    stage = AnalysisStage(workers=workers, queue_size=2)
+    try:
+        results = asyncio.run(stage.run_async(
+            feed(pages), known_hashes, on_result=lambda status, url, *_: seen.append((status, url))
+        ))
+    finally:
+        stage.close()
+
+    statuses = {url: status for status, url, _, _ in results}
+    assert statuses == {
+        **{url: 'analyzed' for url, _ in PAGES[1:]},
+        PAGES[0][0]: 'skipped',
+        "https://broken.kg/": 'failed',
+    }
+    assert sorted(seen) == sorted((status, url) for url, status in statuses.items())
+
+    analyzed = {url: (metadata, page_hash) for status, url, metadata, page_hash in results if status == 'analyzed'}
+    metadata, page_hash = analyzed["https://shop3.kg/"]
+    assert metadata['title'] == "Кофе 3"
+    assert page_hash == content_hash(PAGES[3][1])
+    assert 'parse' in metadata['timings']
@@ -0,0 +1,151 @@
+"""
+Тесты колоночного снимка истории выдачи и аналитики по нему (нужен pyarrow)
+"""
+import sys
+import os
+import glob
+from datetime import datetime, timedelta
+
+# Добавляем корень проекта в путь
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from sqlalchemy import insert, select
+from analytics import SerpHistory, build_snapshot, read_watermark
+from database.manager import DatabaseManager
+from database.models import Keyword, SearchResult
+
+# Выдача по дням: (день, система, запрос, [домены по позициям])
+SERPS = [
+    (1, 'google', "кофемашина Бишкек", ['a.kg', 'b.kg', 'c.kg']),
+    (1, 'yandex', "кофемашина Бишкек", ['b.kg', 'a.kg']),
+    (1, 'google', "кофеварка Бишкек", ['c.kg', 'a.kg']),
+    (2, 'google', "кофемашина Бишкек", ['b.kg', 'a.kg', 'c.kg']),
+    (2, 'google', "кофеварка Бишкек", ['c.kg', 'd.kg']),
+]
+
+
+def save_serps(manager, serps, hour=9):
+    """Записать выдачу напрямую (с заданными датами)"""
+    with manager.engine.begin() as connection:
+        for day, engine, keyword, domains in serps:
+            keyword_id = connection.execute(select(Keyword.id).where(
+                Keyword.keyword == keyword, Keyword.search_engine == engine
+            )).scalar()
+            if keyword_id is None:
+                keyword_id = connection.execute(insert(Keyword).values(
+                    keyword=keyword, search_engine=engine, region='kg'
+                )).inserted_primary_key[0]
+            connection.execute(insert(SearchResult), [
+                {
+                    'keyword_id': keyword_id,
+                    'position': position,
+                    'title': domain,
+                    'url': f"https://{domain}/",
+                    'domain': domain,
+                    'search_engine': engine,
+                    'created_at': datetime(2026, 3, day, hour, position),
+                }
+                for position, domain in enumerate(domains, 1)
+            ])
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = DatabaseManager(database_url=f"sqlite:///{tmp_path / 'seo.db'}")
+    manager.init_database()
+    save_serps(manager, SERPS)
+    return manager
+
+
+def snapshot_ids(root):
+    """Все id в файлах снимка"""
+    return sorted(SerpHistory(root).load(['id'])['id'].to_pylist())
+
+
+def lag_until(moment):
+    """commit_lag, при котором граница выгрузки приходится на moment"""
+    return (datetime.utcnow() - moment).total_seconds()
+
+
+def test_snapshot_incremental_and_compacted(manager, tmp_path):
+    """Секции date=/engine=, дозапись после отметки, слияние и уборка после сбоя"""
+    root = str(tmp_path / "snapshot")
+    # Граница внутри второго дня: позже 09:02 строки еще не выгружаются
+    lag = lag_until(datetime(2026, 3, 2, 9, 2, 30))
+    stats = build_snapshot(manager.engine, root, chunk_size=3, commit_lag=lag)
+    assert stats['rows'] == 11 and stats['partitions'] == 3
+    assert sorted(os.listdir(root)) == ['_watermark.json', 'date=2026-03-01', 'date=2026-03-02']
+    assert len(glob.glob(os.path.join(root, 'date=2026-03-01', 'engine=google', '*.arrow'))) == 1
+    assert read_watermark(root)['run'] == 1
+    assert read_watermark(root)['exported_until'] == stats['exported_until']
+
+    assert build_snapshot(manager.engine, root, commit_lag=lag)['rows'] == 0
+
+    # Остаток прерванного запуска (номер после отметки) удаляется и не дублирует строки
+    leftover = os.path.join(root, 'date=2026-03-02', 'engine=google', 'part-000003-000003.arrow')
+    with open(leftover, 'wb'):
+        pass
+
+    save_serps(
+        manager, [(2, 'google', "кофемашина Бишкек", ['e.kg']), (3, 'yandex', "кофеварка Бишкек", ['a.kg'])], hour=12
+    )
+    stats = build_snapshot(manager.engine, root, max_parts=1)
+    assert stats['rows'] == 3 and stats['compacted'] == 1
+    assert not os.path.exists(leftover)
+    assert len(glob.glob(os.path.join(root, 'date=2026-03-02', 'engine=google', '*.arrow'))) == 1
+    assert snapshot_ids(root) == list(range(1, 15))
+
+
+def test_snapshot_picks_up_late_commits(manager, tmp_path):
+    """Строка с меньшим id, подтвержденная позже большей, не теряется"""
+    root = str(tmp_path / "snapshot")
+    assert build_snapshot(manager.engine, root)['rows'] == 12
+
+    now = datetime.utcnow()
+    with manager.engine.begin() as connection:
+        keyword_id = connection.execute(select(Keyword.id)).scalars().first()
+
+    def commit(result_id, created_at):
+        with manager.engine.begin() as connection:
+            connection.execute(insert(SearchResult).values(
+                id=result_id, keyword_id=keyword_id, position=1, title="x", url="https://x.kg/",
+                domain="x.kg", search_engine='google', created_at=created_at
+            ))
+
+    # Яндекс начал сохранение раньше (id 100), а Google подтвердил свою строку (id 101) первым
+    commit(101, now - timedelta(seconds=10))
+    assert build_snapshot(manager.engine, root, commit_lag=60)['rows'] == 0
+    commit(100, now - timedelta(seconds=20))
+    assert build_snapshot(manager.engine, root, commit_lag=0)['rows'] == 2
+    assert snapshot_ids(root) == list(range(1, 13)) + [100, 101]
+
+
+def test_history_analytics(manager, tmp_path):
+    """Динамика позиций, доля видимости и пересечение доменов по снимку"""
+    root = str(tmp_path / "snapshot")
+    build_snapshot(manager.engine, root)
+    history = SerpHistory(root)
+
+    table = history.load(['domain', 'position'], date_from='2026-03-02', engine='google')
+    assert table.column_names == ['domain', 'position'] and table.num_rows == 5
+
+    assert history.position_trend('a.kg', keyword="кофемашина Бишкек") == [
+        {'date': '2026-03-01', 'engine': 'google', 'avg_position': 1.0, 'best_position': 1, 'results': 1},
+        {'date': '2026-03-01', 'engine': 'yandex', 'avg_position': 2.0, 'best_position': 2, 'results': 1},
+        {'date': '2026-03-02', 'engine': 'google', 'avg_position': 2.0, 'best_position': 2, 'results': 1},
+    ]
+
+    share = history.share_of_voice(engine='google', keyword="кофемашина Бишкек")
+    # a: 0.28 + 0.15, b: 0.15 + 0.28, c: 0.11 + 0.11
+    assert {share[0]['domain'], share[1]['domain']} == {'a.kg', 'b.kg'}
+    assert sum(row['share'] for row in share) == pytest.approx(100, abs=0.05)
+    assert share[2] == {'domain': 'c.kg', 'share': round(0.22 / 1.08 * 100, 2), 'appearances': 2, 'avg_position': 3.0}
+
+    overlap = history.domain_overlap(domains=['a.kg', 'c.kg', 'd.kg'])
+    assert overlap['a.kg']['c.kg'] == 1.0
+    assert overlap['c.kg']['d.kg'] == 0.5
+    assert overlap['a.kg']['d.kg'] == 0.5
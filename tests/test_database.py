@@ -0,0 +1,244 @@
+"""
+Тесты менеджера БД на временной SQLite
+"""
+import sys
+import os
+from datetime import datetime
+
+# Добавляем корень проекта в путь
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, insert, select, update
+from database.manager import DatabaseManager
+from database.models import Competitor, CompetitorDailyStat, Keyword, PageData, SearchResult
+from database.migrations import MIGRATIONS, apply_migrations, current_version
+from database.partitions import drop_expired_partitions
+from database.rollups import aggregate_stored
+
+
+def make_manager(tmp_path):
+    """Менеджер с инициализированной временной БД"""
+    manager = DatabaseManager(database_url=f"sqlite:///{tmp_path / 'seo.db'}")
+    manager.init_database()
+    return manager
+
+
+def make_results(count=5, prefix="site"):
+    """Результаты выдачи для сохранения"""
+    return [
+        {
+            'position': i,
+            'title': f"Заголовок {i}",
+            'url': f"https://{prefix}{i}.kg/",
+            'domain': f"{prefix}{i}.kg",
+            'description': "Описание"
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def test_migrations_are_idempotent(tmp_path):
+    """Повторный запуск миграций ничего не применяет"""
+    manager = make_manager(tmp_path)
+    assert current_version(manager.engine) == max(version for version, _, _ in MIGRATIONS)
+    assert apply_migrations(manager.engine) == []
+
+
+def test_save_search_results_batch(tmp_path):
+    """Пакетное сохранение и повторное использование ключевых слов"""
+    manager = make_manager(tmp_path)
+    batch = [
+        ("кофемашина Бишкек", "google", "kg", make_results(5)),
+        ("кофемашина Бишкек", "yandex", "10363", make_results(3)),
+    ]
+    assert manager.save_search_results_batch(batch) == 8
+    assert manager.save_search_results_batch(batch) == 8
+
+    positions = manager.get_keyword_positions("кофемашина Бишкек", "google")
+    assert len(positions) == 10
+    assert len(manager._keyword_ids) == 2
+
+
+def test_dashboard_queries_use_indexes(tmp_path):
+    """Запросы дашборда используют индексы (EXPLAIN QUERY PLAN)"""
+    manager = make_manager(tmp_path)
+    manager.save_search_results("кофемашина Бишкек", "google", "kg", make_results())
+
+    report = manager.check_query_plans()
+    assert report
+    for name, check in report.items():
+        assert check['uses_index'], f"{name}: {check['plan']}"
+
+
+def test_competitor_rollups_follow_saved_results(tmp_path):
+    """Агрегаты конкурентов обновляются при каждом сохранении выдачи"""
+    manager = make_manager(tmp_path)
+    manager.save_search_results("кофемашина Бишкек", "google", "kg", make_results(5))
+    manager.save_search_results("кофеварка Бишкек", "yandex", "10363", make_results(3))
+
+    competitors = {row['domain']: row for row in manager.get_competitors_analysis()}
+    assert competitors['site1.kg']['total_positions'] == 2
+    assert competitors['site1.kg']['top_3_positions'] == 2
+    assert competitors['site5.kg']['avg_position'] == 5.0
+    assert manager.verify_competitor_rollups() == []
+
+    assert manager.rebuild_competitor_rollups() == 5
+    assert manager.verify_competitor_rollups() == []
+    assert len(manager.get_competitor_daily_stats(domain='site1.kg')) == 2
+
+
+def test_page_hashes_follow_latest_analysis(tmp_path):
+    """Мета-данные привязываются к последнему результату с URL, хэш берется из последнего анализа"""
+    manager = make_manager(tmp_path)
+    manager.save_search_results("кофемашина Бишкек", "google", "kg", make_results(2))
+    metadata = {'title': "Кофе", 'h1': ["Кофе"], 'technical_seo': {'has_title': True}}
+
+    saved = manager.save_page_metadata_batch([
+        ("https://site1.kg/", metadata, "a" * 64),
+        ("https://site2.kg/", metadata, "b" * 64),
+        ("https://unknown.kg/", metadata, "c" * 64),
+    ])
+    assert saved == 2
+
+    manager.save_search_results("кофеварка Бишкек", "google", "kg", make_results(1))
+    assert manager.save_page_metadata("https://site1.kg/", metadata, "d" * 64) == 1
+    assert manager.get_page_hashes(["https://site1.kg/", "https://site2.kg/", "https://site3.kg/"]) == {
+        "https://site1.kg/": "d" * 64,
+        "https://site2.kg/": "b" * 64,
+    }
+
+
+def test_unchanged_pages_keep_metadata(tmp_path):
+    """Последний анализ неизменившейся страницы копируется на новый результат поиска"""
+    manager = make_manager(tmp_path)
+    manager.save_search_results("кофемашина Бишкек", "google", "kg", make_results(2))
+    metadata = {'title': "Кофе", 'h1': ["Кофе"], 'technical_seo': {'has_title': True}}
+    manager.save_page_metadata_batch([("https://site1.kg/", metadata, "a" * 64)])
+
+    # Анализ уже привязан к последнему результату - копировать нечего
+    assert manager.copy_page_metadata_batch(["https://site1.kg/", "https://site2.kg/"]) == 0
+
+    manager.save_search_results("кофеварка Бишкек", "google", "kg", make_results(2))
+    assert manager.copy_page_metadata_batch(["https://site1.kg/", "https://site2.kg/"]) == 1
+
+    session = manager.Session()
+    try:
+        rows = session.execute(
+            select(SearchResult.id, PageData.title, PageData.h1_tags, PageData.has_title, PageData.content_hash)
+            .join(PageData, PageData.search_result_id == SearchResult.id)
+            .where(SearchResult.url == "https://site1.kg/")
+            .order_by(SearchResult.id)
+        ).all()
+    finally:
+        session.close()
+    assert len(rows) == 2 and rows[0].id < rows[1].id
+    assert rows[1][1:] == ("Кофе", '["Кофе"]', True, "a" * 64)
+    assert manager.get_page_hashes(["https://site1.kg/"]) == {"https://site1.kg/": "a" * 64}
+
+
+def test_retention_removes_page_data_of_expired_results(tmp_path):
+    """Срок хранения: вместе со строками выдачи удаляются ссылающиеся на них page_data"""
+    manager = make_manager(tmp_path)
+    manager.save_search_results("кофемашина Бишкек", "google", "kg", make_results(2))
+    manager.save_search_results("кофеварка Бишкек", "google", "kg", make_results(2, prefix="old"))
+    metadata = {'title': "Кофе"}
+    # Анализ свежий, а строка выдачи, к которой он привязан, устарела
+    manager.save_page_metadata_batch([
+        ("https://site1.kg/", metadata, "a" * 64),
+        ("https://old1.kg/", metadata, "b" * 64),
+    ])
+    with manager.engine.begin() as connection:
+        connection.execute(
+            update(SearchResult).where(SearchResult.domain.like('old%')).values(created_at=datetime(2020, 1, 10))
+        )
+
+    assert drop_expired_partitions(manager.engine, retention_months=1) == ['search_results', 'page_data']
+
+    session = manager.Session()
+    try:
+        assert session.execute(select(func.count(SearchResult.id))).scalar() == 2
+        orphans = session.execute(
+            select(func.count(PageData.id)).where(PageData.search_result_id.not_in(select(SearchResult.id)))
+        ).scalar()
+        assert orphans == 0
+        assert session.execute(select(func.count(PageData.id))).scalar() == 1
+    finally:
+        session.close()
+
+
+def test_retention_keeps_competitor_rollups_consistent(tmp_path):
+    """После удаления устаревших строк агрегаты конкурентов равны пересчету по оставшимся"""
+    manager = make_manager(tmp_path)
+    manager.save_search_results("кофемашина Бишкек", "google", "kg", make_results(3))
+    manager.save_search_results("кофемашина Бишкек", "yandex", "10363", make_results(2))
+    with manager.engine.begin() as connection:
+        keyword_id = connection.execute(select(Keyword.id)).scalars().first()
+        connection.execute(insert(SearchResult), [
+            {
+                'keyword_id': keyword_id, 'position': position, 'title': domain, 'url': f"https://{domain}/",
+                'domain': domain, 'search_engine': engine, 'created_at': datetime(2020, 1, day)
+            }
+            for day, engine in ((10, 'google'), (11, 'yandex'))
+            for position, domain in enumerate(['site1.kg', 'old1.kg', 'site2.kg'], 1)
+        ])
+    manager.rebuild_competitor_rollups()
+
+    drop_expired_partitions(manager.engine, retention_months=1)
+
+    with manager.engine.connect() as connection:
+        totals, daily = aggregate_stored(connection)
+        stored_totals = {
+            row.domain: {name: getattr(row, name) for name in totals[row.domain]}
+            for row in connection.execute(select(Competitor).where(Competitor.total_positions > 0))
+        }
+        stored_daily = {
+            (row.domain, row.stat_date, row.search_engine): {
+                name: getattr(row, name) for name in daily[(row.domain, row.stat_date, row.search_engine)]
+            }
+            for row in connection.execute(select(CompetitorDailyStat))
+        }
+    assert stored_totals == totals and 'old1.kg' not in totals
+    assert stored_daily == daily
+    assert manager.verify_competitor_rollups() == []
+    assert {row['domain']: row['avg_position'] for row in manager.get_competitors_analysis()} == {
+        'site1.kg': 1.0, 'site2.kg': 2.0, 'site3.kg': 3.0
+    }
+
+
+def test_page_metadata_attached_to_all_results_of_run(tmp_path):
+    """Один URL по разным запросам и системам за запуск: мета-данные у каждого результата"""
+    manager = make_manager(tmp_path)
+    metadata = {'title': "Кофе"}
+
+    def save_run():
+        since = datetime.utcnow()
+        manager.save_search_results("кофемашина Бишкек", "google", "kg", make_results(2))
+        manager.save_search_results("кофемашина Бишкек", "yandex", "10363", make_results(2))
+        return since
+
+    since = save_run()
+    assert manager.save_page_metadata_batch([("https://site1.kg/", metadata, "a" * 64)], since=since) == 2
+
+    # Следующий запуск: страница не изменилась, анализ копируется на оба новых результата
+    since = save_run()
+    assert manager.copy_page_metadata_batch(["https://site1.kg/", "https://site2.kg/"], since=since) == 2
+    assert manager.copy_page_metadata_batch(["https://site1.kg/"], since=since) == 0
+
+    session = manager.Session()
+    try:
+        analyzed = session.execute(
+            select(SearchResult.search_engine, func.count(PageData.id))
+            .join(PageData, PageData.search_result_id == SearchResult.id)
+            .where(SearchResult.url == "https://site1.kg/")
+            .group_by(SearchResult.search_engine)
+        ).all()
+        missing = session.execute(
+            select(func.count(SearchResult.id))
+            .where(SearchResult.url == "https://site1.kg/", SearchResult.id.not_in(select(PageData.search_result_id)))
+        ).scalar()
+    finally:
+        session.close()
+    assert dict(analyzed) == {'google': 2, 'yandex': 2} and missing == 0
+
+    # Без since мета-данные получает только последний результат с URL
+    assert manager.save_page_metadata("https://site2.kg/", metadata, "b" * 64) == 1
@@ -0,0 +1,139 @@
+"""
+Тесты пула браузеров и облегченного режима на фиктивных драйверах (без запуска Chrome)
+"""
+import sys
+import os
+import json
+import threading
+import time
+
+# Добавляем корень проекта в путь
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from utils.driver_pool import DriverPool
+from utils.lean_browser import TrafficMeter
+from utils.proxy_pool import ProxyPool, parse_proxy
+
+
+class FakeDriver:
+    """Драйвер, который считает вызовы и умеет «падать»"""
+
+    def __init__(self):
+        self.alive = True
+        self.quit_called = False
+
+    def execute_script(self, script):
+        if not self.alive:
+            raise RuntimeError("chrome not reachable")
+        return 1
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_driver_reused_and_recycled_after_max_uses():
+    """Один браузер обслуживает аренды подряд и перезапускается после max_uses"""
+    pool = DriverPool(size=1, max_uses=3, idle_timeout=0, factory=FakeDriver)
+
+    leased = []
+    for _ in range(4):
+        with pool.lease() as driver:
+            leased.append(driver)
+
+    assert leased[0] is leased[1] is leased[2]
+    assert leased[3] is not leased[0] and leased[0].quit_called
+    assert pool.stats == {'created': 2, 'reused': 2, 'recycled': 1, 'broken': 0}
+
+    pool.shutdown()
+    assert leased[3].quit_called
+
+
+def test_broken_driver_replaced_and_leases_bounded():
+    """Упавший браузер заменяется, а аренд одновременно не больше размера пула"""
+    pool = DriverPool(size=1, max_uses=10, idle_timeout=0, factory=FakeDriver)
+    with pool.lease() as first:
+        # Второй арендатор ждет, пока первый не вернет браузер
+        with pytest.raises(TimeoutError):
+            with pool.lease(timeout=0.05):
+                pass
+        first.alive = False
+
+    with pool.lease() as second:
+        assert second is not first
+    assert pool.stats['broken'] == 1
+
+    # Освобождение в другом потоке пропускает ждущего арендатора
+    got = []
+
+    def wait_for_driver():
+        with pool.lease(timeout=2) as driver:
+            got.append(driver)
+
+    with pool.lease() as third:
+        waiter = threading.Thread(target=wait_for_driver)
+        waiter.start()
+        time.sleep(0.05)
+        assert not got
+    waiter.join()
+    assert got == [third]
+
+
+def test_idle_driver_does_not_hold_proxy_slot():
+    """Простаивающий браузер не занимает слот прокси; при занятом прокси берется другой"""
+    first, second = parse_proxy("10.0.0.1:8080"), parse_proxy("10.0.0.2:8080")
+    proxy_pool = ProxyPool([first, second], max_concurrency=1)
+
+    def factory():
+        driver = FakeDriver()
+        driver.proxy = proxy_pool.acquire(timeout=0.05)
+        return driver
+
+    pool = DriverPool(size=1, max_uses=10, idle_timeout=0, factory=factory, proxy_pool=proxy_pool)
+    with pool.lease() as driver:
+        assert driver.proxy is first and first.active == 1
+    assert first.active == 0
+
+    # Пока браузер простаивает, его прокси доступен обычным запросам
+    with proxy_pool.lease(timeout=0.05) as lease:
+        assert lease.proxy is first
+        # Прокси браузера занят: браузер перезапускается со свободным прокси
+        with pool.lease() as replacement:
+            assert replacement is not driver and driver.quit_called
+            assert replacement.proxy is second
+    assert pool.stats['recycled'] == 1
+
+    with pool.lease() as again:
+        assert again is replacement and second.active == 1
+    pool.shutdown()
+    assert first.active == second.active == 0
+
+
+class LoggingDriver(FakeDriver):
+    """Драйвер с журналом performance, который очищается при чтении"""
+
+    def __init__(self, events):
+        super().__init__()
+        self.events = events
+
+    def get_log(self, log_type):
+        entries = [{'message': json.dumps({'message': event})} for event in self.events]
+        self.events = []
+        return entries
+
+
+def test_traffic_meter_counts_loaded_and_blocked():
+    """Байты считаются по loadingFinished, заблокированные запросы - по blockedReason"""
+    driver = LoggingDriver([{'method': 'Network.loadingFinished', 'params': {'encodedDataLength': 999}}])
+    meter = TrafficMeter('google')
+    meter.start(driver)  # трафик прошлой аренды отбрасывается
+
+    driver.events = [
+        {'method': 'Network.responseReceived', 'params': {}},
+        {'method': 'Network.loadingFinished', 'params': {'encodedDataLength': 2048}},
+        {'method': 'Network.loadingFinished', 'params': {'encodedDataLength': 1024}},
+        {'method': 'Network.loadingFailed', 'params': {'blockedReason': 'inspector'}},
+        {'method': 'Network.loadingFailed', 'params': {'errorText': 'net::ERR_ABORTED'}},
+    ]
+    assert meter.finish(driver, 'кофе') == {'bytes': 3072, 'requests': 2, 'blocked': 1}
+    assert meter.totals == {'serps': 1, 'bytes': 3072, 'requests': 2, 'blocked': 1}
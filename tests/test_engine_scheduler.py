@@ -0,0 +1,75 @@
+"""
+Тесты планировщика опроса поисковых систем на заглушках
+"""
+import sys
+import os
+import threading
+import time
+
+# Добавляем корень проекта в путь
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.engine_scheduler import EngineScheduler
+
+KEYWORDS = ["кофемашина Бишкек", "кофеварка Бишкек", "ремонт кофемашин"]
+
+
+class StubEngine:
+    """Поисковая система-заглушка: запоминает порядок запросов и число одновременных"""
+
+    def __init__(self, name, barrier=None, fail_on=()):
+        self.name = name
+        self.barrier = barrier
+        self.fail_on = set(fail_on)
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, keyword):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            self.calls.append((keyword, threading.current_thread().name))
+            if self.barrier and keyword == KEYWORDS[0]:
+                # Обе системы должны дойти сюда одновременно, иначе BrokenBarrierError
+                self.barrier.wait(timeout=5)
+            time.sleep(0.01)
+            if keyword in self.fail_on:
+                raise RuntimeError("капча")
+            return [{'keyword': keyword, 'engine': self.name}]
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def test_engine_queues_run_in_parallel_and_in_order():
+    """Системы опрашиваются одновременно, запросы одной системы - по очереди"""
+    barrier = threading.Barrier(2)
+    google, yandex = StubEngine("google", barrier), StubEngine("yandex", barrier)
+    scheduler = EngineScheduler()
+
+    results = scheduler.run(KEYWORDS, {"google": google, "yandex": yandex})
+
+    for engine in (google, yandex):
+        assert [keyword for keyword, _ in engine.calls] == KEYWORDS
+        assert engine.max_active == 1
+        # Вся очередь системы - в одном потоке
+        assert len({thread for _, thread in engine.calls}) == 1
+    assert google.calls[0][1] != yandex.calls[0][1]
+    assert results["google"][KEYWORDS[1]] == [{'keyword': KEYWORDS[1], 'engine': "google"}]
+    assert set(scheduler.timings) == {"google", "yandex"}
+
+
+def test_keyword_error_does_not_stop_queues():
+    """Ошибка по одному запросу пропускает только его: очередь и другая система продолжают"""
+    google = StubEngine("google", fail_on=[KEYWORDS[1]])
+    yandex = StubEngine("yandex")
+
+    results = EngineScheduler().run(KEYWORDS, {"google": google, "yandex": yandex})
+
+    assert list(results["google"]) == [KEYWORDS[0], KEYWORDS[2]]
+    assert list(results["yandex"]) == KEYWORDS
+    # Пустой ответ не попадает в результаты
+    assert EngineScheduler().run(KEYWORDS, {"google": lambda keyword: []}) == {"google": {}}
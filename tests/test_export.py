@@ -0,0 +1,113 @@
+"""
+Тесты потоковой выгрузки из БД в CSV и Parquet
+"""
+import sys
+import os
+import csv
+import tracemalloc
+from datetime import datetime
+
+# Добавляем корень проекта в путь
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy import insert
+from database.export import export_table
+from database.manager import DatabaseManager
+from database.models import Keyword, SearchResult
+
+
+def make_manager(tmp_path, count):
+    """БД с count результатами выдачи: первая половина - за январь, вторая - за февраль"""
+    manager = DatabaseManager(database_url=f"sqlite:///{tmp_path / 'seo.db'}")
+    manager.init_database()
+    with manager.engine.begin() as connection:
+        keyword_id = connection.execute(insert(Keyword).values(
+            keyword="кофемашина Бишкек", search_engine="google", region="kg"
+        )).inserted_primary_key[0]
+        connection.execute(insert(SearchResult), [
+            {
+                'keyword_id': keyword_id,
+                'position': i % 10 + 1,
+                'title': f"Заголовок {i}",
+                'url': f"https://site{i}.kg/",
+                'domain': f"site{i}.kg",
+                'description': 'Описание, с запятой и "кавычками"',
+                'search_engine': "google",
+                'created_at': datetime(2026, 1, 15) if i < count // 2 else datetime(2026, 2, 15),
+            }
+            for i in range(count)
+        ])
+    return manager
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8-sig') as csv_file:
+        return list(csv.reader(csv_file))
+
+
+def test_export_projection_and_date_range(tmp_path):
+    """Выбранные колонки, фильтр по дате, строки пишутся пачками"""
+    manager = make_manager(tmp_path, 500)
+    path = str(tmp_path / "out" / "results.csv")
+
+    stats = export_table(
+        manager.engine, path, columns=['keyword', 'position', 'domain', 'description'],
+        date_from=datetime(2026, 2, 1), date_to=datetime(2026, 3, 1), chunk_size=64
+    )
+    rows = read_csv(path)
+    assert rows[0] == ['keyword', 'position', 'domain', 'description']
+    assert len(rows) - 1 == stats['rows'] == 250
+    assert rows[1][0].startswith("кофемашина") and rows[1][3] == 'Описание, с запятой и "кавычками"'
+    assert stats['rows_per_sec'] > 0
+
+    with pytest.raises(ValueError):
+        export_table(manager.engine, str(tmp_path / "bad.csv"), columns=['keyword', 'password'])
+    assert not os.path.exists(tmp_path / "bad.csv")
+
+    # Через менеджер: набор page_data пуст, файл с заголовком все равно создается
+    filepath = manager.export_results(str(tmp_path / "pages.csv"), table='page_data', columns=['url', 'title'])
+    assert read_csv(filepath) == [['url', 'title']]
+
+
+def test_export_memory_does_not_grow_with_table(tmp_path):
+    """Пиковая память выгрузки определяется размером пачки, а не таблицы"""
+    manager = make_manager(tmp_path, 20000)
+
+    def peak(date_to):
+        tracemalloc.start()
+        try:
+            stats = export_table(
+                manager.engine, str(tmp_path / "all.csv"), date_to=date_to, chunk_size=500
+            )
+            return stats['rows'], tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    small_rows, small_peak = peak(datetime(2026, 1, 1))
+    full_rows, full_peak = peak(None)
+    assert (small_rows, full_rows) == (0, 20000)
+    assert full_peak < small_peak + 2 * 1024 * 1024
+
+
+def test_export_parquet(tmp_path):
+    """Parquet со схемой по типам колонок (нужен pyarrow)"""
+    pq = pytest.importorskip('pyarrow.parquet')
+    manager = make_manager(tmp_path, 100)
+    path = str(tmp_path / "results.parquet")
+
+    stats = export_table(manager.engine, path, columns=['id', 'keyword', 'position', 'created_at'], chunk_size=30)
+    table = pq.read_table(path)
+    assert stats['rows'] == table.num_rows == 100
+    assert table.column_names == ['id', 'keyword', 'position', 'created_at']
+    assert str(table.schema.field('created_at').type) == 'timestamp[us]'
+
+
+def test_export_to_csv_streams_iterables(tmp_path, monkeypatch):
+    """export_to_csv принимает генератор словарей"""
+    from config import Config
+    monkeypatch.setattr(Config, 'CSV_OUTPUT_DIR', str(tmp_path))
+    manager = DatabaseManager(database_url=f"sqlite:///{tmp_path / 'seo.db'}")
+
+    filepath = manager.export_to_csv("competitors.csv", ({'domain': f"d{i}.kg", 'total': i} for i in range(3)))
+    assert read_csv(filepath) == [['domain', 'total'], ['d0.kg', '0'], ['d1.kg', '1'], ['d2.kg', '2']]
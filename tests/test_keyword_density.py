@@ -0,0 +1,71 @@
+"""
+Тесты плотности ключевых слов (нормализация, фразы, матрица страница × запрос)
+"""
+import sys
+import os
+
+# Добавляем корень проекта в путь
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.manager import DatabaseManager
+from parsers.keyword_density import DensityEngine, normalize_word
+from parsers.page_pipeline import PagePipeline
+
+KEYWORDS = ["кофемашина Бишкек", "кофемашина в Бишкеке", "ремонт кофемашин", "кофеварка Кыргызстан"]
+TEXT = (
+    "Кофемашины в Бишкеке по низким ценам. Купить кофемашину Бишкек с доставкой. "
+    "Ремонт кофемашин и кофеварок. Кофемашина в Бишкеке - гарантия."
+)
+
+
+def test_word_forms_normalized():
+    """Падежные формы и кыргызские буквы сводятся к одной форме"""
+    assert normalize_word("Кофемашины") == normalize_word("кофемашину") == normalize_word("кофемашина")
+    assert normalize_word("Бишкеке") == normalize_word("Бишкек")
+    assert normalize_word("Кыргызстане") == normalize_word("кыргызстан")
+    assert normalize_word("Түштүк") == normalize_word("туштук")
+
+
+def test_all_keywords_scored_in_one_pass():
+    """Фразы и отдельные слова всех запросов считаются по одной таблице частот"""
+    engine = DensityEngine(KEYWORDS)
+    result = engine.score(TEXT, keyword="кофемашина в Бишкеке")
+
+    assert result['total_words'] == 19
+    scores = result['scores']
+    assert scores["кофемашина Бишкек"]['count'] == 1
+    assert scores["кофемашина в Бишкеке"]['count'] == 2
+    assert scores["ремонт кофемашин"]['count'] == 1
+    assert scores["кофеварка Кыргызстан"]['count'] == 0
+    assert scores["кофеварка Кыргызстан"]['coverage'] == 0.0
+    # Служебное слово входит во фразу, но не считается отдельным термином
+    assert scores["кофемашина в Бишкеке"]['terms'] == {'кофемашин': 4, 'бишкек': 3}
+
+    assert result['keyword_count'] == 2
+    assert result['keyword_density'] == round(2 / 19 * 100, 4)
+
+    # Запрос выдачи не из списка оценивается вместе с остальными
+    extra = engine.score(TEXT, keyword="купить кофемашину")
+    assert extra['keyword_count'] == 1 and len(extra['scores']) == len(KEYWORDS) + 1
+
+    matrix = engine.matrix({"https://a.kg/": TEXT, "https://b.kg/": "Кофеварка Кыргызстан"})
+    assert matrix["https://b.kg/"]["кофеварка Кыргызстан"] == 50.0
+    assert matrix["https://a.kg/"]["кофеварка Кыргызстан"] == 0.0
+
+
+def test_density_stored_with_page_data(tmp_path):
+    """Конвейер заполняет keyword_density/keyword_count, матрица читается из БД"""
+    manager = DatabaseManager(database_url=f"sqlite:///{tmp_path / 'seo.db'}")
+    manager.init_database()
+    manager.save_search_results("кофемашина Бишкек", "google", "kg", [
+        {'position': 1, 'title': "Кофе", 'url': "https://a.kg/", 'domain': "a.kg", 'description': ""}
+    ])
+
+    html = f"<html><head><title>Кофе</title></head><body><p>{TEXT}</p></body></html>"
+    metadata = PagePipeline().run(html, "https://a.kg/", keyword="кофемашина Бишкек")
+    assert metadata['keyword_analysis']['keyword_count'] == 1
+    assert manager.save_page_metadata("https://a.kg/", metadata, "a" * 64) == 1
+
+    rows = {row['keyword']: row for row in manager.get_keyword_density_matrix()}
+    assert rows["кофемашина Бишкек"]['count'] == 1
+    assert rows["кофемашина Бишкек"]['domain'] == "a.kg"
@@ -0,0 +1,30 @@
+"""
+Смоук-тест локального стенда и сквозного нагрузочного прогона
+"""
+import sys
+import os
+
+# Добавляем корень проекта и каталог тестов в путь
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import requests
+from load_test import run_load_test
+from mock_search_server import MockSearchServer
+
+
+def test_stand_injects_captcha_and_429():
+    """Стенд отдает капчу и 429 с заданной долей"""
+    with MockSearchServer(captcha_rate=1.0) as server:
+        assert 'unusual traffic' in requests.get(server.google_url, params={'q': 'кофе'}).text
+    with MockSearchServer(error_rate=1.0) as server:
+        assert requests.get(server.yandex_url, params={'text': 'кофе'}).status_code == 429
+        assert server.stats['too_many_requests'] == 1
+
+
+def test_end_to_end_load_run():
+    """Выдача обеих систем разбирается, страницы конкурентов загружаются и сохраняются в БД"""
+    report = run_load_test(keywords=2, page_size=5000, latency=0)
+    assert report['server']['serp'] == 4
+    assert report['metadata']['analyzed'] == report['server']['pages'] > 0
+    assert report['rows'] > 0 and report['rows_per_sec'] > 0
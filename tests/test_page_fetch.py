@@ -0,0 +1,175 @@
+"""
+Тесты загрузки страниц (кэш, лимит размера, тип содержимого) на локальном HTTP-сервере
+"""
+import asyncio
+import sys
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Добавляем корень проекта в путь
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from parsers.async_fetcher import AsyncPageFetcher
+from parsers.page_parser import PageParser
+from utils.http_cache import ResponseCache
+from utils.rate_limiter import RateLimiter
+
+PAGE = "<html><head><title>Кофе в Бишкеке</title></head><body>Кофе</body></html>".encode('utf-8')
+BIG_PAGE = "<html><body>".encode('utf-8') + "Кофе ".encode('utf-8') * 10000
+# Локальный сервер запрашивается без пауз
+NO_LIMIT = RateLimiter(limits={}, default=(1000.0, 1000.0, 1000.0), jitter=0)
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    """Страница с ETag: на совпадающий If-None-Match отвечает 304"""
+    requests = []
+
+    def do_GET(self):
+        if self.path in ('/big', '/file'):
+            body = BIG_PAGE if self.path == '/big' else b'%PDF-1.4' * 1000
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html' if self.path == '/big' else 'application/pdf')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        PageHandler.requests.append(self.headers.get('If-None-Match'))
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('ETag', '"v1"')
+        self.send_header('Content-Length', str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server():
+    """Локальный сервер в фоновом потоке"""
+    PageHandler.requests = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/page"
+
+
+def test_page_parser_revalidates_with_etag(tmp_path):
+    """Свежая запись отдается без запроса, устаревшая - подтверждается ответом 304"""
+    server, url = start_server()
+    try:
+        cache = ResponseCache(cache_dir=str(tmp_path), ttl=60)
+        parser = PageParser(cache=cache, rate_limiter=NO_LIMIT)
+
+        assert 'Кофе в Бишкеке' in parser.get_page_content(url)
+        assert 'Кофе в Бишкеке' in parser.get_page_content(url)
+        assert PageHandler.requests == [None]
+
+        cache.ttl = 0
+        assert 'Кофе в Бишкеке' in parser.get_page_content(url)
+        assert PageHandler.requests == [None, '"v1"']
+        assert cache.stats == {'hits': 1, 'revalidated': 1, 'misses': 1, 'stored': 1, 'evicted': 0}
+    finally:
+        server.shutdown()
+
+
+def test_async_fetcher_uses_cache(tmp_path):
+    """Асинхронная загрузка отправляет условный запрос для устаревшей записи"""
+    server, url = start_server()
+    try:
+        cache = ResponseCache(cache_dir=str(tmp_path), ttl=0)
+        fetcher = AsyncPageFetcher(rate_limiter=NO_LIMIT, cache=cache)
+
+        assert 'Кофе в Бишкеке' in fetcher.fetch_all([url])[url]
+        assert 'Кофе в Бишкеке' in fetcher.fetch_all([url])[url]
+        assert PageHandler.requests == [None, '"v1"']
+        assert cache.stats['revalidated'] == 1
+    finally:
+        server.shutdown()
+
+
+def test_cache_can_be_disabled():
+    """cache=False отключает кэш: каждый запрос идет без условных заголовков"""
+    server, url = start_server()
+    try:
+        parser = PageParser(cache=False, rate_limiter=NO_LIMIT)
+        fetcher = AsyncPageFetcher(rate_limiter=NO_LIMIT, cache=False)
+
+        assert 'Кофе в Бишкеке' in parser.get_page_content(url)
+        assert 'Кофе в Бишкеке' in parser.get_page_content(url)
+        assert 'Кофе в Бишкеке' in fetcher.fetch_all([url])[url]
+        assert PageHandler.requests == [None, None, None]
+    finally:
+        server.shutdown()
+
+
+def test_async_fetcher_stops_when_consumer_waits():
+    """Потребитель не забирает страницы - загрузка останавливается после заполнения очереди"""
+    server, url = start_server()
+    try:
+        fetcher = AsyncPageFetcher(concurrency=2, per_domain=2, rate_limiter=NO_LIMIT, cache=False)
+
+        async def take_one():
+            pages = fetcher.iter_pages([f"{url}?n={i}" for i in range(20)])
+            await pages.__anext__()
+            await asyncio.sleep(0.5)
+            requested = len(PageHandler.requests)
+            await pages.aclose()
+            return requested
+
+        # Одна отданная страница, две в очереди и две в работе
+        assert asyncio.run(take_one()) <= 5
+        assert len(PageHandler.requests) <= 5
+
+        pages = fetcher.fetch_all([f"{url}?n={i}" for i in range(6)])
+        assert len(pages) == 6 and all(pages.values())
+    finally:
+        server.shutdown()
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    """При превышении лимита вытесняются давно не использованные записи"""
+    cache = ResponseCache(cache_dir=str(tmp_path), ttl=60, max_bytes=25)
+    headers = {'ETag': '"v1"'}
+    cache.store("https://a.kg/", b"a" * 10, headers)
+    cache.store("https://b.kg/", b"b" * 10, headers)
+    cache.hit(cache.lookup("https://a.kg/"))
+    cache.store("https://c.kg/", b"c" * 10, headers)
+
+    assert cache.lookup("https://b.kg/") is None
+    assert cache.lookup("https://a.kg/") is not None
+    assert cache.lookup("https://c.kg/") is not None
+    assert cache.stats['evicted'] == 1
+
+
+def test_page_body_is_bounded(tmp_path):
+    """Большая страница обрезается до лимита, не-HTML отклоняется до чтения тела"""
+    server, url = start_server()
+    base_url = url.rsplit('/', 1)[0]
+    try:
+        cache = ResponseCache(cache_dir=str(tmp_path), ttl=60)
+        parser = PageParser(cache=cache, rate_limiter=NO_LIMIT)
+        fetcher = AsyncPageFetcher(rate_limiter=NO_LIMIT, cache=cache)
+        Config.MAX_PAGE_BYTES, max_page_bytes = 1001, Config.MAX_PAGE_BYTES
+        try:
+            html = parser.get_page_content(f"{base_url}/big")
+            assert html.startswith("<html><body>Кофе") and len(html.encode('utf-8')) <= 1003
+            assert parser.get_page_content(f"{base_url}/file") is None
+            assert parser.fetch_stats == {'fetched': 1, 'truncated': 1, 'rejected': 1}
+
+            pages = fetcher.fetch_all([f"{base_url}/big", f"{base_url}/file"])
+            assert pages[f"{base_url}/big"] == html
+            assert pages[f"{base_url}/file"] is None
+            assert fetcher.stats == {'fetched': 1, 'failed': 0, 'truncated': 1, 'rejected': 1}
+        finally:
+            Config.MAX_PAGE_BYTES = max_page_bytes
+
+        # Обрезанные страницы в кэш не попадают
+        assert cache.lookup(f"{base_url}/big") is None
+    finally:
+        server.shutdown()
@@ -0,0 +1,126 @@
+"""
+Офлайн-тесты парсеров на синтетических страницах выдачи и проверка производительности против эталона
+"""
+import sys
+import os
+import json
+import tempfile
+
+import pytest
+
+# Добавляем корень проекта и каталог тестов в путь
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from bs4 import BeautifulSoup
+from benchmark_parsers import (
+    COMPETITOR_URL, build_cases, check_regressions, load_baseline, load_fixture, run_benchmarks
+)
+from mock_search_server import CAPTCHA_PAGES
+from parsers import google_parser, yandex_parser
+from parsers.alternative_parser import AlternativeParser
+from parsers.google_parser import GoogleParser
+from parsers.yandex_parser import YandexParser
+from utils.proxy_pool import ProxyPool, parse_proxy
+from utils.rate_limiter import RateLimiter
+
+
+def test_google_fixture():
+    """Органическая выдача Google из синтетической страницы"""
+    results = GoogleParser(use_selenium=False).parse_organic_results(load_fixture('google.html'))
+    assert len(results) == 10
+    assert results[0]['domain'] == 'kivano.kg'
+    assert results[0]['title'] == 'Kivano.kg — интернет-магазин электроники в Бишкеке'
+    assert 'Бишкеке' in results[0]['description']
+
+
+class StubResponse:
+    """Ответ requests с заданными адресом, статусом и телом"""
+
+    def __init__(self, url, text, status_code=200):
+        self.url = url
+        self.text = text
+        self.content = text.encode('utf-8')
+        self.status_code = status_code
+        self.headers = {}
+
+    def raise_for_status(self):
+        pass
+
+
+class StubSession:
+    """Сессия, отдающая заранее заданный ответ"""
+
+    def __init__(self, response):
+        self.response = response
+
+    def get(self, url, **kwargs):
+        return self.response
+
+
+def test_captcha_detected_by_explicit_signals(monkeypatch):
+    """Капча - по редиректу и форме; слова robot/verify/consent в выдаче не штрафуют прокси"""
+    proxy = parse_proxy("10.0.0.1:8080")
+    limiter = RateLimiter(limits={}, default=(1.0, 0.1, 10.0), decrease=0.5, jitter=0)
+    for module in (google_parser, yandex_parser):
+        monkeypatch.setattr(module, 'proxy_pool', ProxyPool([proxy]))
+        monkeypatch.setattr(module, 'rate_limiter', limiter)
+
+    google, yandex = GoogleParser(use_selenium=False), YandexParser()
+    words = "<p>I'm not a robot: verify consent</p>"
+    google.session = StubSession(StubResponse(
+        "https://www.google.com/search?q=x", load_fixture('google.html').replace('</body>', words + '</body>')
+    ))
+    yandex.session = StubSession(StubResponse(
+        "https://yandex.kg/search/?text=x", load_fixture('yandex.html').replace('</body>', words + '</body>')
+    ))
+    assert len(google.parse_with_requests("кофе")) == 10
+    assert len(yandex.parse_with_requests("кофе")) == 9
+
+    google.session = StubSession(StubResponse("https://consent.google.com/ml?continue=x", "<form>Принять все</form>"))
+    assert google.parse_with_requests("кофе") == []
+    assert proxy.stats['captcha'] == 0 and limiter.rate("google") == limiter.rate("yandex") == 1.0
+
+    google.session = StubSession(StubResponse("https://www.google.com/sorry/index?continue=x", CAPTCHA_PAGES['google']))
+    yandex.session = StubSession(StubResponse("https://yandex.kg/search/?text=x", CAPTCHA_PAGES['yandex']))
+    assert google.parse_with_requests("кофе") == [] and yandex.parse_with_requests("кофе") == []
+    assert proxy.stats['captcha'] == 2
+    assert limiter.rate("google") < 1.0 and limiter.rate("yandex") < 1.0
+    assert yandex_parser.is_captcha_page("https://yandex.kg/showcaptcha?cc=1", "")
+
+
+def test_yandex_fixture():
+    """Выдача Яндекса без рекламного блока"""
+    soup = BeautifulSoup(load_fixture('yandex.html'), 'html.parser')
+    results = YandexParser().parse_organic_results(soup)
+    assert len(results) == 9
+    assert results[0]['domain'] == 'sulpak.kg'
+
+
+def test_alternative_fixtures():
+    """Ответы ScraperAPI (HTML) и SerpAPI (JSON)"""
+    parser = AlternativeParser()
+    scraperapi = parser.parse_google_results(
+        BeautifulSoup(load_fixture('scraperapi_google.html'), 'html.parser')
+    )
+    serpapi = parser.parse_serpapi_results(json.loads(load_fixture('serpapi.json')))
+
+    assert [result['url'] for result in scraperapi] == [result['url'] for result in serpapi]
+    assert scraperapi[0]['url'] == 'https://kivano.kg/iphone'
+
+
+def test_competitor_page_fixture():
+    """Полный анализ страницы конкурента без обращения к сети"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        metadata = build_cases(cache_dir)['page_parser_parse_page']()
+    assert metadata['url'] == COMPETITOR_URL
+    assert metadata['h1'] == ['Купить iPhone в Бишкеке']
+    assert metadata['technical_seo']['has_schema'] and metadata['technical_seo']['has_canonical']
+
+
+@pytest.mark.benchmark
+def test_parsers_do_not_regress():
+    """Время (относительно калибровки) и пиковая память не хуже эталона сверх допуска"""
+    results = run_benchmarks(rounds=10)
+    assert all(result['pages_per_sec'] > 0 for result in results.values())
+    assert check_regressions(results, load_baseline()) == []
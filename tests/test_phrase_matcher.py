@@ -0,0 +1,64 @@
+"""
+Тесты автомата поиска фраз и его использования в PageParser
+"""
+import sys
+import os
+import random
+
+import pytest
+
+# Добавляем корень проекта и каталог тестов в путь
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_phrases import run_benchmarks
+from parsers.page_parser import PageParser
+from parsers.phrase_matcher import PhraseMatcher
+
+
+def brute_force(words, phrases):
+    """Эталон: проверка каждой фразы в каждой позиции"""
+    counts = {}
+    for phrase in phrases:
+        count = sum(
+            1 for i in range(len(words) - len(phrase) + 1) if tuple(words[i:i + len(phrase)]) == phrase
+        )
+        if count:
+            counts[phrase] = count
+    return counts
+
+
+def test_matches_brute_force_with_overlaps():
+    """Перекрывающиеся фразы и фразы внутри фраз находятся по ссылкам неудачи"""
+    phrases = [('a', 'b'), ('b', 'c'), ('a', 'b', 'c', 'd'), ('b',), ('c', 'a', 'b'), ('d', 'd')]
+    matcher = PhraseMatcher(phrases)
+    words = "a b c a b c d d d x a b".split()
+    assert matcher.count(words) == brute_force(words, phrases)
+
+    rng = random.Random(7)
+    vocabulary = list("abcdef")
+    phrases = {tuple(rng.choice(vocabulary) for _ in range(rng.randint(1, 4))) for _ in range(60)}
+    matcher = PhraseMatcher(phrases)
+    for _ in range(20):
+        words = [rng.choice(vocabulary + ['z']) for _ in range(200)]
+        assert matcher.count(words) == brute_force(words, phrases)
+
+
+def test_page_parser_counts_tracked_phrases():
+    """PageParser с собственным списком фраз считает их все за один проход"""
+    parser = PageParser(keywords=["ремонт кофемашин", "кофемашина Бишкек", "доставка"])
+    html = "<html><body>Ремонт кофемашин в Бишкеке. Кофемашины Бишкек, доставка кофемашин.</body></html>"
+
+    result = parser.analyze_keyword_density(html, keyword="кофемашина Бишкек")
+    assert result['keyword_count'] == 1
+    assert {name: item['count'] for name, item in result['scores'].items()} == {
+        "ремонт кофемашин": 1, "кофемашина Бишкек": 1, "доставка": 1
+    }
+    assert parser.analyze_html(html, "https://a.kg/")['keyword_analysis']['scores'].keys() == result['scores'].keys()
+
+
+@pytest.mark.benchmark
+def test_matcher_faster_than_per_phrase_loop():
+    """На сотнях фраз автомат заметно быстрее цикла str.count по фразам"""
+    result = run_benchmarks([300], rounds=3)[300]
+    assert result['speedup'] > 2
@@ -0,0 +1,42 @@
+"""
+Тесты адаптивного ограничителя частоты запросов
+"""
+import sys
+import os
+
+# Добавляем корень проекта в путь
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from utils.rate_limiter import RateLimiter, retry_after_seconds
+
+
+def test_reserve_spaces_requests_per_target():
+    """Первый запрос идет сразу, следующие - с шагом 1/частота; цели независимы"""
+    limiter = RateLimiter(limits={'google': (10.0, 1.0, 20.0)}, default=(100.0, 1.0, 100.0), jitter=0)
+
+    waits = [limiter.reserve('google') for _ in range(3)]
+    assert waits[0] == 0
+    assert waits[1] == pytest.approx(0.1, abs=0.01)
+    assert waits[2] == pytest.approx(0.2, abs=0.01)
+    # Другая цель не ждет из-за очереди Google
+    assert limiter.reserve('kivano.kg') == 0
+
+
+def test_aimd_backoff_and_recovery():
+    """Капча/429 делят частоту (не ниже минимума), успехи прибавляют (не выше максимума)"""
+    limiter = RateLimiter(limits={'yandex': (1.0, 0.3, 1.1)}, increase=0.05, decrease=0.5, jitter=0)
+
+    limiter.throttled('yandex')
+    assert limiter.rate('yandex') == 0.5
+    limiter.throttled('yandex')
+    assert limiter.rate('yandex') == 0.3
+
+    for _ in range(30):
+        limiter.success('yandex')
+    assert limiter.rate('yandex') == 1.1
+
+    # Retry-After блокирует цель не меньше указанного времени
+    limiter.throttled('yandex', retry_after_seconds({'Retry-After': '5'}))
+    assert limiter.reserve('yandex') >= 4.9
+    assert retry_after_seconds({'Retry-After': 'Wed, 21 Oct 2026 07:28:00 GMT'}) is None
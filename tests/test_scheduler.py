@@ -0,0 +1,52 @@
+"""
+Тесты заданий планировщика с подмененным анализатором
+"""
+import sys
+import os
+import inspect
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+# Добавляем корень проекта в путь
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scheduler
+from seo_analyzer import SEOAnalyzer
+
+
+class StubAnalyzer:
+    """Записывает вызовы и проверяет их по сигнатурам настоящего SEOAnalyzer"""
+    instances = []
+
+    def __init__(self, *args, **kwargs):
+        inspect.signature(SEOAnalyzer).bind(*args, **kwargs)
+        self.calls = []
+        StubAnalyzer.instances.append(self)
+
+    def __getattr__(self, name):
+        method = getattr(SEOAnalyzer, name)
+
+        def record(*args, **kwargs):
+            inspect.signature(method).bind(self, *args, **kwargs)
+            self.calls.append((name, args, kwargs))
+        return record
+
+
+def test_daily_job_runs_with_current_analyzer_api(monkeypatch):
+    """Ежедневное задание: анализ, экспорт за последний день, отчет и очистка"""
+    StubAnalyzer.instances = []
+    monkeypatch.setattr(scheduler, 'SEOAnalyzer', StubAnalyzer)
+
+    scheduler.run_daily_analysis()
+
+    assert len(StubAnalyzer.instances) == 1
+    calls = StubAnalyzer.instances[0].calls
+    assert [name for name, _, _ in calls] == ['analyze_competitors', 'export_results', 'generate_report', 'cleanup']
+    assert calls[1][2] == {'days': 1}
+
+    # days превращается в нижнюю границу выгрузки
+    exported = {}
+    stub = SimpleNamespace(export_to_csv=lambda filename, **kwargs: exported.update(kwargs))
+    SEOAnalyzer.export_results(stub, days=1)
+    assert exported['date_to'] is None
+    assert timedelta(0) <= datetime.utcnow() - timedelta(days=1) - exported['date_from'] < timedelta(minutes=1)
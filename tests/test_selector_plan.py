@@ -0,0 +1,43 @@
+"""
+Тесты скомпилированного плана селекторов выдачи
+"""
+import sys
+import os
+
+# Добавляем корень проекта в путь
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsers.selector_plan import SelectorPlan, parse_html
+
+FIELDS = {
+    'title': ['h3', '.title'],
+    'link': (['a[href]'], 'href'),
+}
+
+
+def test_first_matching_container_selector_wins():
+    """Блоки берутся от первого по приоритету селектора, пустое поле уступает следующему селектору"""
+    plan = SelectorPlan(['div.g', 'div[data-hveid]'], FIELDS, fallback=('div', 'a[href]'))
+    root = parse_html(
+        '<div data-hveid="1"><div class="g"><a href="https://a.kg/"><h3> </h3>'
+        '<span class="title">Кофе <b>Бишкек</b></span></a></div></div>'
+    )
+
+    containers = plan.find_containers(root)
+    assert [element.get('class') for element in containers] == ['g']
+    assert plan.extract_fields(containers[0]) == {'title': 'КофеБишкек', 'link': 'https://a.kg/'}
+    assert plan.hit_report()['title'] == {'h3': 0, '.title': 1}
+
+
+def test_fallback_and_reorder_by_hits():
+    """Без блоков используется fallback; reorder ставит чаще срабатывающие селекторы первыми"""
+    plan = SelectorPlan(['div.g', 'div.rc'], FIELDS, fallback=('div', 'a[href]'))
+    fallback_root = parse_html(
+        '<html><body><div><p>Нет ссылки</p></div><div><a href="https://b.kg/">B</a></div></body></html>'
+    )
+    assert len(plan.find_containers(fallback_root)) == 1
+
+    for _ in range(2):
+        plan.find_containers(parse_html('<div class="rc"><a href="https://c.kg/">C</a></div>'))
+    plan.reorder()
+    assert plan.containers == ['div.rc', 'div.g']
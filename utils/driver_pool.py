@@ -0,0 +1,224 @@
+"""
+Пул прогретых браузеров Selenium, общий для парсеров Google и Яндекса
+"""
+import atexit
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from webdriver_manager.chrome import ChromeDriverManager
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from loguru import logger
+from config import Config
+from utils.proxy_extension import build_proxy_extension
+from utils.proxy_pool import proxy_pool as default_proxy_pool
+from utils import lean_browser
+
+
+@lru_cache(maxsize=1)
+def chromedriver_path():
+    """Путь к chromedriver: из настроек или загруженный один раз за процесс"""
+    if Config.CHROMEDRIVER_PATH:
+        return Config.CHROMEDRIVER_PATH
+    path = ChromeDriverManager().install()
+    logger.info(f"chromedriver: {path}")
+    return path
+
+
+def build_chrome_options(proxy=None):
+    """Настройки Chrome для парсинга выдачи (proxy - Proxy из пула или None)"""
+    chrome_options = webdriver.ChromeOptions()
+
+    # Базовые настройки
+    if Config.SELENIUM_HEADLESS:
+        chrome_options.add_argument("--headless=new")  # Новый headless режим
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation", "enable-logging"])
+    chrome_options.add_experimental_option('useAutomationExtension', False)
+
+    # Настройки для обхода детекции
+    chrome_options.add_argument("--disable-plugins")
+    chrome_options.add_argument("--disable-popup-blocking")
+    chrome_options.add_argument("--profile-directory=Default")
+    chrome_options.add_argument("--disable-infobars")
+
+    # Региональные настройки для Кыргызстана
+    chrome_options.add_argument("--lang=ru-RU")  # Основной язык интерфейса
+    chrome_options.add_argument("--timezone=Asia/Bishkek")  # Часовой пояс
+    chrome_options.add_argument("--geo-location=lat=42.87,lon=74.59")  # Координаты Бишкека
+
+    # Фиксированный user-agent (лучше не использовать случайные)
+    user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+    chrome_options.add_argument(f"user-agent={user_agent}")
+
+    # Прокси с авторизацией подключается расширением, без нее - аргументом
+    if proxy and proxy.user:
+        chrome_options.add_extension(build_proxy_extension(proxy))
+    else:
+        chrome_options.add_argument("--disable-extensions")
+        if proxy:
+            chrome_options.add_argument(f"--proxy-server={proxy.scheme}://{proxy.host}:{proxy.port}")
+
+    if Config.SELENIUM_LEAN_MODE:
+        lean_browser.configure_options(chrome_options)
+
+    return chrome_options
+
+
+def create_driver(proxy_pool=default_proxy_pool):
+    """Запустить новый Chrome с прокси из пула; слот прокси занят, пока браузер арендован"""
+    proxy = proxy_pool.acquire(timeout=Config.TIMEOUT)
+    try:
+        service = Service(chromedriver_path())
+        driver = webdriver.Chrome(service=service, options=build_chrome_options(proxy))
+        if Config.SELENIUM_LEAN_MODE:
+            lean_browser.enable_blocking(driver)
+    except Exception:
+        if proxy:
+            proxy_pool.release(proxy)
+        raise
+    driver.proxy = proxy
+    return driver
+
+
+class DriverPool:
+    """Пул браузеров с арендой: браузер запускается один раз и переиспользуется.
+
+    Перед выдачей браузер проверяется, после max_uses аренд и после простоя
+    дольше idle_timeout секунд он перезапускается. Одновременно выдается не
+    больше size браузеров, остальные арендаторы ждут. Браузер привязан к своему
+    прокси, но занимает его слот только на время аренды: простаивающие браузеры
+    не отнимают у обычных запросов лимит PROXY_MAX_CONCURRENCY.
+    """
+
+    def __init__(self, size=None, max_uses=None, idle_timeout=None, factory=None, proxy_pool=None):
+        self.size = size or Config.DRIVER_POOL_SIZE
+        self.max_uses = max_uses or Config.DRIVER_MAX_USES
+        self.idle_timeout = idle_timeout if idle_timeout is not None else Config.DRIVER_IDLE_TIMEOUT
+        self.proxy_pool = proxy_pool if proxy_pool is not None else default_proxy_pool
+        self._factory = factory or (lambda: create_driver(self.proxy_pool))
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._idle = []  # [(driver, число аренд, время возврата)]
+        self._leased = {}  # id(driver) -> арендованный driver
+        self.stats = {'created': 0, 'reused': 0, 'recycled': 0, 'broken': 0}
+
+    @staticmethod
+    def is_healthy(driver):
+        """Браузер отвечает на команды, а его прокси не в карантине"""
+        proxy = getattr(driver, 'proxy', None)
+        if proxy is not None and proxy.quarantined_until > time.monotonic():
+            return False
+        try:
+            driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def _release_proxy(self, driver):
+        """Вернуть слот прокси арендованного браузера"""
+        proxy = getattr(driver, 'proxy', None)
+        if proxy is not None:
+            self.proxy_pool.release(proxy)
+
+    @staticmethod
+    def _quit(driver):
+        """Закрыть браузер, не падая на уже умершем процессе"""
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.debug(f"Ошибка закрытия WebDriver: {e}")
+
+    def _checkout(self):
+        """Взять живой браузер из простаивающих (заняв слот его прокси) или запустить новый"""
+        busy = []  # браузеры, чей прокси сейчас занят запросами
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                driver, uses, released_at = self._idle.pop()
+            if self.idle_timeout and time.monotonic() - released_at > self.idle_timeout:
+                self.stats['recycled'] += 1
+                self._quit(driver)
+                continue
+            if not self.is_healthy(driver):
+                self.stats['broken'] += 1
+                self._quit(driver)
+                continue
+            proxy = getattr(driver, 'proxy', None)
+            if proxy is not None and not self.proxy_pool.try_acquire(proxy):
+                busy.append((driver, uses, released_at))
+                continue
+            self.stats['reused'] += 1
+            self._return_idle(busy)
+            return driver, uses
+
+        # Новый браузер получит свободный прокси; один из ждущих закрывается, чтобы не превысить size
+        if busy:
+            self.stats['recycled'] += 1
+            self._quit(busy.pop()[0])
+            self._return_idle(busy)
+        driver = self._factory()
+        self.stats['created'] += 1
+        logger.info(f"Запущен WebDriver ({self.stats['created']} за процесс)")
+        return driver, 0
+
+    def _return_idle(self, items):
+        """Вернуть непригодившиеся браузеры в простаивающие (в начало очереди)"""
+        if items:
+            with self._lock:
+                self._idle[:0] = items
+
+    def _release(self, driver, uses):
+        """Освободить прокси и вернуть браузер в пул или закрыть, если он отработал свое"""
+        self._release_proxy(driver)
+        if uses >= self.max_uses:
+            self.stats['recycled'] += 1
+            self._quit(driver)
+            return
+        with self._lock:
+            self._idle.append((driver, uses, time.monotonic()))
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """Арендовать браузер на время блока with"""
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError("Нет свободного WebDriver в пуле")
+        driver = None
+        try:
+            driver, uses = self._checkout()
+            with self._lock:
+                self._leased[id(driver)] = driver
+            yield driver
+        finally:
+            if driver is not None:
+                with self._lock:
+                    self._leased.pop(id(driver), None)
+                self._release(driver, uses + 1)
+            self._slots.release()
+
+    def shutdown(self):
+        """Закрыть все браузеры пула"""
+        with self._lock:
+            leased = list(self._leased.values())
+            drivers = [driver for driver, _, _ in self._idle] + leased
+            self._idle = []
+            self._leased = {}
+        for driver in leased:
+            self._release_proxy(driver)
+        for driver in drivers:
+            self._quit(driver)
+        if drivers:
+            logger.info(
+                f"Пул WebDriver закрыт: запущено {self.stats['created']}, "
+                f"переиспользовано {self.stats['reused']}, перезапущено {self.stats['recycled']}, "
+                f"сбоев {self.stats['broken']}"
+            )
+
+
+# Глобальный пул: браузеры переживают пересоздание SEOAnalyzer между задачами
+driver_pool = DriverPool()
+atexit.register(driver_pool.shutdown)
@@ -0,0 +1,55 @@
+"""
+Планировщик параллельного опроса поисковых систем
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from loguru import logger
+
+
+class EngineScheduler:
+    """Отдельная очередь ключевых слов для каждой поисковой системы.
+
+    Очереди разных систем выполняются параллельно, внутри очереди запросы
+    идут последовательно; паузы между ними задает ограничитель частоты
+    (utils.rate_limiter) в парсерах.
+    """
+
+    def __init__(self):
+        self.timings = {}
+
+    def _run_queue(self, engine, handler, keywords):
+        """Обработать очередь ключевых слов одной поисковой системы"""
+        started = time.perf_counter()
+        engine_results = {}
+
+        for keyword in keywords:
+            try:
+                results = handler(keyword)
+                if results:
+                    engine_results[keyword] = results
+            except Exception as e:
+                logger.error(f"Ошибка обработки '{keyword}' в {engine}: {e}")
+
+        self.timings[engine] = time.perf_counter() - started
+        logger.info(f"Очередь {engine} завершена за {self.timings[engine]:.1f} с")
+        return engine_results
+
+    def run(self, keywords, handlers):
+        """Запустить очереди всех систем параллельно.
+
+        handlers - словарь {поисковая система: функция(keyword) -> результаты}.
+        Возвращает {поисковая система: {keyword: результаты}}.
+        """
+        keywords = list(keywords)
+        self.timings = {}
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=len(handlers), thread_name_prefix="engine") as executor:
+            futures = {
+                engine: executor.submit(self._run_queue, engine, handler, keywords)
+                for engine, handler in handlers.items()
+            }
+            results = {engine: future.result() for engine, future in futures.items()}
+
+        logger.info(f"Опрос поисковых систем завершен за {time.perf_counter() - started:.1f} с")
+        return results
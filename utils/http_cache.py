@@ -0,0 +1,201 @@
+"""
+Дисковый кэш HTTP-ответов для страниц конкурентов
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from loguru import logger
+from config import Config
+
+
+class ResponseCache:
+    """Кэш ответов по URL: тело, ETag/Last-Modified, TTL и ограничение размера (LRU).
+
+    В пределах TTL страница отдается из кэша без запроса. После TTL запрос
+    отправляется с If-None-Match/If-Modified-Since, и ответ 304 продлевает запись.
+    """
+
+    def __init__(self, cache_dir=None, ttl=None, max_bytes=None):
+        self.cache_dir = cache_dir or Config.HTTP_CACHE_DIR
+        self.ttl = Config.HTTP_CACHE_TTL if ttl is None else ttl
+        self.max_bytes = Config.HTTP_CACHE_MAX_MB * 1024 * 1024 if max_bytes is None else max_bytes
+        self._lock = threading.RLock()
+        self._index = None  # ключ -> [размер тела, время последнего обращения]
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Сбросить счетчики текущего запуска"""
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'stored': 0, 'evicted': 0}
+
+    def log_stats(self):
+        """Вывести счетчики кэша в лог"""
+        stats = self.stats
+        logger.info(
+            f"HTTP-кэш: из кэша {stats['hits']}, подтверждено (304) {stats['revalidated']}, "
+            f"загружено {stats['misses']}, сохранено {stats['stored']}, вытеснено {stats['evicted']}"
+        )
+
+    def _key(self, url):
+        """Ключ записи: sha256 от URL"""
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _paths(self, key):
+        """Файлы записи: мета-данные и тело"""
+        base = os.path.join(self.cache_dir, key)
+        return f"{base}.json", f"{base}.body"
+
+    def _load_index(self):
+        """Прочитать размеры и время обращения записей с диска (один раз)"""
+        if self._index is not None:
+            return self._index
+        self._index = {}
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith('.body'):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                except OSError:
+                    continue
+                self._index[name[:-len('.body')]] = [stat.st_size, stat.st_mtime]
+        return self._index
+
+    def _write_atomic(self, path, data):
+        """Записать файл через временный файл и os.replace"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                tmp_file.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _remove(self, key):
+        """Удалить запись"""
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self._load_index().pop(key, None)
+
+    def _evict(self):
+        """Вытеснить давно не использованные записи сверх лимита размера"""
+        index = self._load_index()
+        total = sum(size for size, _ in index.values())
+        if total <= self.max_bytes:
+            return
+        for key, (size, _) in sorted(index.items(), key=lambda item: item[1][1]):
+            if total <= self.max_bytes:
+                break
+            self._remove(key)
+            total -= size
+            self.stats['evicted'] += 1
+
+    def _touch(self, key):
+        """Отметить обращение к записи (время модификации тела - основа LRU)"""
+        now = time.time()
+        try:
+            os.utime(self._paths(key)[1], (now, now))
+        except OSError:
+            pass
+        entry = self._load_index().get(key)
+        if entry:
+            entry[1] = now
+
+    def lookup(self, url):
+        """Запись для URL или None; в записи поле fresh - можно ли обойтись без запроса"""
+        key = self._key(url)
+        meta_path, body_path = self._paths(key)
+        with self._lock:
+            try:
+                with open(meta_path, 'r', encoding='utf-8') as meta_file:
+                    entry = json.load(meta_file)
+            except (OSError, ValueError):
+                return None
+            if entry.get('url') != url or not os.path.exists(body_path):
+                return None
+            entry['key'] = key
+            entry['fresh'] = time.time() - entry.get('stored_at', 0) < self.ttl
+            return entry
+
+    def conditional_headers(self, entry):
+        """Заголовки условного запроса для устаревшей записи"""
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def read_text(self, entry):
+        """Декодированное тело записи"""
+        with self._lock:
+            with open(self._paths(entry['key'])[1], 'rb') as body_file:
+                body = body_file.read()
+            self._touch(entry['key'])
+        return body.decode(entry.get('encoding') or 'utf-8', errors='replace')
+
+    def hit(self, entry):
+        """Свежая запись: отдать без запроса к сайту"""
+        self.stats['hits'] += 1
+        return self.read_text(entry)
+
+    def revalidate(self, entry, headers):
+        """Ответ 304: продлить запись и отдать тело из кэша"""
+        with self._lock:
+            entry = dict(entry)
+            entry['stored_at'] = time.time()
+            entry['etag'] = headers.get('ETag') or entry.get('etag')
+            entry['last_modified'] = headers.get('Last-Modified') or entry.get('last_modified')
+            key = entry.pop('key')
+            entry.pop('fresh', None)
+            self._write_atomic(self._paths(key)[0], json.dumps(entry).encode('utf-8'))
+            entry['key'] = key
+            self.stats['revalidated'] += 1
+        return self.read_text(entry)
+
+    def store(self, url, body, headers, encoding=None):
+        """Сохранить ответ 200 (кроме Cache-Control: no-store)"""
+        self.stats['misses'] += 1
+        if 'no-store' in (headers.get('Cache-Control') or '').lower():
+            return
+        if len(body) > self.max_bytes:
+            return
+
+        key = self._key(url)
+        meta_path, body_path = self._paths(key)
+        entry = {
+            'url': url,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'encoding': encoding or 'utf-8',
+            'stored_at': time.time(),
+            'size': len(body),
+        }
+        try:
+            with self._lock:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                self._write_atomic(body_path, body)
+                self._write_atomic(meta_path, json.dumps(entry).encode('utf-8'))
+                self._load_index()[key] = [len(body), time.time()]
+                self.stats['stored'] += 1
+                self._evict()
+        except Exception as e:
+            logger.error(f"Ошибка записи в HTTP-кэш {url}: {e}")
+
+    def clear(self):
+        """Удалить все записи"""
+        with self._lock:
+            for key in list(self._load_index()):
+                self._remove(key)
+
+
+# Общий кэш процесса (None, если кэш отключен)
+response_cache = ResponseCache() if Config.USE_HTTP_CACHE else None
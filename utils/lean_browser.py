@@ -0,0 +1,103 @@
+"""
+Облегченный режим браузера: блокировка лишних ресурсов и учет трафика через CDP
+"""
+import json
+from selenium.webdriver.support.ui import WebDriverWait
+from loguru import logger
+from config import Config
+
+
+# Ресурсы, не нужные для HTML выдачи (шаблоны Network.setBlockedURLs)
+BLOCKED_URL_PATTERNS = [
+    # Изображения и медиа
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico',
+    '*.mp4', '*.webm', '*.mp3', '*.m3u8',
+    # Шрифты
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*fonts.googleapis.com*', '*fonts.gstatic.com*',
+    # Аналитика и реклама
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+    '*googlesyndication.com*', '*googleadservices.com*', '*mc.yandex.ru*', '*an.yandex.ru*',
+    '*yandexadexchange.net*', '*connect.facebook.net*',
+]
+
+
+def configure_options(chrome_options):
+    """Настройки Chrome для облегченного режима: без картинок, с журналом сети"""
+    chrome_options.page_load_strategy = 'eager'  # driver.get возвращается после DOMContentLoaded
+    chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+    chrome_options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+    })
+    chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+
+def enable_blocking(driver):
+    """Включить блокировку ресурсов через CDP (действует до закрытия браузера)"""
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
+
+
+def wait_dom_ready(driver, timeout=None):
+    """Дождаться готовности DOM вместо фиксированной паузы"""
+    WebDriverWait(driver, timeout or Config.TIMEOUT).until(
+        lambda d: d.execute_script("return document.readyState") in ('interactive', 'complete')
+    )
+
+
+def collect_traffic(driver):
+    """Трафик с прошлого вызова по журналу performance: байт, запросов, заблокировано.
+
+    Журнал очищается при чтении, поэтому вызов перед загрузкой страницы
+    отбрасывает трафик предыдущей аренды браузера.
+    """
+    traffic = {'bytes': 0, 'requests': 0, 'blocked': 0}
+    try:
+        entries = driver.get_log('performance')
+    except Exception as e:
+        logger.debug(f"Журнал performance недоступен: {e}")
+        return traffic
+
+    for entry in entries:
+        message = json.loads(entry['message'])['message']
+        method = message.get('method')
+        if method == 'Network.loadingFinished':
+            traffic['bytes'] += int(message['params'].get('encodedDataLength', 0))
+            traffic['requests'] += 1
+        elif method == 'Network.loadingFailed' and message['params'].get('blockedReason'):
+            traffic['blocked'] += 1
+    return traffic
+
+
+class TrafficMeter:
+    """Учет трафика загрузок выдачи одной поисковой системы"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.totals = {'serps': 0, 'bytes': 0, 'requests': 0, 'blocked': 0}
+
+    def start(self, driver):
+        """Сбросить журнал перед загрузкой страницы"""
+        collect_traffic(driver)
+
+    def finish(self, driver, keyword):
+        """Трафик загрузки выдачи по ключевому слову"""
+        traffic = collect_traffic(driver)
+        self.totals['serps'] += 1
+        for key, value in traffic.items():
+            self.totals[key] += value
+        logger.info(
+            f"Трафик выдачи {self.engine} '{keyword}': {traffic['bytes'] / 1024:.1f} КБ, "
+            f"запросов {traffic['requests']}, заблокировано {traffic['blocked']}"
+        )
+        return traffic
+
+    def log_totals(self):
+        """Итог трафика выдачи за запуск"""
+        if not self.totals['serps']:
+            return
+        logger.info(
+            f"Трафик выдачи {self.engine}: {self.totals['serps']} страниц, "
+            f"{self.totals['bytes'] / 1024:.1f} КБ "
+            f"({self.totals['bytes'] / 1024 / self.totals['serps']:.1f} КБ на страницу), "
+            f"заблокировано запросов {self.totals['blocked']}"
+        )
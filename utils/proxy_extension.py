@@ -0,0 +1,113 @@
+"""
+Расширения Chrome для прокси с авторизацией: одно на прокси, с кэшем на диске
+"""
+import hashlib
+import io
+import json
+import os
+import tempfile
+import zipfile
+from loguru import logger
+from config import Config
+
+
+MANIFEST_JSON = """
+{
+    "version": "1.0.0",
+    "manifest_version": 2,
+    "name": "Chrome Proxy",
+    "permissions": [
+        "proxy",
+        "tabs",
+        "unlimitedStorage",
+        "storage",
+        "<all_urls>",
+        "webRequest",
+        "webRequestBlocking"
+    ],
+    "background": {
+        "scripts": ["background.js"]
+    },
+    "minimum_chrome_version":"22.0.0"
+}
+"""
+
+BACKGROUND_JS = """
+var config = {
+        mode: "fixed_servers",
+        rules: {
+        singleProxy: {
+            scheme: %(scheme)s,
+            host: %(host)s,
+            port: %(port)d
+        },
+        bypassList: ["localhost"]
+        }
+    };
+
+chrome.proxy.settings.set({value: config, scope: "regular"}, function() {});
+
+function callbackFn(details) {
+    return {
+        authCredentials: {
+            username: %(username)s,
+            password: %(password)s
+        }
+    };
+}
+
+chrome.webRequest.onAuthRequired.addListener(
+            callbackFn,
+            {urls: ["<all_urls>"]},
+            ['blocking']
+);
+"""
+
+
+def render_background_js(proxy):
+    """background.js для прокси (строки экранируются как JSON)"""
+    return BACKGROUND_JS % {
+        'scheme': json.dumps(proxy.scheme),
+        'host': json.dumps(proxy.host),
+        'port': proxy.port,
+        'username': json.dumps(proxy.user or ""),
+        'password': json.dumps(proxy.password or ""),
+    }
+
+
+def _build_zip(background_js):
+    """Содержимое zip-архива расширения (фиксированные даты - одинаковые байты при пересборке)"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, content in (("manifest.json", MANIFEST_JSON), ("background.js", background_js)):
+            archive.writestr(zipfile.ZipInfo(name, date_time=(2020, 1, 1, 0, 0, 0)), content)
+    return buffer.getvalue()
+
+
+def build_proxy_extension(proxy, cache_dir=None):
+    """Путь к расширению для прокси; собирается один раз, дальше берется из кэша.
+
+    Имя файла - хэш содержимого, поэтому разные учетные данные не пересекаются,
+    а файл записывается атомарно (os.replace) и безопасен для параллельных
+    запусков браузеров в нескольких потоках и процессах.
+    """
+    cache_dir = cache_dir or Config.PROXY_EXTENSION_DIR
+    background_js = render_background_js(proxy)
+    digest = hashlib.sha256((MANIFEST_JSON + background_js).encode('utf-8')).hexdigest()
+    path = os.path.join(cache_dir, f"proxy_{digest[:32]}.zip")
+    if os.path.exists(path):
+        return path
+
+    # В расширении лежат учетные данные: каталог и файлы доступны только владельцу
+    os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            tmp_file.write(_build_zip(background_js))
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    logger.debug(f"Собрано расширение прокси {proxy.key}: {path}")
+    return path
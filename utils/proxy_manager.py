@@ -4,63 +4,11 @@
 import random
 import time
 import requests
-import zipfile
 from fake_useragent import UserAgent
 from loguru import logger
 from config import Config
-
-
-manifest_json = """
-{
-    "version": "1.0.0",
-    "manifest_version": 2,
-    "name": "Chrome Proxy",
-    "permissions": [
-        "proxy",
-        "tabs",
-        "unlimitedStorage",
-        "storage",
-        "<all_urls>",
-        "webRequest",
-        "webRequestBlocking"
-    ],
-    "background": {
-        "scripts": ["background.js"]
-    },
-    "minimum_chrome_version":"22.0.0"
-}
-"""
-
-background_js = """
-var config = {
-        mode: "fixed_servers",
-        rules: {
-        singleProxy: {
-            scheme: "http",
-            host: "%s",
-            port: parseInt(%s)
-        },
-        bypassList: ["localhost"]
-        }
-    };
-
-chrome.proxy.settings.set({value: config, scope: "regular"}, function() {});
-
-function callbackFn(details) {
-    return {
-        authCredentials: {
-            username: "%s",
-            password: "%s"
-        }
-    };
-}
-
-chrome.webRequest.onAuthRequired.addListener(
-            callbackFn,
-            {urls: ["<all_urls>"]},
-            ['blocking']
-);
-""" % (Config.PROXY_HOST, Config.PROXY_PORT, Config.PROXY_USER, Config.PROXY_PASS)
+from utils.proxy_extension import build_proxy_extension
+from utils.proxy_pool import Proxy, proxy_pool
 
 
 class ProxyManager:
@@ -70,7 +18,6 @@ class ProxyManager:
         self.proxy_list = Config.PROXY_LIST
         self.user_agents = Config.USER_AGENTS
         self.ua = UserAgent()
-        self.current_proxy_index = 0
         
     def get_random_user_agent(self):
         """Получить случайный User-Agent"""
@@ -80,15 +27,10 @@ class ProxyManager:
             return random.choice(self.user_agents)
     
     def get_proxy(self):
-        """Получить следующий прокси из списка"""
-        if not self.proxy_list:
+        """Расширение Chrome для лучшего прокси пула (None, если прокси не настроены)"""
+        if not proxy_pool:
             return None
-
-        pluginfile = 'proxy_auth_plugin.zip'
-        with zipfile.ZipFile(pluginfile, 'w') as zp:
-            zp.writestr("manifest.json", manifest_json)
-            zp.writestr("background.js", background_js)
-        return pluginfile
+        return build_proxy_extension(max(proxy_pool.proxies, key=Proxy.score))
     
     def get_headers(self):
         """Получить заголовки для запроса"""
@@ -121,15 +63,9 @@ class ProxyManager:
             return False
     
     def get_session(self):
-        """Получить сессию с настройками"""
+        """Получить сессию с настройками (прокси выдается на каждый запрос из proxy_pool)"""
         session = requests.Session()
         session.headers.update(self.get_headers())
-        
-        if Config.USE_PROXY and self.proxy_list:
-            proxy = self.get_proxy()
-            if proxy:
-                session.proxies = {"http": proxy, "https": proxy}
-        
         return session
 
 # Глобальный экземпляр менеджера прокси
@@ -0,0 +1,129 @@
+"""
+Адаптивное ограничение частоты запросов: корзина токенов на каждую цель и AIMD
+"""
+import random
+import threading
+import time
+from loguru import logger
+from config import Config
+
+
+class _Bucket:
+    """Корзина токенов одной цели (поисковая система или хост)"""
+
+    def __init__(self, rate, min_rate, max_rate, capacity):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.stats = {'requests': 0, 'throttled': 0, 'waited': 0.0}
+
+    def refill(self, now):
+        """Начислить токены за прошедшее время"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class RateLimiter:
+    """Ограничитель частоты запросов по целям.
+
+    Каждая цель (google, yandex, домен конкурента) получает свою корзину токенов.
+    Частота растет на RATE_LIMIT_INCREASE после каждого успешного запроса и
+    умножается на RATE_LIMIT_DECREASE при капче или 429 (AIMD), оставаясь
+    в пределах [минимум, максимум] для цели.
+    """
+
+    def __init__(self, limits=None, default=None, increase=None, decrease=None, jitter=None):
+        self.limits = limits if limits is not None else Config.RATE_LIMITS
+        self.default = default or Config.RATE_LIMIT_DEFAULT
+        self.increase = increase if increase is not None else Config.RATE_LIMIT_INCREASE
+        self.decrease = decrease if decrease is not None else Config.RATE_LIMIT_DECREASE
+        self.jitter = jitter if jitter is not None else Config.RATE_LIMIT_JITTER
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, target):
+        """Корзина цели (создается при первом обращении)"""
+        if target not in self._buckets:
+            rate, min_rate, max_rate = self.limits.get(target, self.default)
+            self._buckets[target] = _Bucket(rate, min_rate, max_rate, capacity=1.0)
+        return self._buckets[target]
+
+    def reserve(self, target):
+        """Занять токен и вернуть паузу в секундах до запроса (для time.sleep и asyncio.sleep)"""
+        with self._lock:
+            bucket = self._bucket(target)
+            now = time.monotonic()
+            bucket.refill(now)
+            # Токен занимается сразу, даже в долг: параллельные запросы встают в очередь
+            bucket.tokens -= 1
+            wait = max(-bucket.tokens / bucket.rate, bucket.blocked_until - now, 0.0)
+            if wait and self.jitter:
+                wait *= random.uniform(1 - self.jitter, 1 + self.jitter)
+            bucket.stats['requests'] += 1
+            bucket.stats['waited'] += wait
+            return wait
+
+    def acquire(self, target):
+        """Дождаться разрешения на запрос к цели"""
+        wait = self.reserve(target)
+        if wait:
+            logger.debug(f"Ограничение частоты {target}: пауза {wait:.2f} с")
+            time.sleep(wait)
+        return wait
+
+    def success(self, target):
+        """Запрос прошел: аддитивно увеличить частоту"""
+        with self._lock:
+            bucket = self._bucket(target)
+            bucket.rate = min(bucket.max_rate, bucket.rate + self.increase)
+
+    def throttled(self, target, retry_after=None):
+        """Капча или 429: мультипликативно снизить частоту и сбросить накопленные токены"""
+        with self._lock:
+            bucket = self._bucket(target)
+            bucket.rate = max(bucket.min_rate, bucket.rate * self.decrease)
+            bucket.tokens = min(bucket.tokens, 0.0)
+            bucket.stats['throttled'] += 1
+            if retry_after:
+                bucket.blocked_until = max(bucket.blocked_until, time.monotonic() + retry_after)
+            rate = bucket.rate
+        logger.warning(f"Ограничение {target}: частота снижена до {rate:.3f} запр/с")
+
+    def rate(self, target):
+        """Текущая частота цели, запросов в секунду"""
+        with self._lock:
+            return self._bucket(target).rate
+
+    def reset(self):
+        """Забыть накопленные частоты всех целей"""
+        with self._lock:
+            self._buckets = {}
+
+    def log_stats(self, targets=None):
+        """Статистика по целям: запросы, снижения частоты, суммарная пауза"""
+        with self._lock:
+            buckets = {
+                target: bucket for target, bucket in self._buckets.items()
+                if targets is None or target in targets
+            }
+            for target, bucket in buckets.items():
+                logger.info(
+                    f"Частота {target}: {bucket.rate:.3f} запр/с, запросов {bucket.stats['requests']}, "
+                    f"снижений {bucket.stats['throttled']}, ожидание {bucket.stats['waited']:.1f} с"
+                )
+
+
+def retry_after_seconds(headers):
+    """Значение Retry-After в секундах (только числовая форма)"""
+    try:
+        return float(headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+# Глобальный ограничитель: общий для всех парсеров и потоков
+rate_limiter = RateLimiter()